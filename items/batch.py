@@ -0,0 +1,236 @@
+"""
+Batch requests: many calls to the items endpoints in one HTTP round trip.
+
+POST /api/batch/ with a list of sub-requests:
+
+    [{"method": "GET", "path": "/api/brands/?page=2"},
+     {"method": "POST", "path": "/api/stores/", "body": {"name": "Store"}}]
+
+returns their responses in the same order:
+
+    [{"status": 200, "headers": {}, "body": {...}},
+     {"status": 201, "headers": {}, "body": {...}}]
+
+The batch is authenticated once, sub-requests call the views directly as the
+same user (without going through middleware again). Writes run in order in
+the request thread (so they are audit stamped), reads between two writes run
+in parallel on up to BATCH_MAX_WORKERS threads, each with its own database
+connection, unless the request is inside a transaction (they would not see
+its changes).
+
+"""
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, connections
+from django.urls import Resolver404, resolve
+from rest_framework import exceptions
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+LOGGER = logging.getLogger(__name__)
+METHODS = ["GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"]
+# Headers of sub-responses returned.
+HEADERS = ["Allow", "ETag", "Location"]
+
+
+def validate(data, max_requests):
+    """
+    Check sub-requests of a batch.
+
+    Parameters:
+        data: object
+            Parsed request body.
+        max_requests: int
+
+    Returns:
+        list(dict), with method, path and body of each sub-request.
+
+    Raises:
+        rest_framework.exceptions.ValidationError
+
+    """
+    if not isinstance(data, list) or not data:
+        raise exceptions.ValidationError(
+            ["Expected a non empty list of requests."])
+    if len(data) > max_requests:
+        raise exceptions.ValidationError(
+            ["At most {0} requests per batch.".format(max_requests)])
+
+    sub_requests = []
+    for number, sub_request in enumerate(data):
+        errors = {}
+        if not isinstance(sub_request, dict):
+            raise exceptions.ValidationError(
+                {str(number): ["Expected an object."]})
+        method = str(sub_request.get("method", "GET")).upper()
+        path = sub_request.get("path")
+        if method not in METHODS:
+            errors["method"] = ["Invalid method."]
+        if not isinstance(path, str) or not path.startswith("/api/"):
+            errors["path"] = ["Expected a path starting with /api/."]
+        if errors:
+            raise exceptions.ValidationError({str(number): errors})
+        sub_requests.append({"method": method, "path": path,
+                             "body": sub_request.get("body")})
+    return sub_requests
+
+
+def get_groups(sub_requests, parallel):
+    """
+    Group sub-requests in the order they must run.
+
+    Parameters:
+        sub_requests: list(dict)
+        parallel: bool
+            Group consecutive reads to run them in parallel.
+
+    Returns:
+        list(list(int)), indexes of each group.
+
+    """
+    groups = []
+    for index, sub_request in enumerate(sub_requests):
+        if (parallel and groups and sub_request["method"] in SAFE_METHODS and
+                sub_requests[groups[-1][-1]]["method"] in SAFE_METHODS):
+            groups[-1].append(index)
+        else:
+            groups.append([index])
+    return groups
+
+
+def build_request(request, sub_request):
+    """
+    Get Django request for a sub-request, authenticated as the batch.
+
+    Parameters:
+        request: rest_framework.request.Request
+            Batch request.
+        sub_request: dict
+
+    Returns:
+        django.core.handlers.wsgi.WSGIRequest
+
+    """
+    url = urlsplit(sub_request["path"])
+    body = b""
+    if sub_request["body"] is not None:
+        body = json.dumps(sub_request["body"]).encode()
+    environ = dict(request.META, **{
+        "REQUEST_METHOD": sub_request["method"],
+        "PATH_INFO": url.path,
+        "QUERY_STRING": url.query,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "HTTP_ACCEPT": "application/json",
+        "wsgi.input": io.BytesIO(body),
+    })
+    environ.pop("HTTP_IF_NONE_MATCH", None)
+    django_request = WSGIRequest(environ)
+    # pylint: disable=protected-access
+    django_request._force_auth_user = request.user
+    django_request._force_auth_token = request.auth
+    return django_request
+
+
+def get_body(response):
+    """
+    Get content of a sub-response.
+
+    Parameters:
+        response: django.http.HttpResponse
+
+    Returns:
+        object, data not rendered yet, decoded JSON or text.
+
+    """
+    if isinstance(response, Response) and not response.is_rendered:
+        return response.data
+    content = response.content
+    if not content:
+        return None
+    try:
+        return json.loads(content.decode())
+    except ValueError:
+        return content.decode(errors="replace")
+
+
+def run(request, sub_request, allowed_views, close_connections=False):
+    """
+    Get response of a sub-request.
+
+    Parameters:
+        request: rest_framework.request.Request
+            Batch request.
+        sub_request: dict
+        allowed_views: set
+            View classes sub-requests can call.
+        close_connections: bool
+            Give database connections of the thread back when done.
+
+    Returns:
+        dict, status, headers and body.
+
+    """
+    try:
+        try:
+            match = resolve(urlsplit(sub_request["path"]).path)
+        except Resolver404:
+            match = None
+        if match is None or getattr(match.func, "cls",
+                                    None) not in allowed_views:
+            return {"status": 404, "headers": {},
+                    "body": {"detail": "Not found."}}
+
+        response = match.func(build_request(request, sub_request),
+                              *match.args, **match.kwargs)
+        return {"status": response.status_code,
+                "headers": {name: response[name] for name in HEADERS
+                            if response.has_header(name)},
+                "body": get_body(response)}
+    except Exception:  # pylint: disable=broad-except
+        LOGGER.exception("Error in batch request %s %s",
+                         sub_request["method"], sub_request["path"])
+        return {"status": 500, "headers": {},
+                "body": {"detail": "Server error."}}
+    finally:
+        if close_connections:
+            connections.close_all()
+
+
+def run_batch(request, sub_requests, allowed_views, max_workers):
+    """
+    Get responses of sub-requests, running reads in parallel when possible.
+
+    Parameters:
+        request: rest_framework.request.Request
+        sub_requests: list(dict)
+            See validate().
+        allowed_views: set
+            View classes sub-requests can call.
+        max_workers: int
+            Threads for reads.
+
+    Returns:
+        list(dict), see run().
+
+    """
+    groups = get_groups(sub_requests,
+                        max_workers > 1 and not connection.in_atomic_block)
+    responses = [None] * len(sub_requests)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for group in groups:
+            if len(group) == 1:
+                responses[group[0]] = run(
+                    request, sub_requests[group[0]], allowed_views)
+                continue
+            futures = [executor.submit(run, request, sub_requests[index],
+                                       allowed_views, True)
+                       for index in group]
+            for index, future in zip(group, futures):
+                responses[index] = future.result()
+    return responses
@@ -0,0 +1,263 @@
+"""
+Benchmarks of the items endpoints.
+
+Every router endpoint is timed for list, detail and create (flat and nested
+where available) against seeded datasets (see items.seeding), reporting
+latency percentiles, number of queries and peak Python memory per request.
+
+Run with the benchmark management command, which uses a separate database.
+
+"""
+import json
+import math
+import subprocess
+import time
+import tracemalloc
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import seeding
+from .models import Brand, Item, Location, Order, Purchase, Store
+
+ENDPOINTS = ["brands", "stores", "orders", "items", "locations", "purchases"]
+NESTED_ENDPOINTS = ["orders", "items", "locations", "purchases"]
+MODELS = {"brands": Brand, "stores": Store, "orders": Order, "items": Item,
+          "locations": Location, "purchases": Purchase}
+DATA_TABLES = ["items_purchase", "items_order", "items_item",
+               "items_location", "items_store", "items_brand"]
+
+
+def percentile(values, percent):
+    """
+    Get percentile of values (nearest rank).
+
+    Parameters:
+        values: list(float)
+        percent: float
+            Between 0 and 100.
+
+    Returns:
+        float
+
+    """
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def get_create_data(endpoint):
+    """
+    Get valid data to create an object for an endpoint.
+
+    Parameters:
+        endpoint: str
+
+    Returns:
+        dict
+
+    """
+    if endpoint in ["brands", "stores"]:
+        return {"name": "Benchmark"}
+    elif endpoint == "orders":
+        return {"date": date(2017, 6, 1).isoformat(),
+                "store": Store.objects.order_by("id").first().id}
+    elif endpoint == "items":
+        return {"name": "Benchmark", "unit": "g", "weight": 1500,
+                "brand": Brand.objects.order_by("id").first().id}
+    elif endpoint == "locations":
+        location = Location.objects.order_by("id").first()
+        return {"address": "Benchmark", "district": location.district_id}
+    return {"price": "10.50", "currency": "USD",
+            "item": Item.objects.order_by("id").first().id,
+            "location": Location.objects.order_by("id").first().id}
+
+
+def get_cases(endpoint):
+    """
+    Get requests to benchmark for an endpoint.
+
+    Parameters:
+        endpoint: str
+
+    Returns:
+        list(tuple), action, nested flag, method, url and data.
+
+    """
+    url = "/api/{0}/".format(endpoint)
+    detail_url = "{0}{1}/".format(
+        url, MODELS[endpoint].objects.order_by("id").values_list(
+            "id", flat=True).first())
+    cases = [("list", False, "get", url, None),
+             ("detail", False, "get", detail_url, None)]
+    if endpoint in NESTED_ENDPOINTS:
+        cases.extend([("list", True, "get", url, {"nested": True}),
+                      ("detail", True, "get", detail_url, {"nested": True})])
+    cases.append(("create", False, "post", url, get_create_data(endpoint)))
+    return cases
+
+
+def measure(client, method, url, data, iterations):
+    """
+    Time a request, then repeat it once to count queries and memory.
+
+    Writing requests are rolled back so the dataset doesn't change.
+
+    Parameters:
+        client: rest_framework.test.APIClient
+        method: str
+        url: str
+        data: dict
+        iterations: int
+
+    Returns:
+        dict
+
+    """
+    def request():
+        """ Make request, rolling back any change. """
+        with transaction.atomic():
+            response = getattr(client, method)(url, data, format=(
+                "json" if method != "get" else None))
+            transaction.set_rollback(True)
+        return response
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = request()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"status": response.status_code,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "queries": len(queries),
+            "peak_memory_kb": round(peak / 1024, 1)}
+
+
+def reset_data():
+    """ Remove all rows of items models. """
+    with connection.cursor() as cursor:
+        cursor.execute("TRUNCATE {0} RESTART IDENTITY CASCADE".format(
+            ", ".join(DATA_TABLES)))
+
+
+def run(scales, iterations=20, seed_value=0, endpoints=None, log=None):
+    """
+    Seed each scale and benchmark endpoints against it.
+
+    Parameters:
+        scales: list(int)
+            Numbers of purchases to seed.
+        iterations: int
+            Timed requests per case.
+        seed_value: int
+            Seed for the dataset.
+        endpoints: list(str)
+            Endpoints to benchmark (all if None).
+        log: callable
+            Called with progress messages.
+
+    Returns:
+        list(dict), one result per scale and case.
+
+    """
+    log = log or (lambda message: None)
+    user = get_user_model().objects.get_or_create(username="benchmark")[0]
+    client = APIClient()
+    client.force_authenticate(user)
+
+    results = []
+    for scale in scales:
+        log("Seeding {0} purchases...".format(scale))
+        reset_data()
+        seeding.seed(scale, seed_value=seed_value)
+        for endpoint in endpoints or ENDPOINTS:
+            for action, nested, method, url, data in get_cases(endpoint):
+                result = {"scale": scale, "endpoint": endpoint,
+                          "action": action, "nested": nested}
+                result.update(measure(client, method, url, data, iterations))
+                log("{scale} {endpoint} {action}{0}: p50 {p50_ms}ms, "
+                    "p95 {p95_ms}ms, {queries} queries, "
+                    "{peak_memory_kb}KB".format(
+                        " (nested)" if nested else "", **result))
+                results.append(result)
+    return results
+
+
+def get_commit():
+    """
+    Get current git commit, if available.
+
+    Returns:
+        str or None
+
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(results, path, **extra):
+    """
+    Save results as JSON along with the current commit.
+
+    Parameters:
+        results: list(dict)
+        path: str
+        **extra:
+            Other values to store (iterations, seed, ...).
+
+    """
+    data = {"commit": get_commit(), "date": timezone.now().isoformat(),
+            "results": results}
+    data.update(extra)
+    with open(path, "w") as output:
+        json.dump(data, output, indent=2)
+
+
+def compare(results, baseline_results):
+    """
+    Compare results with results of a previous run.
+
+    Parameters:
+        results: list(dict)
+        baseline_results: list(dict)
+
+    Returns:
+        list(dict), results found in both runs with p50/p95 ratios and
+        query count difference.
+
+    """
+    def get_key(result):
+        """ Identify a case. """
+        return (result["scale"], result["endpoint"], result["action"],
+                result["nested"])
+
+    baseline = {get_key(result): result for result in baseline_results}
+    comparison = []
+    for result in results:
+        old = baseline.get(get_key(result))
+        if old is None:
+            continue
+        comparison.append(dict(
+            result,
+            p50_ratio=round(result["p50_ms"] / old["p50_ms"], 2),
+            p95_ratio=round(result["p95_ms"] / old["p95_ms"], 2),
+            queries_diff=result["queries"] - old["queries"]))
+    return comparison
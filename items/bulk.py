@@ -0,0 +1,111 @@
+"""
+Bulk updates and deletes, one set-based statement instead of a request per
+object.
+
+/api/<endpoint>/bulk/ selects objects with query parameters, ids (comma
+separated) and/or any of the bulk_fields of the viewset (exact match, empty
+for null), at least one is required:
+
+    PATCH /api/purchases/bulk/?order=3 {"order": 7}  -> {"updated": 12}
+    DELETE /api/purchases/bulk/?ids=4,5,9  -> {"deleted": 3, "models": {...}}
+
+Updates only take bulk_fields, each validated by its serializer field, and
+stamp modified and modified_by in the same UPDATE (see
+AuditStampedQuerySet).
+Deletes report the objects deleted per model, cascades included.
+
+"""
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from rest_framework import exceptions
+from rest_framework.decorators import list_route
+from rest_framework.response import Response
+
+IDS_PARAM = "ids"
+
+
+class BulkViewMixin(object):
+    """
+    Mixin for model viewsets adding bulk updates and deletes.
+
+    Set bulk_fields to the fields objects can be selected by and updated.
+
+    """
+    bulk_fields = ()
+
+    def get_bulk_queryset(self):
+        """
+        Get objects selected by the query parameters.
+
+        Returns:
+            django.db.models.QuerySet
+
+        Raises:
+            rest_framework.exceptions.ValidationError
+
+        """
+        meta = getattr(self.queryset.model, "_meta")
+        params = self.request.query_params
+        filters = {}
+        errors = {}
+        if IDS_PARAM in params:
+            try:
+                filters["pk__in"] = [int(pk) for pk in
+                                     params[IDS_PARAM].split(",") if pk]
+            except ValueError:
+                errors[IDS_PARAM] = ["A comma separated list of ids."]
+        for name in self.bulk_fields:
+            if name not in params:
+                continue
+            field = meta.get_field(name)
+            if not params[name] and field.null:
+                filters["{0}__isnull".format(name)] = True
+                continue
+            try:
+                filters[name] = field.to_python(params[name])
+            except ValidationError as validation_error:
+                errors[name] = validation_error.messages
+        if errors:
+            raise exceptions.ValidationError(errors)
+        if not filters:
+            raise exceptions.ValidationError([
+                "Select objects with {0}.".format(
+                    ", ".join((IDS_PARAM,) + tuple(self.bulk_fields)))])
+        return self.queryset.filter(**filters)
+
+    @list_route(methods=["patch", "delete"])
+    def bulk(self, request):
+        """ Update or delete the selected objects. """
+        queryset = self.get_bulk_queryset()
+        if request.method == "DELETE":
+            deleted, models = queryset.delete()
+            return Response({"deleted": deleted, "models": models})
+
+        if not isinstance(request.data, dict):
+            raise exceptions.ValidationError(
+                ["Expected an object with the new values."])
+        invalid = [name for name in request.data
+                   if name not in self.bulk_fields]
+        if invalid or not request.data:
+            raise exceptions.ValidationError([
+                "Only {0} can be updated in bulk.".format(
+                    ", ".join(self.bulk_fields) or "nothing")])
+        fields = self.serializer_class(
+            context=self.get_serializer_context()).fields
+        values = {}
+        errors = {}
+        for name, value in request.data.items():
+            try:
+                values[fields[name].source] = fields[name].run_validation(
+                    value)
+            except exceptions.ValidationError as validation_error:
+                errors[name] = validation_error.detail
+        if errors:
+            raise exceptions.ValidationError(errors)
+        try:
+            with transaction.atomic():
+                updated = queryset.update(**values)
+        except IntegrityError:
+            raise exceptions.ValidationError([
+                "Objects would no longer be unique."])
+        return Response({"updated": updated})
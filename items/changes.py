@@ -0,0 +1,184 @@
+"""
+Changes feed for clients syncing a copy of the data (delta sync).
+
+GET /api/<endpoint>/changes/ returns objects created or modified after a
+cursor (by modified and id, indexed) and ids of objects deleted after it
+(tombstones, added by database triggers, see items.Tombstone). Without a
+cursor every object is returned, the cursor of the response is sent with
+the next request:
+
+    {"results": [...], "deleted": [3, 8], "cursor": "...", "more": false}
+
+Pages have up to PAGE_SIZE objects and tombstones each, "more" tells if
+there is more to fetch right away.
+
+modified is set before the transaction commits, so objects and tombstones
+of the last CHANGES_LAG_SECONDS are left for later requests, otherwise a
+slow transaction could commit changes behind a cursor already returned.
+
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import exceptions
+from rest_framework.decorators import list_route
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .models import Tombstone
+
+
+def encode_cursor(changed, deleted):
+    """
+    Get cursor for the keys of the last object and tombstone returned.
+
+    Parameters:
+        changed: tuple
+            Modified datetime and id (None for anything after modified).
+        deleted: tuple
+            Deleted datetime and id (None for anything after deleted).
+
+    Returns:
+        str
+
+    """
+    keys = [[timestamp.isoformat(), pk] for timestamp, pk in
+            [changed, deleted]]
+    return base64.urlsafe_b64encode(json.dumps(keys).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Get keys of a cursor.
+
+    Parameters:
+        cursor: str
+            See encode_cursor().
+
+    Returns:
+        tuple, changed and deleted keys.
+
+    Raises:
+        rest_framework.exceptions.ValidationError
+            If cursor is not valid.
+
+    """
+    try:
+        keys = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        keys = [(parse_datetime(timestamp), pk) for timestamp, pk in keys]
+        changed, deleted = keys
+        if (None in [changed[0], deleted[0]] or
+                not all(pk is None or isinstance(pk, int)
+                        for _, pk in keys)):
+            raise ValueError
+    except (TypeError, ValueError):
+        raise exceptions.ValidationError({"cursor": ["Invalid cursor."]})
+    return changed, deleted
+
+
+def filter_after(queryset, field, key, until):
+    """
+    Filter rows after a key and up to a datetime, in key order.
+
+    Parameters:
+        queryset: django.db.models.QuerySet
+        field: str
+            Datetime field of the key.
+        key: tuple
+            Datetime (None for no lower bound) and id (None for anything
+            after the datetime).
+        until: datetime.datetime
+
+    Returns:
+        django.db.models.QuerySet
+
+    """
+    timestamp, pk = key
+    queryset = queryset.filter(**{field + "__lte": until}).order_by(
+        field, "id")
+    if timestamp is None:
+        return queryset
+    elif pk is None:
+        return queryset.filter(**{field + "__gt": timestamp})
+    # gte first so the index range starts at the key.
+    return queryset.filter(**{field + "__gte": timestamp}).filter(
+        Q(**{field + "__gt": timestamp}) | Q(id__gt=pk))
+
+
+def get_next_key(rows, field, until, size):
+    """
+    Get key to continue from.
+
+    Parameters:
+        rows: list
+            Objects or tombstones returned.
+        field: str
+        until: datetime.datetime
+        size: int
+            Maximum rows fetched.
+
+    Returns:
+        tuple, key and if there may be more rows.
+
+    """
+    if len(rows) < size:
+        return (until, None), False
+    return (getattr(rows[-1], field), rows[-1].id), True
+
+
+class ChangesViewMixin(object):
+    """
+    Mixin for model viewsets adding the changes feed.
+
+    Set changes_field to another datetime (e.g. an annotation of
+    get_changes_queryset()) when objects also change with related rows.
+
+    """
+    changes_field = "modified"
+
+    def get_changes_queryset(self):
+        """
+        Get objects for the changes feed, with changes_field.
+
+        Returns:
+            django.db.models.QuerySet
+
+        """
+        return self.filter_queryset(self.get_queryset())
+
+    @list_route(methods=["get"])
+    def changes(self, request):
+        """ Objects changed and ids of objects deleted after a cursor. """
+        size = api_settings.PAGE_SIZE
+        until = timezone.now() - timedelta(
+            seconds=settings.CHANGES_LAG_SECONDS)
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            changed_key, deleted_key = decode_cursor(cursor)
+        else:
+            # Full sync, objects deleted until now are not needed.
+            changed_key, deleted_key = (None, None), (until, None)
+
+        queryset = self.get_changes_queryset()
+        objects = list(filter_after(
+            queryset, self.changes_field, changed_key, until)[:size])
+        tombstones = list(filter_after(
+            Tombstone.objects.filter(
+                model=getattr(queryset.model, "_meta").model_name),
+            "deleted", deleted_key, until)[:size])
+
+        changed_key, more_changed = get_next_key(
+            objects, self.changes_field, until, size)
+        deleted_key, more_deleted = get_next_key(
+            tombstones, "deleted", until, size)
+        return Response({
+            "results": self.get_serializer(objects, many=True).data,
+            "deleted": [tombstone.object_id for tombstone in tombstones],
+            "cursor": encode_cursor(changed_key, deleted_key),
+            "more": more_changed or more_deleted,
+        })
@@ -0,0 +1,257 @@
+"""
+Server-Sent Events of changes to items models.
+
+Database triggers NOTIFY creates, updates and deletes on the items_changes
+channel (see migration 0014). One Listener thread per process LISTENs on its
+own connection and fans notifications out to the subscriptions of open
+streams. GET /api/events/ (optionally ?models=purchase,item) streams them:
+
+    event: purchase
+    data: {"action": "create", "id": 42, "model": "purchase"}
+
+Events only carry ids, clients fetch what changed (e.g. from the changes
+feed, see items.changes), which is also how they catch up after
+reconnecting. Streams end after EVENTS_STREAM_SECONDS (browsers reconnect
+by themselves), send a comment every EVENTS_HEARTBEAT_SECONDS so proxies
+keep them open, and get an "overflow" event and end when the client falls
+behind by EVENTS_QUEUE_SIZE events or notifications may have been lost.
+
+Every open stream holds a worker thread, use threaded (or async) workers.
+
+"""
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+from django.db import connections
+
+CHANNEL = "items_changes"
+MODELS = ["brand", "store", "order", "item", "location", "purchase"]
+LOGGER = logging.getLogger(__name__)
+
+# Channel and Listener of the current process.
+LISTENERS = {}
+LISTENERS_LOCK = threading.Lock()
+
+
+class Subscription(object):
+    """ Queue of events for a stream, optionally only of some models. """
+
+    def __init__(self, models=None, size=1000):
+        self.models = set(models) if models else None
+        self.queue = queue.Queue(maxsize=size)
+        self.overflowed = False
+
+    def put(self, event):
+        """
+        Add event if wanted, marking the subscription overflowed when full.
+
+        Parameters:
+            event: dict
+
+        """
+        if self.models is not None and event.get("model") not in self.models:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """
+        Get next event.
+
+        Parameters:
+            timeout: float
+                Seconds to wait.
+
+        Returns:
+            dict or None, None if no event came in time.
+
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Listener(object):
+    """ Thread listening to a channel and fanning out its notifications. """
+
+    def __init__(self, channel, using="default", timeout=1):
+        self.channel = channel
+        self.using = using
+        self.timeout = timeout
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+        self.listening = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """ Start listening. """
+        self.thread.start()
+
+    def stop(self):
+        """ Stop listening, closing the connection. """
+        self.stopped.set()
+        self.thread.join()
+
+    def subscribe(self, subscription):
+        """
+        Send notifications to a subscription.
+
+        Parameters:
+            subscription: Subscription
+
+        """
+        with self.lock:
+            self.subscriptions.add(subscription)
+
+    def unsubscribe(self, subscription):
+        """
+        Stop sending notifications to a subscription.
+
+        Parameters:
+            subscription: Subscription
+
+        """
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def publish(self, payload):
+        """
+        Send a notification to all subscriptions.
+
+        Parameters:
+            payload: str
+                JSON.
+
+        """
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            LOGGER.warning("Invalid notification on %s: %s", self.channel,
+                           payload)
+            return
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def connect(self):
+        """
+        Get a new connection (not from the pool) listening to the channel.
+
+        Returns:
+            psycopg2.extensions.connection
+
+        """
+        connection = psycopg2.connect(
+            **connections[self.using].get_connection_params())
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute("LISTEN {0}".format(self.channel))
+        return connection
+
+    def run(self):
+        """ Listen until stopped, reconnecting on errors. """
+        while not self.stopped.is_set():
+            try:
+                connection = self.connect()
+            except psycopg2.Error:
+                LOGGER.exception("Could not listen to %s", self.channel)
+                self.stopped.wait(self.timeout)
+                continue
+
+            self.listening.set()
+            try:
+                while not self.stopped.is_set():
+                    if select.select([connection], [], [], self.timeout)[0]:
+                        connection.poll()
+                        while connection.notifies:
+                            self.publish(connection.notifies.pop(0).payload)
+            except (psycopg2.Error, OSError):
+                LOGGER.exception("Stopped listening to %s", self.channel)
+            finally:
+                self.listening.clear()
+                connection.close()
+
+            # Notifications may have been lost, streams must resync.
+            with self.lock:
+                for subscription in self.subscriptions:
+                    subscription.overflowed = True
+
+
+def get_listener(channel=CHANNEL):
+    """
+    Get listener of a channel for the current process, started on first use
+    (again in forked processes).
+
+    Parameters:
+        channel: str
+
+    Returns:
+        Listener
+
+    """
+    with LISTENERS_LOCK:
+        listener = LISTENERS.get(channel)
+        if listener is None or not listener.thread.is_alive():
+            listener = LISTENERS[channel] = Listener(channel)
+            listener.start()
+    return listener
+
+
+def format_event(name, data):
+    """
+    Get Server-Sent Events message.
+
+    Parameters:
+        name: str
+        data: dict
+
+    Returns:
+        str
+
+    """
+    return "event: {0}\ndata: {1}\n\n".format(
+        name, json.dumps(data, sort_keys=True))
+
+
+def stream(listener, subscription, seconds, heartbeat):
+    """
+    Get messages of the events of a subscription, for a while.
+
+    Parameters:
+        listener: Listener
+        subscription: Subscription
+            Already subscribed, unsubscribed when done.
+        seconds: float
+            Time to stream for.
+        heartbeat: float
+            Seconds without events before sending a comment.
+
+    Returns:
+        generator of str
+
+    """
+    try:
+        end = time.monotonic() + seconds
+        remaining = seconds
+        while remaining > 0:
+            if subscription.overflowed:
+                yield format_event("overflow", {})
+                break
+            event = subscription.get(min(heartbeat, remaining))
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield format_event(event.get("model", "message"), event)
+            remaining = end - time.monotonic()
+    finally:
+        listener.unsubscribe(subscription)
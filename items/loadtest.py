@@ -0,0 +1,281 @@
+"""
+HTTP load generator for the items API.
+
+Requests are started at a fixed rate (open loop, so a saturated server shows
+up as growing latency instead of a lower request rate), following a mix of
+list, detail, nested and create calls over every endpoint, authenticated
+with a JWT token from /api/auth/token/ (renewed before it expires).
+
+Latency is measured from when a request was scheduled, including time
+waiting for a free worker thread. Creates add rows, run it against a
+disposable database (e.g. filled with the seed command).
+
+"""
+import json
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib import error, request as urllib_request
+
+from .benchmarks import ENDPOINTS, NESTED_ENDPOINTS, percentile
+
+# (Weight, action, nested)
+MIX = [(35, "list", False), (25, "detail", False), (15, "list", True),
+       (10, "detail", True), (15, "create", False)]
+
+
+class Client(object):
+    """ JSON client for the API, renewing its token when needed. """
+
+    def __init__(self, base_url, username, password, token_seconds=240,
+                 timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.token_seconds = token_seconds
+        self.timeout = timeout
+        self.token = None
+        self.token_time = None
+        self.lock = threading.Lock()
+
+    def get_token(self):
+        """
+        Get JWT token, obtaining a new one when close to expire.
+
+        Returns:
+            str
+
+        """
+        with self.lock:
+            if (self.token is None or time.monotonic() - self.token_time >=
+                    self.token_seconds):
+                status, data = self.send(
+                    "POST", "/api/auth/token/",
+                    {"username": self.username, "password": self.password},
+                    authenticate=False)
+                if status != 200:
+                    raise RuntimeError(
+                        "Could not get token ({0}): {1}".format(status, data))
+                self.token = data["token"]
+                self.token_time = time.monotonic()
+            return self.token
+
+    def send(self, method, path, data=None, authenticate=True):
+        """
+        Send a request.
+
+        Parameters:
+            method: str
+            path: str
+            data: dict
+                Sent as JSON.
+            authenticate: bool
+
+        Returns:
+            tuple, status (0 on connection errors) and decoded JSON (None if
+            not JSON).
+
+        """
+        headers = {"Accept": "application/json"}
+        if authenticate:
+            headers["Authorization"] = "Bearer {0}".format(self.get_token())
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+        http_request = urllib_request.Request(
+            self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urllib_request.urlopen(
+                    http_request, timeout=self.timeout) as response:
+                status, content = response.status, response.read()
+        except error.HTTPError as http_error:
+            status, content = http_error.code, http_error.read()
+        except (error.URLError, OSError):
+            return 0, None
+        try:
+            return status, json.loads(content.decode())
+        except ValueError:
+            return status, None
+
+
+def discover(client):
+    """
+    Get first page and number of pages of every endpoint.
+
+    Parameters:
+        client: Client
+
+    Returns:
+        dict, endpoint and tuple of objects and number of pages.
+
+    """
+    catalog = {}
+    for endpoint in ENDPOINTS:
+        status, data = client.send("GET", "/api/{0}/".format(endpoint))
+        if status != 200:
+            raise RuntimeError("Could not list {0} ({1})".format(
+                endpoint, status))
+        results = data["results"]
+        catalog[endpoint] = (results, max(1, math.ceil(
+            data["count"] / max(1, len(results)))))
+    return catalog
+
+
+def get_create_data(rnd, endpoint, catalog):
+    """
+    Get data to create an object, with existing related objects.
+
+    Parameters:
+        rnd: random.Random
+        endpoint: str
+        catalog: dict
+            See discover().
+
+    Returns:
+        dict or None, None if there are no related objects to use.
+
+    """
+    def pick(related):
+        """ Get a random object of an endpoint. """
+        objects = catalog[related][0]
+        return rnd.choice(objects) if objects else None
+
+    name = "Load test {0}".format(rnd.randint(1, 10 ** 9))
+    if endpoint in ["brands", "stores"]:
+        return {"name": name}
+    related = {"orders": ["stores"], "items": ["brands"],
+               "locations": ["locations"],
+               "purchases": ["items", "locations"]}[endpoint]
+    picked = [pick(related_endpoint) for related_endpoint in related]
+    if None in picked:
+        return None
+    if endpoint == "orders":
+        return {"date": date.today().isoformat(), "store": picked[0]["id"]}
+    elif endpoint == "items":
+        return {"name": name, "unit": "g", "weight": rnd.randint(100, 10000),
+                "brand": picked[0]["id"]}
+    elif endpoint == "locations":
+        return {"address": name, "district": picked[0]["district"]}
+    return {"price": "{0}.{1:02d}".format(rnd.randint(1, 500),
+                                          rnd.randint(0, 99)),
+            "currency": rnd.choice(["USD", "DOP", "EUR"]),
+            "item": picked[0]["id"], "location": picked[1]["id"]}
+
+
+def build_request(rnd, catalog):
+    """
+    Pick next request of the mix.
+
+    Parameters:
+        rnd: random.Random
+        catalog: dict
+            See discover().
+
+    Returns:
+        tuple, label, method, path and data.
+
+    """
+    while True:
+        choice = rnd.randrange(sum(weight for weight, _, _ in MIX))
+        for weight, action, nested in MIX:
+            if choice < weight:
+                break
+            choice -= weight
+        endpoint = rnd.choice(NESTED_ENDPOINTS if nested else ENDPOINTS)
+        objects, pages = catalog[endpoint]
+        label = "{0} {1}{2}".format(endpoint, action,
+                                    " (nested)" if nested else "")
+        query = "?nested=true" if nested else ""
+        if action == "list":
+            page = rnd.randint(1, pages)
+            if page > 1:
+                query += "{0}page={1}".format("&" if query else "?", page)
+            return label, "GET", "/api/{0}/{1}".format(endpoint, query), None
+        elif action == "detail" and objects:
+            return label, "GET", "/api/{0}/{1}/{2}".format(
+                endpoint, rnd.choice(objects)["id"], query), None
+        elif action == "create":
+            data = get_create_data(rnd, endpoint, catalog)
+            if data is not None:
+                return label, "POST", "/api/{0}/".format(endpoint), data
+
+
+def run(client, rate, duration, concurrency=20, seed=0):
+    """
+    Send requests at a fixed rate for a while.
+
+    Parameters:
+        client: Client
+        rate: float
+            Requests started per second.
+        duration: float
+            Seconds.
+        concurrency: int
+            Maximum requests in flight.
+        seed: int
+            Seed for the request mix.
+
+    Returns:
+        tuple, list of (label, status, seconds) and elapsed seconds.
+
+    """
+    rnd = random.Random(seed)
+    catalog = discover(client)
+    results = []
+
+    def send(scheduled, label, method, path, data):
+        """ Send request, recording latency since it was scheduled. """
+        status, _ = client.send(method, path, data)
+        results.append((label, status, time.monotonic() - scheduled))
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for number in range(int(rate * duration)):
+            scheduled = start + number / rate
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, scheduled, *build_request(rnd, catalog))
+    return results, time.monotonic() - start
+
+
+def summarize(results, elapsed):
+    """
+    Get throughput, error rate and latency percentiles, overall and per
+    request type.
+
+    Parameters:
+        results: list(tuple)
+            Label, status and seconds of each request.
+        elapsed: float
+            Seconds.
+
+    Returns:
+        OrderedDict, label ("all" for overall) and stats.
+
+    """
+    groups = OrderedDict([("all", [])])
+    for result in sorted(results):
+        groups["all"].append(result)
+        groups.setdefault(result[0], []).append(result)
+
+    summary = OrderedDict()
+    for label, group in groups.items():
+        latencies = [seconds * 1000 for _, _, seconds in group]
+        errors = sum(1 for _, status, _ in group
+                     if status == 0 or status >= 400)
+        summary[label] = OrderedDict([
+            ("requests", len(group)),
+            ("throughput_rps", round(len(group) / elapsed, 2)),
+            ("error_rate", round(errors / len(group), 4) if group else 0),
+            ("p50_ms", round(percentile(latencies, 50), 1) if group else 0),
+            ("p95_ms", round(percentile(latencies, 95), 1) if group else 0),
+            ("p99_ms", round(percentile(latencies, 99), 1) if group else 0),
+            ("max_ms", round(max(latencies), 1) if group else 0),
+        ])
+    return summary
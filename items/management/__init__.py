@@ -0,0 +1 @@
+""" Management utilities for items app. """
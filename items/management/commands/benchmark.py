@@ -0,0 +1,85 @@
+""" Command to benchmark the items endpoints. """
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from items import benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Benchmark endpoints against seeded datasets of growing size.
+
+    Runs on a test database (created and destroyed by the command), so the
+    configured database is never touched.
+
+    """
+    help = "Benchmark items endpoints on synthetic datasets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales", default="10000,100000,1000000",
+            help="Comma separated numbers of purchases to seed.")
+        parser.add_argument(
+            "--iterations", type=int, default=20,
+            help="Timed requests per endpoint and action.")
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="Seed for the datasets.")
+        parser.add_argument(
+            "--endpoints",
+            help="Comma separated endpoints to benchmark (default all).")
+        parser.add_argument(
+            "--output", default="benchmark.json",
+            help="Path of the JSON results file.")
+        parser.add_argument(
+            "--compare",
+            help="Path of a previous JSON results file to compare with.")
+        parser.add_argument(
+            "--keepdb", action="store_true",
+            help="Keep the test database between runs.")
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(scale) for scale in options["scales"].split(",")]
+        except ValueError:
+            raise CommandError("--scales must be comma separated integers.")
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        endpoints = (options["endpoints"].split(",")
+                     if options["endpoints"] else None)
+        if set(endpoints or []) - set(benchmarks.ENDPOINTS):
+            raise CommandError("--endpoints must be some of: {0}.".format(
+                ", ".join(benchmarks.ENDPOINTS)))
+
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as baseline_file:
+                baseline = json.load(baseline_file)["results"]
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, keepdb=options["keepdb"])
+        try:
+            results = benchmarks.run(
+                scales, iterations=options["iterations"],
+                seed_value=options["seed"], endpoints=endpoints,
+                log=self.stdout.write)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        benchmarks.save(results, options["output"],
+                        iterations=options["iterations"], seed=options["seed"])
+        self.stdout.write("Results saved to {0}".format(options["output"]))
+
+        if baseline is not None:
+            for result in benchmarks.compare(results, baseline):
+                self.stdout.write(
+                    "{scale} {endpoint} {action}{0}: p50 x{p50_ratio}, "
+                    "p95 x{p95_ratio}, queries {queries_diff:+d}".format(
+                        " (nested)" if result["nested"] else "", **result))
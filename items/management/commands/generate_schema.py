@@ -0,0 +1,33 @@
+""" Command to write the API schema to a file. """
+from django.core.management.base import BaseCommand
+
+from schmebulock import schema
+
+
+class Command(BaseCommand):
+    """
+    Render the schema served at /api/docs/ (all the endpoints) to a file, to
+    serve it as a static file or generate clients from it.
+
+    """
+    help = "Write the schema of the API to a file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=sorted(schema.RENDERER_CLASSES),
+            default="openapi",
+            help="Format of the schema.")
+        parser.add_argument(
+            "--output",
+            help="Path of the file (default standard output).")
+
+    def handle(self, *args, **options):
+        content, etag = schema.render(
+            schema.RENDERER_CLASSES[options["format"]])
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.write(content)
+            self.stdout.write("Schema written to {0} (ETag {1}).".format(
+                options["output"], etag))
+        else:
+            self.stdout.write(content.decode())
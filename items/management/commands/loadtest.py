@@ -0,0 +1,73 @@
+""" Command to load test a running server. """
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from items import loadtest
+
+
+class Command(BaseCommand):
+    """
+    Send a mix of API requests at a fixed rate and report how it went.
+
+    The server must already be running (and the user exist), creates add
+    rows to its database.
+
+    """
+    help = "Load test the items API of a running server."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url", default="http://localhost:8000",
+            help="Base URL of the server.")
+        parser.add_argument(
+            "--username", required=True,
+            help="User to get the JWT token for.")
+        parser.add_argument(
+            "--password", default=os.environ.get("LOADTEST_PASSWORD"),
+            help="Password of the user (default LOADTEST_PASSWORD env var).")
+        parser.add_argument(
+            "--rate", type=float, default=50,
+            help="Requests started per second.")
+        parser.add_argument(
+            "--duration", type=float, default=30,
+            help="Seconds to send requests for.")
+        parser.add_argument(
+            "--concurrency", type=int, default=20,
+            help="Maximum requests in flight.")
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="Seed for the request mix.")
+        parser.add_argument(
+            "--output",
+            help="Path of a JSON file to save the summary to.")
+
+    def handle(self, *args, **options):
+        if options["password"] is None:
+            raise CommandError("--password or LOADTEST_PASSWORD required.")
+        if options["rate"] <= 0 or options["duration"] <= 0:
+            raise CommandError("--rate and --duration must be positive.")
+
+        client = loadtest.Client(
+            options["url"], options["username"], options["password"])
+        try:
+            results, elapsed = loadtest.run(
+                client, options["rate"], options["duration"],
+                concurrency=options["concurrency"], seed=options["seed"])
+        except RuntimeError as run_error:
+            raise CommandError(str(run_error))
+        summary = loadtest.summarize(results, elapsed)
+
+        self.stdout.write("{0:<32} {1:>8} {2:>8} {3:>7} {4:>9} {5:>9} "
+                          "{6:>9}".format("request", "count", "rps", "errors",
+                                          "p50 ms", "p95 ms", "p99 ms"))
+        for label, stats in summary.items():
+            self.stdout.write(
+                "{0:<32} {requests:>8} {throughput_rps:>8} "
+                "{error_rate:>7.1%} {p50_ms:>9} {p95_ms:>9} "
+                "{p99_ms:>9}".format(label, **stats))
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(summary, output, indent=2)
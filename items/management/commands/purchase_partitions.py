@@ -0,0 +1,40 @@
+""" Command to maintain monthly partitions of the Purchase table. """
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from items import partitioning
+
+
+class Command(BaseCommand):
+    """
+    Create upcoming partitions and optionally detach old ones.
+
+    Meant to run periodically (daily cron job), creating partitions is a no-op
+    when they already exist.
+
+    """
+    help = "Create upcoming monthly partitions of purchases, detach old ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead", type=int, default=3,
+            help="Months after the current one to create partitions for.")
+        parser.add_argument(
+            "--detach-before",
+            help="Detach partitions with rows created before this date "
+                 "(YYYY-MM-DD), to archive them.")
+
+    def handle(self, *args, **options):
+        for name in partitioning.ensure_partitions(options["months_ahead"]):
+            self.stdout.write("Created partition {0}".format(name))
+
+        if options["detach_before"]:
+            try:
+                before = datetime.strptime(
+                    options["detach_before"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--detach-before must be YYYY-MM-DD.")
+
+            for name in partitioning.detach_partitions(before):
+                self.stdout.write("Detached partition {0}".format(name))
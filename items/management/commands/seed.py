@@ -0,0 +1,46 @@
+""" Command to fill the database with a synthetic dataset. """
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from items import seeding
+
+
+class Command(BaseCommand):
+    """
+    Create brands, stores, locations, items, orders and purchases.
+
+    The same arguments always produce the same data (see items.seeding), rows
+    are added to the existing ones.
+
+    """
+    help = "Fill the database with a deterministic synthetic dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--purchases", type=int, default=1000000,
+            help="Number of purchases, other models are sized from it.")
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="Seed for the random generator.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=seeding.DEFAULT_CHUNK_SIZE,
+            help="Rows sent per COPY.")
+        parser.add_argument(
+            "--months", type=int, default=12,
+            help="Months before now to spread dates over.")
+
+    def handle(self, *args, **options):
+        if options["purchases"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--purchases and --chunk-size must be "
+                               "positive.")
+
+        start = time.perf_counter()
+        ids = seeding.seed(
+            options["purchases"], seed_value=options["seed"],
+            chunk_size=options["chunk_size"], months=options["months"])
+
+        for name, created in ids.items():
+            self.stdout.write("Created {0} {1}".format(len(created), name))
+        self.stdout.write("Done in {0:.1f}s".format(
+            time.perf_counter() - start))
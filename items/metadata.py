@@ -2,12 +2,16 @@
 
 from djmoney import settings as djmoney_settings
 from measurement.measures import Volume, Weight
-from rest_framework.metadata import SimpleMetadata
 
+from schmebulock.metadata import CachedMetadata
 from schmebulock.utils import get_choices
 
+# Built once per process, the aliases never change.
+VOLUME_CHOICES = get_choices(Volume.get_aliases(), first="cubic meter")
+WEIGHT_CHOICES = get_choices(Weight.get_aliases(), first="gram")
 
-class CustomItemMetadata(SimpleMetadata):
+
+class CustomItemMetadata(CachedMetadata):
     """ Custom metadata class for Items endpoint. """
 
     # Override
@@ -16,16 +20,14 @@ class CustomItemMetadata(SimpleMetadata):
         field_info = super().get_field_info(field)
 
         if field.field_name == "volume":
-            field_info["unit_choices"] = get_choices(
-                Volume.get_aliases(), first="cubic meter")
+            field_info["unit_choices"] = VOLUME_CHOICES
         elif field.field_name == "weight":
-            field_info["unit_choices"] = get_choices(
-                Weight.get_aliases(), first="gram")
+            field_info["unit_choices"] = WEIGHT_CHOICES
 
         return field_info
 
 
-class CustomPurchaseMetadata(SimpleMetadata):
+class CustomPurchaseMetadata(CachedMetadata):
     """ Custom metadata class for Purchases endpoint. """
 
     # Override
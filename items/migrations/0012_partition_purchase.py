@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Range partition items_purchase by month of created (PostgreSQL 11+).
+
+Partitioned tables need the partition key in every unique constraint, so the
+primary key becomes (id, created), id stays unique through its sequence.
+Rows outside of existing monthly partitions go to items_purchase_default.
+
+items_order is not partitioned since items_purchase.order_id references it
+(that would need a composite foreign key), it gets indexes instead.
+
+"""
+from __future__ import unicode_literals
+
+from django.contrib.postgres.indexes import BrinIndex
+from django.db import migrations, models
+
+CONSTRAINTS_SQL = """
+ALTER TABLE items_purchase
+    ADD CONSTRAINT items_purchase_item_id_fk FOREIGN KEY (item_id)
+    REFERENCES items_item (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE items_purchase
+    ADD CONSTRAINT items_purchase_location_id_fk FOREIGN KEY (location_id)
+    REFERENCES items_location (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE items_purchase
+    ADD CONSTRAINT items_purchase_order_id_fk FOREIGN KEY (order_id)
+    REFERENCES items_order (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE items_purchase
+    ADD CONSTRAINT items_purchase_created_by_id_fk FOREIGN KEY (created_by_id)
+    REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE items_purchase
+    ADD CONSTRAINT items_purchase_modified_by_id_fk
+    FOREIGN KEY (modified_by_id)
+    REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX items_purchase_item_id_idx ON items_purchase (item_id);
+CREATE INDEX items_purchase_location_id_idx ON items_purchase (location_id);
+CREATE INDEX items_purchase_order_id_idx ON items_purchase (order_id);
+CREATE INDEX items_purchase_created_by_id_idx
+    ON items_purchase (created_by_id);
+CREATE INDEX items_purchase_modified_by_id_idx
+    ON items_purchase (modified_by_id);
+ALTER SEQUENCE items_purchase_id_seq OWNED BY items_purchase.id;
+"""
+
+ENSURE_PARTITIONS_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION items_purchase_ensure_partitions(
+    from_date date, to_date date) RETURNS SETOF text AS $$
+DECLARE
+    month date := date_trunc('month', from_date)::date;
+    lower_bound timestamptz;
+    upper_bound timestamptz;
+    partition text;
+BEGIN
+    WHILE month < to_date LOOP
+        partition := 'items_purchase_' || to_char(month, '"y"YYYY"m"MM');
+        lower_bound := month::timestamp AT TIME ZONE 'UTC';
+        upper_bound := (month + interval '1 month')::timestamp
+                       AT TIME ZONE 'UTC';
+        IF to_regclass(partition) IS NULL THEN
+            -- Rows already in the default partition for this month move to
+            -- the new one, otherwise attaching it would fail.
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE items_purchase INCLUDING DEFAULTS)',
+                partition);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM items_purchase_default '
+                'WHERE created >= %L AND created < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                lower_bound, upper_bound, partition);
+            EXECUTE format(
+                'ALTER TABLE items_purchase ATTACH PARTITION %I '
+                'FOR VALUES FROM (%L) TO (%L)',
+                partition, lower_bound, upper_bound);
+            RETURN NEXT partition;
+        END IF;
+        month := month + interval '1 month';
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+FORWARD_SQL = """
+ALTER SEQUENCE items_purchase_id_seq OWNED BY NONE;
+ALTER TABLE items_purchase RENAME TO items_purchase_old;
+CREATE TABLE items_purchase (LIKE items_purchase_old INCLUDING DEFAULTS)
+    PARTITION BY RANGE (created);
+CREATE TABLE items_purchase_default PARTITION OF items_purchase DEFAULT;
+{function}
+SELECT items_purchase_ensure_partitions(
+    coalesce((SELECT min(created) FROM items_purchase_old), now())::date,
+    (now() + interval '3 months')::date);
+INSERT INTO items_purchase SELECT * FROM items_purchase_old;
+DROP TABLE items_purchase_old;
+ALTER TABLE items_purchase
+    ADD CONSTRAINT items_purchase_pkey PRIMARY KEY (id, created);
+CREATE INDEX items_purchase_created_idx ON items_purchase (created);
+{constraints}
+""".format(function=ENSURE_PARTITIONS_FUNCTION_SQL,
+           constraints=CONSTRAINTS_SQL)
+
+REVERSE_SQL = """
+ALTER SEQUENCE items_purchase_id_seq OWNED BY NONE;
+ALTER TABLE items_purchase RENAME TO items_purchase_partitioned;
+CREATE TABLE items_purchase
+    (LIKE items_purchase_partitioned INCLUDING DEFAULTS);
+INSERT INTO items_purchase SELECT * FROM items_purchase_partitioned;
+DROP TABLE items_purchase_partitioned CASCADE;
+DROP FUNCTION items_purchase_ensure_partitions(date, date);
+ALTER TABLE items_purchase
+    ADD CONSTRAINT items_purchase_pkey PRIMARY KEY (id);
+{constraints}
+""".format(constraints=CONSTRAINTS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0011_purchase_location'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created'],
+                               name='items_order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=BrinIndex(fields=['date'], name='items_order_date_brin'),
+        ),
+    ]
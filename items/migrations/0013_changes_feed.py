@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Tombstones for deleted objects and indexes on modified, for the changes feed
+(see items.changes).
+
+Tombstones are added by AFTER DELETE row triggers, so cascades and bulk
+deletes are recorded too. On items_purchase the trigger is cloned to every
+partition (PostgreSQL 11+), items_purchase_ensure_partitions() is replaced
+to skip tombstones for rows it moves out of the default partition.
+
+"""
+from __future__ import unicode_literals
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.utils.timezone
+
+MODELS = ["brand", "store", "order", "item", "location", "purchase"]
+
+TOMBSTONE_FUNCTION_SQL = """
+CREATE FUNCTION items_add_tombstone() RETURNS trigger AS $$
+BEGIN
+    IF coalesce(current_setting('items.skip_tombstones', true), '') = ''
+    THEN
+        INSERT INTO items_tombstone (model, object_id, deleted)
+        VALUES (TG_ARGV[0], OLD.id, clock_timestamp());
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGER_SQL = """
+CREATE TRIGGER items_{0}_tombstone AFTER DELETE ON items_{0}
+    FOR EACH ROW EXECUTE PROCEDURE items_add_tombstone('{0}');
+"""
+
+ENSURE_PARTITIONS_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION items_purchase_ensure_partitions(
+    from_date date, to_date date) RETURNS SETOF text AS $$
+DECLARE
+    month date := date_trunc('month', from_date)::date;
+    lower_bound timestamptz;
+    upper_bound timestamptz;
+    partition text;
+BEGIN
+    WHILE month < to_date LOOP
+        partition := 'items_purchase_' || to_char(month, '"y"YYYY"m"MM');
+        lower_bound := month::timestamp AT TIME ZONE 'UTC';
+        upper_bound := (month + interval '1 month')::timestamp
+                       AT TIME ZONE 'UTC';
+        IF to_regclass(partition) IS NULL THEN
+            -- Rows already in the default partition for this month move to
+            -- the new one, otherwise attaching it would fail. They are not
+            -- deleted, so no tombstones for them.
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE items_purchase INCLUDING DEFAULTS)',
+                partition);
+            PERFORM set_config('items.skip_tombstones', 'on', true);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM items_purchase_default '
+                'WHERE created >= %L AND created < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                lower_bound, upper_bound, partition);
+            PERFORM set_config('items.skip_tombstones', '', true);
+            EXECUTE format(
+                'ALTER TABLE items_purchase ATTACH PARTITION %I '
+                'FOR VALUES FROM (%L) TO (%L)',
+                partition, lower_bound, upper_bound);
+            RETURN NEXT partition;
+        END IF;
+        month := month + interval '1 month';
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+FORWARD_SQL = "".join(
+    [TOMBSTONE_FUNCTION_SQL, ENSURE_PARTITIONS_FUNCTION_SQL] +
+    [TRIGGER_SQL.format(model) for model in MODELS])
+
+REVERSE_SQL = "".join(
+    ["DROP TRIGGER items_{0}_tombstone ON items_{0};\n".format(model)
+     for model in MODELS] +
+    ["DROP FUNCTION items_add_tombstone();\n",
+     import_module("items.migrations.0012_partition_purchase")
+     .ENSURE_PARTITIONS_FUNCTION_SQL])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0012_partition_purchase'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32)),
+                ('object_id', models.IntegerField()),
+                ('deleted', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'deleted', 'id'],
+                               name='items_tombstone_deleted_idx'),
+        ),
+    ] + [
+        migrations.AddIndex(
+            model_name=model,
+            index=models.Index(fields=['modified', 'id'],
+                               name='items_{0}_modified_idx'.format(model)),
+        )
+        for model in MODELS
+    ] + [
+        migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+    ]
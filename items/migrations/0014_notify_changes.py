@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Notify creates, updates and deletes of every model on the items_changes
+channel (see items.events).
+
+Payloads are {"model": ..., "action": ..., "id": ...}, sent on commit. Rows
+moved between partitions of items_purchase (items.skip_tombstones set, see
+0013) and bulk loads setting items.skip_notifications are not notified.
+
+"""
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+MODELS = ["brand", "store", "order", "item", "location", "purchase"]
+
+NOTIFY_FUNCTION_SQL = """
+CREATE FUNCTION items_notify_change() RETURNS trigger AS $$
+BEGIN
+    IF coalesce(current_setting('items.skip_notifications', true), '') = ''
+        AND coalesce(current_setting('items.skip_tombstones', true), '') = ''
+    THEN
+        PERFORM pg_notify('items_changes', json_build_object(
+            'model', TG_ARGV[0],
+            'action', CASE TG_OP WHEN 'INSERT' THEN 'create'
+                                 WHEN 'UPDATE' THEN 'update'
+                                 ELSE 'delete' END,
+            'id', CASE TG_OP WHEN 'DELETE' THEN OLD.id ELSE NEW.id END
+        )::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGER_SQL = """
+CREATE TRIGGER items_{0}_notify AFTER INSERT OR UPDATE OR DELETE
+    ON items_{0} FOR EACH ROW EXECUTE PROCEDURE items_notify_change('{0}');
+"""
+
+FORWARD_SQL = "".join(
+    [NOTIFY_FUNCTION_SQL] + [TRIGGER_SQL.format(model) for model in MODELS])
+
+REVERSE_SQL = "".join(
+    ["DROP TRIGGER items_{0}_notify ON items_{0};\n".format(model)
+     for model in MODELS] +
+    ["DROP FUNCTION items_notify_change();\n"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0013_changes_feed'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+    ]
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Unique natural keys for brands, stores and items, for upserts.
+
+Existing duplicates are merged first into the one with the lowest id:
+references move to it (touching modified, so delta sync clients see them)
+and the others are deleted. Brands go before items, merging brands can make
+items duplicated.
+
+Item volume and weight are nullable, so their unique index uses coalesce to
+also treat nulls as equal.
+
+"""
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+MERGE_SQL = """
+UPDATE {referencing} SET {column} = d.kept, modified = now()
+FROM (SELECT id, min(id) OVER (PARTITION BY {key}) AS kept
+      FROM {table}) d
+WHERE {referencing}.{column} = d.id AND d.id <> d.kept;
+DELETE FROM {table}
+USING (SELECT id, min(id) OVER (PARTITION BY {key}) AS kept
+       FROM {table}) d
+WHERE {table}.id = d.id AND d.id <> d.kept;
+"""
+
+ITEM_KEY_SQL = "name, brand_id, coalesce(volume, -1), coalesce(weight, -1)"
+
+DEDUPLICATE_SQL = "".join([
+    # No pending foreign key checks, tables are altered next.
+    "SET CONSTRAINTS ALL IMMEDIATE;\n",
+    MERGE_SQL.format(table="items_brand", key="name",
+                     referencing="items_item", column="brand_id"),
+    MERGE_SQL.format(table="items_store", key="name",
+                     referencing="items_order", column="store_id"),
+    MERGE_SQL.format(table="items_item", key=ITEM_KEY_SQL,
+                     referencing="items_purchase", column="item_id"),
+])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0014_notify_changes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DEDUPLICATE_SQL, migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='brand',
+            name='name',
+            field=models.CharField(max_length=128, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='store',
+            name='name',
+            field=models.CharField(max_length=128, unique=True),
+        ),
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX items_item_natural_key "
+            "ON items_item ({0});".format(ITEM_KEY_SQL),
+            "DROP INDEX items_item_natural_key;"),
+    ]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Totals per order and currency (see items.OrderTotal), maintained by row
+triggers on items_purchase and filled for existing purchases.
+
+Totals rows are upserted with INSERT ... ON CONFLICT, so concurrent
+purchases only wait on the row of their order and currency, never on the
+order itself. Updates not changing order or price skip the trigger, rows
+moved between partitions (items.skip_tombstones set, see 0013) are left
+out as they are not deleted.
+
+"""
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+TOTALS_FUNCTION_SQL = """
+CREATE FUNCTION items_update_order_total() RETURNS trigger AS $$
+BEGIN
+    IF coalesce(current_setting('items.skip_tombstones', true), '') <> ''
+    THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.order_id IS NOT NULL THEN
+        UPDATE items_ordertotal
+        SET amount = amount - OLD.price, count = count - 1
+        WHERE order_id = OLD.order_id AND currency = OLD.price_currency;
+        DELETE FROM items_ordertotal
+        WHERE order_id = OLD.order_id AND currency = OLD.price_currency
+            AND count = 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.order_id IS NOT NULL THEN
+        INSERT INTO items_ordertotal (order_id, currency, amount, count)
+        VALUES (NEW.order_id, NEW.price_currency, NEW.price, 1)
+        ON CONFLICT (order_id, currency) DO UPDATE
+        SET amount = items_ordertotal.amount + EXCLUDED.amount,
+            count = items_ordertotal.count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGERS_SQL = """
+CREATE TRIGGER items_purchase_order_total AFTER INSERT OR DELETE
+    ON items_purchase FOR EACH ROW
+    EXECUTE PROCEDURE items_update_order_total();
+CREATE TRIGGER items_purchase_order_total_update AFTER UPDATE
+    ON items_purchase FOR EACH ROW
+    WHEN (OLD.order_id IS DISTINCT FROM NEW.order_id
+          OR OLD.price <> NEW.price
+          OR OLD.price_currency <> NEW.price_currency)
+    EXECUTE PROCEDURE items_update_order_total();
+"""
+
+FILL_SQL = """
+INSERT INTO items_ordertotal (order_id, currency, amount, count)
+SELECT order_id, price_currency, sum(price), count(*)
+FROM items_purchase
+WHERE order_id IS NOT NULL
+GROUP BY order_id, price_currency;
+"""
+
+FORWARD_SQL = "".join([TOTALS_FUNCTION_SQL, TRIGGERS_SQL, FILL_SQL])
+
+REVERSE_SQL = """
+DROP TRIGGER items_purchase_order_total_update ON items_purchase;
+DROP TRIGGER items_purchase_order_total ON items_purchase;
+DROP FUNCTION items_update_order_total();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0015_natural_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderTotal',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('amount', models.DecimalField(decimal_places=3, max_digits=17)),
+                ('count', models.IntegerField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='totals', to='items.Order')),
+            ],
+            options={
+                'ordering': ['currency'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='ordertotal',
+            unique_together=set([('order', 'currency')]),
+        ),
+        migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+    ]
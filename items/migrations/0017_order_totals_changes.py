@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Changes of order totals for the changes feed and events of orders.
+
+Totals rows get a modified datetime set by the trigger, which also notifies
+an update of the order on the items_changes channel (see 0014), unless
+items.skip_notifications is set. The order row itself is still not touched,
+so concurrent purchases don't wait on it. Rows are no longer removed when
+their count gets to 0, the change would be lost, they go away with the
+order instead.
+
+"""
+from __future__ import unicode_literals
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+TOTALS_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION items_update_order_total() RETURNS trigger AS $$
+DECLARE
+    notify boolean := coalesce(
+        current_setting('items.skip_notifications', true), '') = '';
+BEGIN
+    IF coalesce(current_setting('items.skip_tombstones', true), '') <> ''
+    THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.order_id IS NOT NULL THEN
+        UPDATE items_ordertotal
+        SET amount = amount - OLD.price, count = count - 1,
+            modified = clock_timestamp()
+        WHERE order_id = OLD.order_id AND currency = OLD.price_currency;
+        -- Not found when the order is being deleted (totals go first).
+        IF FOUND AND notify THEN
+            PERFORM pg_notify('items_changes', json_build_object(
+                'model', 'order', 'action', 'update',
+                'id', OLD.order_id)::text);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.order_id IS NOT NULL THEN
+        INSERT INTO items_ordertotal (order_id, currency, amount, count,
+                                      modified)
+        VALUES (NEW.order_id, NEW.price_currency, NEW.price, 1,
+                clock_timestamp())
+        ON CONFLICT (order_id, currency) DO UPDATE
+        SET amount = items_ordertotal.amount + EXCLUDED.amount,
+            count = items_ordertotal.count + 1,
+            modified = EXCLUDED.modified;
+        IF notify THEN
+            PERFORM pg_notify('items_changes', json_build_object(
+                'model', 'order', 'action', 'update',
+                'id', NEW.order_id)::text);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+REVERSE_SQL = """
+DELETE FROM items_ordertotal WHERE count = 0;
+""" + import_module(
+    "items.migrations.0016_order_totals").TOTALS_FUNCTION_SQL.replace(
+        "CREATE FUNCTION", "CREATE OR REPLACE FUNCTION")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0016_order_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordertotal',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='ordertotal',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='totals', to='items.Order'),
+        ),
+        migrations.RunSQL(TOTALS_FUNCTION_SQL, REVERSE_SQL),
+    ]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Skip totals of orders when items.skip_totals is set.
+
+Bulk loads (see items.seeding) set it and fill the totals once, with a
+single INSERT ... SELECT grouping their purchases, instead of one upsert
+per purchase.
+
+"""
+from __future__ import unicode_literals
+
+from importlib import import_module
+
+from django.db import migrations
+
+PREVIOUS_FUNCTION_SQL = import_module(
+    "items.migrations.0017_order_totals_changes").TOTALS_FUNCTION_SQL
+
+TOTALS_FUNCTION_SQL = PREVIOUS_FUNCTION_SQL.replace(
+    """
+    IF coalesce(current_setting('items.skip_tombstones', true), '') <> ''
+    THEN""", """
+    IF coalesce(current_setting('items.skip_tombstones', true), '') <> ''
+        OR coalesce(current_setting('items.skip_totals', true), '') <> ''
+    THEN""")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0017_order_totals_changes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(TOTALS_FUNCTION_SQL, PREVIOUS_FUNCTION_SQL),
+    ]
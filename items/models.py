@@ -1,5 +1,7 @@
 """ Models for items app. """
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
+from django.utils import timezone
 
 from audit_log.models import AuthStampedModel
 from cities.models import District
@@ -8,10 +10,14 @@ from django_measurement.models import MeasurementField
 from djmoney.models.fields import MoneyField
 from measurement.measures import Volume, Weight
 
+from schmebulock.audit import AuditStampedQuerySet
+
 
 class Brand(AuthStampedModel, TimeStampedModel, models.Model):
     """ Representation of a brand (IKEA, Pampers, etc.). """
-    name = models.CharField(max_length=128)
+    name = models.CharField(max_length=128, unique=True)
+
+    objects = AuditStampedQuerySet.as_manager()
 
     def __str__(self):
         """ String representation for model. """
@@ -20,11 +26,17 @@ class Brand(AuthStampedModel, TimeStampedModel, models.Model):
     class Meta:
         """ Meta data for model. """
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['modified', 'id'],
+                         name='items_brand_modified_idx'),
+        ]
 
 
 class Store(AuthStampedModel, TimeStampedModel, models.Model):
     """ Representation of a store (IKEA, PricesMart, etc.). """
-    name = models.CharField(max_length=128)
+    name = models.CharField(max_length=128, unique=True)
+
+    objects = AuditStampedQuerySet.as_manager()
 
     def __str__(self):
         """ String representation for model. """
@@ -33,6 +45,10 @@ class Store(AuthStampedModel, TimeStampedModel, models.Model):
     class Meta:
         """ Meta data for model. """
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['modified', 'id'],
+                         name='items_store_modified_idx'),
+        ]
 
 
 class Order(AuthStampedModel, TimeStampedModel, models.Model):
@@ -40,13 +56,26 @@ class Order(AuthStampedModel, TimeStampedModel, models.Model):
     date = models.DateField()
     store = models.ForeignKey(Store)
 
+    objects = AuditStampedQuerySet.as_manager()
+
     def __str__(self):
         """ String representation for model. """
         return "{0} - {1}".format(self.store.name, self.date)
 
+    @property
+    def purchase_count(self):
+        """ Number of purchases of the order, in every currency. """
+        return sum(total.count for total in self.totals.all())
+
     class Meta:
         """ Meta data for model. """
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['-created'], name='items_order_created_idx'),
+            BrinIndex(fields=['date'], name='items_order_date_brin'),
+            models.Index(fields=['modified', 'id'],
+                         name='items_order_modified_idx'),
+        ]
 
 
 class Item(AuthStampedModel, TimeStampedModel, models.Model):
@@ -55,6 +84,9 @@ class Item(AuthStampedModel, TimeStampedModel, models.Model):
         Blue Cheese (Generic), 0.5 kg
         Bacon (XXX), 1.0 lb
 
+    Name, brand, volume and weight are unique together (nulls included), by
+    the items_item_natural_key index (see NATURAL_KEY).
+
     """
     name = models.CharField(max_length=128)
     volume = MeasurementField(measurement=Volume, null=True, blank=True,
@@ -63,6 +95,13 @@ class Item(AuthStampedModel, TimeStampedModel, models.Model):
                               help_text="Unit in DB is always grams")
     brand = models.ForeignKey(Brand)
 
+    objects = AuditStampedQuerySet.as_manager()
+
+    NATURAL_KEY = ["name", "brand", "volume", "weight"]
+    # Expressions of the unique index, for ON CONFLICT.
+    NATURAL_KEY_SQL = ("name, brand_id, coalesce(volume, -1), "
+                       "coalesce(weight, -1)")
+
     def __str__(self):
         """ String representation for model. """
         return "{0} ({1}), {2}".format(
@@ -71,6 +110,10 @@ class Item(AuthStampedModel, TimeStampedModel, models.Model):
     class Meta:
         """ Meta data for model. """
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['modified', 'id'],
+                         name='items_item_modified_idx'),
+        ]
 
 
 class Location(AuthStampedModel, TimeStampedModel, models.Model):
@@ -82,6 +125,8 @@ class Location(AuthStampedModel, TimeStampedModel, models.Model):
     address = models.CharField(max_length=256)
     district = models.ForeignKey(District, related_name="location_district")
 
+    objects = AuditStampedQuerySet.as_manager()
+
     def __str__(self):
         """ String representation for model. """
         return "{0}, {1}, {2}, {3}".format(
@@ -91,6 +136,10 @@ class Location(AuthStampedModel, TimeStampedModel, models.Model):
     class Meta:
         """ Meta data for model. """
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['modified', 'id'],
+                         name='items_location_modified_idx'),
+        ]
 
 
 class Purchase(AuthStampedModel, TimeStampedModel, models.Model):
@@ -99,12 +148,16 @@ class Purchase(AuthStampedModel, TimeStampedModel, models.Model):
         Blue Cheese (Generic), 0.5 kg at 50.00 DOP - #1
         Bacon (XXX), 1.0 lb at 1.00 USD - #N/A
 
+    Table is partitioned by month of created (see items.partitioning).
+
     """
     price = MoneyField(max_digits=15, decimal_places=3, default_currency="USD")
     item = models.ForeignKey(Item)
     location = models.ForeignKey(Location)
     order = models.ForeignKey(Order, null=True, blank=True)
 
+    objects = AuditStampedQuerySet.as_manager()
+
     def __str__(self):
         """ String representation for model. """
         return "{0} at {1} - #{2}".format(
@@ -113,3 +166,59 @@ class Purchase(AuthStampedModel, TimeStampedModel, models.Model):
     class Meta:
         """ Meta data for model. """
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['modified', 'id'],
+                         name='items_purchase_modified_idx'),
+        ]
+
+
+class OrderTotal(models.Model):
+    """
+    Total price and number of purchases of an order in a currency.
+
+    Rows are maintained by triggers on items_purchase (creates, updates and
+    deletes, bulk ones and cascades included), which set modified (for the
+    changes feed of orders) and notify an update of the order. Rows are
+    kept when no purchase is left (count 0), so the change is not lost.
+
+    """
+    order = models.ForeignKey(Order, related_name="totals")
+    currency = models.CharField(max_length=3)
+    amount = models.DecimalField(max_digits=17, decimal_places=3)
+    count = models.IntegerField()
+    modified = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        """ String representation for model. """
+        return "{0} {1} ({2}) - #{3}".format(
+            self.amount, self.currency, self.count, self.order_id)
+
+    class Meta:
+        """ Meta data for model. """
+        ordering = ['currency']
+        unique_together = ('order', 'currency')
+
+
+class Tombstone(models.Model):
+    """
+    Representation of a deleted object, for clients syncing changes (see
+    items.changes).
+
+    Rows are added by a trigger on delete of every other model of the app.
+
+    """
+    model = models.CharField(max_length=32)
+    object_id = models.IntegerField()
+    deleted = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        """ String representation for model. """
+        return "{0} #{1}".format(self.model, self.object_id)
+
+    class Meta:
+        """ Meta data for model. """
+        ordering = ['deleted', 'id']
+        indexes = [
+            models.Index(fields=['model', 'deleted', 'id'],
+                         name='items_tombstone_deleted_idx'),
+        ]
@@ -0,0 +1,104 @@
+"""
+Maintenance of the monthly partitions of the Purchase table.
+
+See migration 0012_partition_purchase, rows are partitioned by month of
+created, new months need their partition created ahead of time (rows with no
+matching partition go to items_purchase_default, which is never pruned).
+
+"""
+import re
+from datetime import date
+
+from django.db import connection
+from django.utils import timezone
+
+PARTITION_NAME_RE = re.compile(r"^items_purchase_y(\d{4})m(\d{2})$")
+
+
+def add_months(day, months):
+    """
+    Get first day of the month a number of months away from a date.
+
+    Parameters:
+        day: datetime.date
+        months: int
+
+    Returns:
+        datetime.date
+
+    """
+    month = day.year * 12 + day.month - 1 + months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def ensure_partitions(months_ahead=3, start=None):
+    """
+    Create missing monthly partitions up to a number of months ahead.
+
+    Parameters:
+        months_ahead: int
+            Months after the current one to create partitions for.
+        start: datetime.date
+            First month to create partitions for (current month if None).
+
+    Returns:
+        list, names of created partitions.
+
+    """
+    today = timezone.now().date()
+    start = start or today
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT items_purchase_ensure_partitions(%s, %s)",
+            [start, add_months(today, months_ahead + 1)])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def get_partitions():
+    """
+    Get monthly partitions attached to the Purchase table.
+
+    Returns:
+        list(tuple), name and first day of month, oldest first.
+
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'items_purchase'::regclass")
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            partitions.append(
+                (name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def detach_partitions(before):
+    """
+    Detach monthly partitions holding only rows created before a date.
+
+    Detached partitions are kept as regular tables (no longer part of
+    Purchase queries), ready to be archived (pg_dump) and dropped.
+
+    Parameters:
+        before: datetime.date
+
+    Returns:
+        list, names of detached partitions.
+
+    """
+    detached = []
+    with connection.cursor() as cursor:
+        for name, month in get_partitions():
+            if add_months(month, 1) > before:
+                break
+            cursor.execute(
+                "ALTER TABLE items_purchase DETACH PARTITION {0}".format(
+                    connection.ops.quote_name(name)))
+            detached.append(name)
+    return detached
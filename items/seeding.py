@@ -0,0 +1,242 @@
+"""
+Deterministic synthetic datasets for items models.
+
+The same seed and size always produce the same rows (names, units, prices,
+currencies, foreign keys), so measurements over different commits compare
+like with like. Timestamps are spread over the months before seeding.
+
+Rows are streamed with COPY in chunks (ids reserved from the sequences
+upfront), which is far faster than creating model instances: a million
+purchases take seconds, not minutes. Row triggers of notifications and
+order totals are skipped, totals are filled once after the purchases.
+
+"""
+import io
+import random
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+
+from cities.models import City, Country, District
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import partitioning
+from .models import Brand, Item, Location, Order, Purchase, Store
+
+DEFAULT_CHUNK_SIZE = 50000
+# Currency codes, repeated to weight how often they are picked.
+CURRENCIES = ["USD"] * 5 + ["DOP"] * 3 + ["EUR"] * 2
+# (Name, grams) and (name, cubic meters), as the fields store them.
+WEIGHTS = [("Rice", 907.185), ("Cheese", 453.592), ("Coffee", 340.194),
+           ("Flour", 2267.96), ("Bacon", 453.592), ("Sugar", 1814.37),
+           ("Beans", 425.243), ("Chicken", 1360.78)]
+VOLUMES = [("Milk", 0.003785), ("Juice", 0.00189), ("Water", 0.0005),
+           ("Soda", 0.002), ("Oil", 0.000946), ("Yogurt", 0.000473),
+           ("Vinegar", 0.000473), ("Detergent", 0.00296)]
+# Totals of the seeded orders (see items.OrderTotal), grouping purchases.
+TOTALS_SQL = """
+INSERT INTO items_ordertotal (order_id, currency, amount, count, modified)
+SELECT order_id, price_currency, sum(price), count(*), clock_timestamp()
+FROM items_purchase
+WHERE order_id BETWEEN %s AND %s
+GROUP BY order_id, price_currency
+"""
+STREETS = ["Main St.", "Duarte Ave.", "Independence Ave.", "Lincoln Ave.",
+           "Church St.", "Mella Ave.", "Park Ave.", "Bolivar Ave."]
+
+
+def get_sizes(purchases):
+    """
+    Get number of rows per model for a number of purchases.
+
+    Parameters:
+        purchases: int
+
+    Returns:
+        OrderedDict, model name and number of rows, in creation order.
+
+    """
+    return OrderedDict([
+        ("brands", max(10, purchases // 1000)),
+        ("stores", max(5, purchases // 2000)),
+        ("locations", max(5, purchases // 1000)),
+        ("items", max(10, purchases // 100)),
+        ("orders", max(10, purchases // 10)),
+        ("purchases", purchases),
+    ])
+
+
+def get_district_ids():
+    """
+    Get ids of districts to use for locations, creating one if none exist.
+
+    Returns:
+        list(int)
+
+    """
+    district_ids = list(District.objects.order_by("id").values_list(
+        "id", flat=True))
+    if not district_ids:
+        # Only needed on empty databases (benchmarks). ZZ is a user assigned
+        # ISO 3166 code, not taken by a real country.
+        point = GEOSGeometry("POINT(0.00 0.00)")
+        country = Country.objects.get_or_create(
+            code="ZZ", defaults={"name": "Country", "code3": "ZZZ",
+                                 "population": 0})[0]
+        city = City.objects.create(
+            name="City", name_std="City", country=country, location=point,
+            population=0)
+        district_ids = [District.objects.create(
+            name="District", name_std="District", city=city, location=point,
+            population=0).id]
+    return district_ids
+
+
+def reserve_ids(model, count):
+    """
+    Take a range of ids from the sequence of a model's table.
+
+    Parameters:
+        model: django.db.models.Model class
+        count: int
+
+    Returns:
+        range
+
+    """
+    table = getattr(model, "_meta").db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            "nextval(pg_get_serial_sequence(%s, 'id')) + %s - 1)",
+            [table, table, count])
+        last = cursor.fetchone()[0]
+    return range(last - count + 1, last + 1)
+
+
+def copy_rows(model, fields, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Insert rows with COPY, chunk_size rows in memory at a time.
+
+    Values are written as they are (no escaping), generated values must not
+    contain tabs, newlines or backslashes.
+
+    Parameters:
+        model: django.db.models.Model class
+        fields: list(str)
+            Names of the fields in each row.
+        rows: iterable
+            Tuples of values (may be a generator), None for NULL.
+        chunk_size: int
+
+    """
+    meta = getattr(model, "_meta")
+    sql = "COPY {0} ({1}) FROM STDIN".format(
+        connection.ops.quote_name(meta.db_table),
+        ", ".join(connection.ops.quote_name(meta.get_field(name).column)
+                  for name in fields))
+
+    def flush(lines):
+        """ Send a chunk of lines. """
+        with connection.cursor() as cursor:
+            cursor.copy_expert(sql, io.StringIO("".join(lines)))
+
+    lines = []
+    for row in rows:
+        lines.append("\t".join(
+            "\\N" if value is None else str(value) for value in row) + "\n")
+        if len(lines) >= chunk_size:
+            flush(lines)
+            lines = []
+    if lines:
+        flush(lines)
+
+
+def seed(purchases, seed_value=0, chunk_size=DEFAULT_CHUNK_SIZE, months=12):
+    """
+    Create a dataset with a number of purchases and related rows.
+
+    Parameters:
+        purchases: int
+            Number of purchases, other models are sized from it.
+        seed_value: int
+            Seed for the random generator.
+        chunk_size: int
+            Rows per COPY.
+        months: int
+            Months (of 30 days) before now to spread timestamps and order
+            dates over.
+
+    Returns:
+        dict, model name and range of created ids.
+
+    """
+    rnd = random.Random(seed_value)
+    sizes = get_sizes(purchases)
+    district_ids = get_district_ids()
+    now = timezone.now().replace(microsecond=0)
+    span = months * 30 * 24 * 60 * 60
+    audit_fields = ["created", "modified"]
+
+    def get_created():
+        """ Get a random creation time within the seeded months. """
+        created = now - timedelta(seconds=rnd.randrange(span))
+        return created, created
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Not one notification or totals upsert per row (see
+            # items.events and items.OrderTotal), totals are filled below.
+            cursor.execute("SET LOCAL items.skip_notifications = 'on'")
+            cursor.execute("SET LOCAL items.skip_totals = 'on'")
+        partitioning.ensure_partitions(
+            start=(now - timedelta(seconds=span)).date())
+        ids = OrderedDict(
+            (name, reserve_ids(model, sizes[name]))
+            for name, model in [("brands", Brand), ("stores", Store),
+                                ("locations", Location), ("items", Item),
+                                ("orders", Order), ("purchases", Purchase)])
+
+        # Names include the id, unique (see natural keys) when seeding again.
+        copy_rows(Brand, ["id", "name"] + audit_fields, (
+            (id_, "Brand {0}".format(id_)) + get_created()
+            for id_ in ids["brands"]), chunk_size)
+        copy_rows(Store, ["id", "name"] + audit_fields, (
+            (id_, "Store {0}".format(id_)) + get_created()
+            for id_ in ids["stores"]), chunk_size)
+        copy_rows(Location, ["id", "address", "district"] + audit_fields, (
+            (id_, "{0} {1}".format(number, rnd.choice(STREETS)),
+             rnd.choice(district_ids)) + get_created()
+            for number, id_ in enumerate(ids["locations"])), chunk_size)
+
+        def get_item(number, id_):
+            """ Get item row, half of them by weight, half by volume. """
+            name, amount = rnd.choice(WEIGHTS if number % 2 else VOLUMES)
+            amount *= rnd.choice([1, 2, 4])
+            return ((id_, "{0} {1}".format(name, id_),
+                     None if number % 2 else amount,
+                     amount if number % 2 else None,
+                     rnd.choice(ids["brands"])) + get_created())
+
+        copy_rows(Item, ["id", "name", "volume", "weight", "brand"] +
+                  audit_fields, (get_item(number, id_) for number, id_
+                                 in enumerate(ids["items"])), chunk_size)
+        copy_rows(Order, ["id", "date", "store"] + audit_fields, (
+            (id_, (now - timedelta(seconds=rnd.randrange(span))).date(),
+             rnd.choice(ids["stores"])) + get_created()
+            for id_ in ids["orders"]), chunk_size)
+        # A tenth of the purchases have no order.
+        copy_rows(Purchase, ["id", "price", "price_currency", "item",
+                             "location", "order"] + audit_fields, (
+            (id_, Decimal(rnd.randint(100, 100000)) / 100,
+             rnd.choice(CURRENCIES), rnd.choice(ids["items"]),
+             rnd.choice(ids["locations"]),
+             None if rnd.random() < 0.1 else rnd.choice(ids["orders"])) +
+            get_created()
+            for id_ in ids["purchases"]), chunk_size)
+        with connection.cursor() as cursor:
+            cursor.execute(TOTALS_SQL, [ids["orders"][0], ids["orders"][-1]])
+
+    return ids
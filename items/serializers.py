@@ -5,7 +5,8 @@ from measurement.measures import Volume, Weight
 from rest_framework import serializers
 
 
-from .models import Brand, Item, Location, Order, Purchase, Store
+from .models import (
+    Brand, Item, Location, Order, OrderTotal, Purchase, Store)
 
 DEFAULT_FIELDS = ["id", "created_by", "modified_by", "created", "modified"]
 
@@ -32,6 +33,14 @@ class BrandSerializer(serializers.ModelSerializer):
         fields = tuple(DEFAULT_FIELDS + ["name"])
 
 
+class BrandUpsertSerializer(BrandSerializer):
+    """ Serializer for Brand model upserts (names may exist already). """
+
+    class Meta(BrandSerializer.Meta):
+        """ Meta data for serializer. """
+        extra_kwargs = {"name": {"validators": []}}
+
+
 class StoreSerializer(serializers.ModelSerializer):
     """ Serializer for Store model. """
 
@@ -41,6 +50,14 @@ class StoreSerializer(serializers.ModelSerializer):
         fields = tuple(DEFAULT_FIELDS + ["name"])
 
 
+class StoreUpsertSerializer(StoreSerializer):
+    """ Serializer for Store model upserts (names may exist already). """
+
+    class Meta(StoreSerializer.Meta):
+        """ Meta data for serializer. """
+        extra_kwargs = {"name": {"validators": []}}
+
+
 class StoreBlindSerializer(serializers.ModelSerializer):
     """ Serializer for Store model without audit fields. """
 
@@ -50,24 +67,52 @@ class StoreBlindSerializer(serializers.ModelSerializer):
         fields = ("id", "name")
 
 
+class OrderTotalListSerializer(serializers.ListSerializer):
+    """ Serializer for totals of an order with purchases left. """
+
+    # Override
+    def to_representation(self, data):
+        """ Overriding to skip totals without purchases (count 0). """
+        totals = data.all() if hasattr(data, "all") else data
+        return super().to_representation(
+            [total for total in totals if total.count])
+
+
+class OrderTotalSerializer(serializers.ModelSerializer):
+    """ Serializer for OrderTotal model. """
+
+    class Meta:
+        """ Meta data for serializer. """
+        model = OrderTotal
+        fields = ("currency", "amount", "count")
+        list_serializer_class = OrderTotalListSerializer
+
+
 class OrderSerializer(serializers.ModelSerializer):
     """ Serializer for Order model. """
 
+    purchase_count = serializers.IntegerField(read_only=True)
+    totals = OrderTotalSerializer(many=True, read_only=True)
+
     class Meta:
         """ Meta data for serializer. """
         model = Order
-        fields = tuple(DEFAULT_FIELDS + ["date", "store"])
+        fields = tuple(DEFAULT_FIELDS +
+                       ["date", "store", "purchase_count", "totals"])
 
 
 class OrderNestedSerializer(serializers.ModelSerializer):
     """ Serializer for nested Order model. """
 
     store = StoreBlindSerializer()
+    purchase_count = serializers.IntegerField(read_only=True)
+    totals = OrderTotalSerializer(many=True, read_only=True)
 
     class Meta:
         """ Meta data for serializer. """
         model = Order
-        fields = tuple(DEFAULT_FIELDS + ["date", "store"])
+        fields = tuple(DEFAULT_FIELDS +
+                       ["date", "store", "purchase_count", "totals"])
 
 
 class ItemSerializer(serializers.ModelSerializer):
@@ -167,6 +212,25 @@ class ItemSerializer(serializers.ModelSerializer):
                 **{unit or "g": weight})
         return validated_data
 
+    def build_instance(self, validated_data):
+        """
+        Get unsaved Item for validated data (for upserts).
+
+        Parameters:
+            validated_data: dict
+
+        Returns:
+            items.models.Item
+
+        """
+        validated_data = self._set_volume_weight_fields(
+            dict(validated_data),
+            validated_data.get("unit"),
+            validated_data.get("volume"),
+            validated_data.get("weight"))
+        validated_data.pop("unit", None)
+        return Item(**validated_data)
+
     # Override
     def create(self, validated_data):
         """ Overriding to handle meassurement units. """
@@ -318,3 +382,37 @@ class PurchaseNestedSerializer(serializers.ModelSerializer):
         model = Purchase
         fields = tuple(DEFAULT_FIELDS +
                        ["price", "currency", "item", "order", "location"])
+
+
+class PurchaseLineSerializer(serializers.ModelSerializer):
+    """ Serializer for Purchase model embedded in its order. """
+
+    currency = serializers.CharField(source="price_currency", read_only=True)
+    item = ItemBlindNestedSerializer()
+
+    class Meta:
+        """ Meta data for serializer. """
+        model = Purchase
+        fields = ("id", "price", "currency", "item")
+
+
+class OrderEmbedSerializer(OrderSerializer):
+    """ Serializer for Order model with its purchases. """
+
+    purchases = PurchaseLineSerializer(source="purchase_set", many=True,
+                                       read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        """ Meta data for serializer. """
+        fields = OrderSerializer.Meta.fields + ("purchases",)
+
+
+class OrderNestedEmbedSerializer(OrderNestedSerializer):
+    """ Serializer for nested Order model with its purchases. """
+
+    purchases = PurchaseLineSerializer(source="purchase_set", many=True,
+                                       read_only=True)
+
+    class Meta(OrderNestedSerializer.Meta):
+        """ Meta data for serializer. """
+        fields = OrderNestedSerializer.Meta.fields + ("purchases",)
@@ -0,0 +1,134 @@
+""" Tests for batch requests of items app. """
+from django.test import TestCase, TransactionTestCase
+
+from model_mommy import mommy
+
+from rest_framework import exceptions, status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from .. import batch
+from ..models import Store
+
+
+class BatchTest(TestCase):
+    """ Tests for validation and grouping of sub-requests. """
+
+    def test_validate(self):
+        """ Test invalid batches are rejected. """
+        # When/Then
+        for data in [{}, [], ["GET /api/brands/"],
+                     [{"method": "TRACE", "path": "/api/brands/"}],
+                     [{"path": "/admin/"}],
+                     [{"path": "/api/brands/"}] * 3]:
+            with self.assertRaises(exceptions.ValidationError):
+                batch.validate(data, 2)
+        self.assertEqual(
+            batch.validate([{"method": "post", "path": "/api/stores/",
+                             "body": {"name": "Store"}}], 2),
+            [{"method": "POST", "path": "/api/stores/",
+              "body": {"name": "Store"}}])
+
+    def test_groups(self):
+        """ Test consecutive reads are grouped, writes are alone. """
+        # Given
+        sub_requests = [{"method": method} for method in
+                        ["GET", "GET", "POST", "GET", "OPTIONS", "DELETE"]]
+
+        # When/Then
+        self.assertEqual(batch.get_groups(sub_requests, True),
+                         [[0, 1], [2], [3, 4], [5]])
+        self.assertEqual(batch.get_groups(sub_requests, False),
+                         [[0], [1], [2], [3], [4], [5]])
+
+
+class BatchViewTests(TestCase):
+    """ Test batch endpoint. """
+
+    def setUp(self):
+        """ Setup for tests. """
+        self.user = mommy.make("User")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_batch(self):
+        """ Test sub-requests run in order as the authenticated user. """
+        # Given
+        brand = mommy.make("Brand", name="Brand")
+        data = [{"path": "/api/brands/"},
+                {"method": "POST", "path": "/api/stores/",
+                 "body": {"name": "Store"}},
+                {"path": "/api/stores/?page=1"},
+                {"path": "/api/brands/{0}/".format(brand.id)},
+                {"path": "/api/nothing/"},
+                {"path": "/api/metrics/"}]
+
+        # When
+        response = self.client.post(reverse("batch"), data, format="json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()
+        self.assertEqual([result["status"] for result in results],
+                         [200, 201, 200, 200, 404, 404])
+        self.assertEqual(results[0]["body"]["count"], 1)
+        self.assertEqual(results[2]["body"]["results"][0]["name"], "Store")
+        self.assertEqual(results[3]["body"]["name"], "Brand")
+        self.assertEqual(Store.objects.get().created_by, self.user)
+
+    def test_errors(self):
+        """ Test errors of sub-requests are returned with their status. """
+        # When
+        response = self.client.post(reverse("batch"), [
+            {"method": "POST", "path": "/api/stores/", "body": {}},
+            {"path": "/api/stores/0/"}], format="json")
+
+        # Then
+        self.assertEqual(
+            [(result["status"], list(result["body"]))
+             for result in response.json()],
+            [(400, ["name"]), (404, ["detail"])])
+
+    def test_invalid(self):
+        """ Test invalid batches are rejected by index of the request. """
+        # When
+        response = self.client.post(reverse("batch"), [
+            {"path": "/api/brands/"},
+            {"method": "TRACE", "path": "/api/brands/"}], format="json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(),
+                         {"1": {"method": ["Invalid method."]}})
+
+    def test_not_authenticated(self):
+        """ Test batch needs authentication. """
+        # When
+        response = APIClient().post(reverse("batch"),
+                                    [{"path": "/api/brands/"}], format="json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BatchParallelTests(TransactionTestCase):
+    """ Test reads of batches in parallel. """
+
+    def test_parallel(self):
+        """ Test reads outside of transactions run on other threads. """
+        # Given
+        client = APIClient()
+        client.force_authenticate(user=mommy.make("User"))
+        mommy.make("Brand", _quantity=3)
+        mommy.make("Store", _quantity=2)
+        paths = ["/api/brands/", "/api/stores/"] * 4
+
+        # When
+        response = client.post(reverse("batch"),
+                               [{"path": path} for path in paths],
+                               format="json")
+
+        # Then
+        self.assertEqual([(result["status"], result["body"]["count"])
+                          for result in response.json()],
+                         [(200, 3), (200, 2)] * 4)
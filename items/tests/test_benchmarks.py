@@ -0,0 +1,143 @@
+""" Test for seeding and benchmarks of items app. """
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from .. import benchmarks, seeding
+from ..models import Brand, Item, Location, OrderTotal, Purchase
+from ..serializers import ItemSerializer
+
+
+class SeedingTest(TestCase):
+    """ Tests for seeding functions. """
+
+    def test_seed(self):
+        """ Test sizes of seeded dataset. """
+        # When
+        ids = seeding.seed(100, chunk_size=30)
+
+        # Then
+        self.assertEqual(
+            {name: len(values) for name, values in ids.items()},
+            dict(seeding.get_sizes(100)))
+        self.assertEqual(Purchase.objects.count(), 100)
+        self.assertEqual(Brand.objects.count(), 10)
+        self.assertEqual(Item.objects.filter(volume__isnull=False).count(), 5)
+        self.assertEqual(Item.objects.filter(weight__isnull=False).count(), 5)
+        self.assertGreater(Purchase.objects.order_by().values(
+            "price_currency").distinct().count(), 1)
+        self.assertEqual(str(Location.objects.first()).split(", ")[1],
+                         "District")
+
+    def test_seed_totals(self):
+        """ Test totals of orders are filled for seeded purchases. """
+        # When
+        seeding.seed(100)
+
+        # Then
+        purchases = Purchase.objects.filter(order__isnull=False).order_by()
+        self.assertEqual(
+            sorted(OrderTotal.objects.values_list(
+                "order", "currency", "amount", "count")),
+            sorted(purchases.values("order", "price_currency").annotate(
+                amount=Sum("price"), count=Count("id")).values_list(
+                    "order", "price_currency", "amount", "count")))
+
+    def test_seed_ids(self):
+        """ Test new objects get ids after seeded ones. """
+        # Given
+        ids = seeding.seed(10)
+
+        # When
+        brand = Brand.objects.create(name="New")
+
+        # Then
+        self.assertEqual(brand.id, ids["brands"][-1] + 1)
+
+    def test_command(self):
+        """ Test seed command. """
+        # When
+        call_command("seed", purchases=20, seed=3, verbosity=0)
+
+        # Then
+        self.assertEqual(Purchase.objects.count(), 20)
+
+    def test_seed_deterministic(self):
+        """ Test same seed creates same data. """
+        # Given
+        seeding.seed(50, seed_value=1)
+        first = list(Item.objects.order_by("id").values_list(
+            "name", "brand__name", "volume", "weight"))
+        benchmarks.reset_data()
+
+        # When
+        seeding.seed(50, seed_value=1)
+
+        # Then
+        self.assertEqual(list(Item.objects.order_by("id").values_list(
+            "name", "brand__name", "volume", "weight")), first)
+
+
+class BenchmarksTest(TestCase):
+    """ Tests for benchmark functions. """
+
+    def test_percentile(self):
+        """ Test nearest rank percentiles. """
+        # Given
+        values = [5, 1, 4, 2, 3, 10, 9, 8, 7, 6]
+
+        # When/Then
+        self.assertEqual(benchmarks.percentile(values, 50), 5)
+        self.assertEqual(benchmarks.percentile(values, 95), 10)
+        self.assertEqual(benchmarks.percentile([3], 95), 3)
+
+    def test_create_data(self):
+        """ Test data to create an item is valid for its serializer. """
+        # Given
+        Brand.objects.create(name="Brand")
+
+        # When
+        serializer = ItemSerializer(
+            data=benchmarks.get_create_data("items"))
+
+        # Then
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_command_iterations(self):
+        """ Test benchmark command needs at least one iteration. """
+        # When/Then
+        with self.assertRaises(CommandError):
+            call_command("benchmark", iterations=0, verbosity=0)
+
+    def test_run(self):
+        """ Test results for every case of an endpoint. """
+        # When
+        results = benchmarks.run([20], iterations=2, endpoints=["items"])
+
+        # Then
+        self.assertEqual(
+            [(result["action"], result["nested"], result["status"])
+             for result in results],
+            [("list", False, 200), ("detail", False, 200),
+             ("list", True, 200), ("detail", True, 200),
+             ("create", False, 201)])
+        self.assertEqual(Item.objects.count(), 10)
+        self.assertTrue(all(result["queries"] > 0 for result in results))
+
+    def test_compare(self):
+        """ Test comparison with previous results. """
+        # Given
+        old = [{"scale": 10, "endpoint": "brands", "action": "list",
+                "nested": False, "p50_ms": 2.0, "p95_ms": 4.0, "queries": 3}]
+        new = [dict(old[0], p50_ms=1.0, p95_ms=4.0, queries=2),
+               dict(old[0], endpoint="stores")]
+
+        # When
+        comparison = benchmarks.compare(new, old)
+
+        # Then
+        self.assertEqual(len(comparison), 1)
+        self.assertEqual(comparison[0]["p50_ratio"], 0.5)
+        self.assertEqual(comparison[0]["p95_ratio"], 1.0)
+        self.assertEqual(comparison[0]["queries_diff"], -1)
@@ -0,0 +1,111 @@
+""" Tests for bulk updates and deletes of items app. """
+from django.contrib.gis.geos import GEOSGeometry
+
+from model_mommy import mommy
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from ..models import Order, Purchase
+
+
+class BulkTests(APITestCase):
+    """ Test bulk endpoints. """
+
+    def setUp(self):
+        """ Setup for tests. """
+        self.user = mommy.make("User")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        point = GEOSGeometry('POINT(0.00 0.00)')
+        location = mommy.make("Location", district__name="District",
+                              district__city__name="City",
+                              district__city__location=point,
+                              district__city__country__name="Country",
+                              district__location=point)
+        self.orders = mommy.make("Order", _quantity=2)
+        self.purchases = mommy.make("Purchase", price=10, location=location,
+                                    order=self.orders[0], _quantity=3)
+
+    def test_update(self):
+        """ Test selected objects are updated and stamped. """
+        # Given
+        url = "{0}?order={1}".format(reverse("purchase-bulk"),
+                                     self.orders[0].id)
+
+        # When
+        response = self.client.patch(url, {"order": self.orders[1].id},
+                                     format="json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"updated": 3})
+        for purchase in Purchase.objects.all():
+            self.assertEqual(purchase.order_id, self.orders[1].id)
+            self.assertEqual(purchase.modified_by, self.user)
+
+    def test_update_ids(self):
+        """ Test objects are selected by id, null values included. """
+        # Given
+        url = "{0}?ids={1},{2}".format(reverse("purchase-bulk"),
+                                       self.purchases[0].id,
+                                       self.purchases[2].id)
+
+        # When
+        response = self.client.patch(url, {"order": None}, format="json")
+        unassigned = self.client.patch(
+            "{0}?order=".format(reverse("purchase-bulk")),
+            {"order": self.orders[1].id}, format="json")
+
+        # Then
+        self.assertEqual(response.json(), {"updated": 2})
+        self.assertEqual(unassigned.json(), {"updated": 2})
+        self.assertEqual(Purchase.objects.filter(
+            order=self.orders[1]).count(), 2)
+
+    def test_update_invalid(self):
+        """ Test fields not allowed or invalid are rejected. """
+        # Given
+        url = "{0}?ids={1}".format(reverse("purchase-bulk"),
+                                   self.purchases[0].id)
+
+        # When
+        not_allowed = self.client.patch(url, {"price": 3}, format="json")
+        invalid = self.client.patch(url, {"order": 0}, format="json")
+        not_object = self.client.patch(url, ["order"], format="json")
+
+        # Then
+        self.assertEqual(not_allowed.status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("order", invalid.json())
+        self.assertEqual(not_object.status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_no_selection(self):
+        """ Test objects must be selected. """
+        # When
+        response = self.client.delete(reverse("purchase-bulk"))
+        invalid = self.client.delete(
+            "{0}?ids=1,x".format(reverse("purchase-bulk")))
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Purchase.objects.count(), 3)
+
+    def test_delete(self):
+        """ Test selected objects are deleted, cascades included. """
+        # Given
+        url = "{0}?ids={1}".format(reverse("order-bulk"), self.orders[0].id)
+
+        # When
+        response = self.client.delete(url)
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {
+            "deleted": 5, "models": {"items.Order": 1, "items.OrderTotal": 1,
+                                     "items.Purchase": 3}})
+        self.assertEqual(list(Order.objects.all()), [self.orders[1]])
@@ -0,0 +1,137 @@
+""" Tests for changes feed of items app. """
+from django.conf import settings
+from django.contrib.gis.geos import GEOSGeometry
+from django.test import override_settings
+
+from model_mommy import mommy
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from ..models import Tombstone
+
+
+@override_settings(CHANGES_LAG_SECONDS=0)
+class ChangesTests(APITestCase):
+    """ Test changes endpoints. """
+
+    def setUp(self):
+        """ Setup for tests. """
+        self.client = APIClient()
+        self.client.force_authenticate(user=mommy.make("User"))
+
+    def get_changes(self, endpoint_name, cursor=None):
+        """
+        Get changes of an endpoint.
+
+        Parameters:
+            endpoint_name: str
+            cursor: str
+
+        Returns:
+            dict
+
+        """
+        response = self.client.get(
+            reverse("{0}-changes".format(endpoint_name)),
+            {"cursor": cursor} if cursor else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_delta(self):
+        """ Test only changes after the cursor are returned. """
+        # Given
+        brands = mommy.make("Brand", _quantity=3)
+        full = self.get_changes("brand")
+        brands[0].name = "Changed"
+        brands[0].save()
+        brands[1].delete()
+        created = mommy.make("Brand")
+
+        # When
+        delta = self.get_changes("brand", full["cursor"])
+        again = self.get_changes("brand", delta["cursor"])
+
+        # Then
+        self.assertEqual(len(full["results"]), 3)
+        self.assertEqual(full["deleted"], [])
+        self.assertFalse(full["more"])
+        self.assertEqual([brand["id"] for brand in delta["results"]],
+                         [brands[0].id, created.id])
+        self.assertEqual(delta["results"][0]["name"], "Changed")
+        self.assertEqual(delta["deleted"], [brands[1].id])
+        self.assertEqual(again["results"], [])
+        self.assertEqual(again["deleted"], [])
+
+    def test_pages(self):
+        """ Test changes are paginated by cursor. """
+        # Given
+        brands = mommy.make("Brand", _quantity=3)
+        rest_framework = dict(settings.REST_FRAMEWORK, PAGE_SIZE=2)
+
+        # When
+        with self.settings(REST_FRAMEWORK=rest_framework):
+            first = self.get_changes("brand")
+            second = self.get_changes("brand", first["cursor"])
+
+        # Then
+        self.assertTrue(first["more"])
+        self.assertFalse(second["more"])
+        self.assertEqual(
+            sorted(brand["id"] for brand in first["results"] +
+                   second["results"]),
+            sorted(brand.id for brand in brands))
+
+    def test_cascade(self):
+        """ Test objects deleted by cascade get tombstones. """
+        # Given
+        store = mommy.make("Store")
+        orders = mommy.make("Order", store=store, _quantity=2)
+        cursor = self.get_changes("order")["cursor"]
+
+        # When
+        store.delete()
+        delta = self.get_changes("order", cursor)
+
+        # Then
+        self.assertEqual(sorted(delta["deleted"]),
+                         sorted(order.id for order in orders))
+        self.assertEqual(Tombstone.objects.filter(model="store").count(), 1)
+
+    def test_order_totals(self):
+        """ Test orders change with the totals of their purchases. """
+        # Given
+        point = GEOSGeometry('POINT(0.00 0.00)')
+        location = mommy.make("Location", district__name="District",
+                              district__city__name="City",
+                              district__city__location=point,
+                              district__city__country__name="Country",
+                              district__location=point)
+        orders = mommy.make("Order", _quantity=2)
+        cursor = self.get_changes("order")["cursor"]
+
+        # When
+        purchase = mommy.make("Purchase", price=10, order=orders[1],
+                              location=location)
+        delta = self.get_changes("order", cursor)
+        purchase.delete()
+        removed = self.get_changes("order", delta["cursor"])
+
+        # Then
+        self.assertEqual([order["id"] for order in delta["results"]],
+                         [orders[1].id])
+        self.assertEqual(delta["results"][0]["purchase_count"], 1)
+        self.assertEqual([order["id"] for order in removed["results"]],
+                         [orders[1].id])
+        self.assertEqual(removed["results"][0]["totals"], [])
+
+    def test_invalid_cursor(self):
+        """ Test invalid cursors are rejected. """
+        # When
+        response = self.client.get(reverse("brand-changes"),
+                                   {"cursor": "invalid"})
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cursor", response.json())
@@ -0,0 +1,151 @@
+""" Tests for change events of items app. """
+from django.contrib.gis.geos import GEOSGeometry
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from model_mommy import mommy
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from .. import events
+
+
+class SubscriptionTest(TestCase):
+    """ Tests for Subscription and stream. """
+
+    def test_models(self):
+        """ Test only events of the subscribed models are queued. """
+        # Given
+        subscription = events.Subscription(["purchase"])
+
+        # When
+        subscription.put({"model": "brand", "action": "create", "id": 1})
+        subscription.put({"model": "purchase", "action": "create", "id": 2})
+
+        # Then
+        self.assertEqual(subscription.get(0)["id"], 2)
+        self.assertIsNone(subscription.get(0))
+
+    def test_overflow(self):
+        """ Test stream ends with an overflow event when behind. """
+        # Given
+        listener = events.Listener(events.CHANNEL)
+        subscription = events.Subscription(size=1)
+        listener.subscribe(subscription)
+        for pk in [1, 2]:
+            subscription.put({"model": "brand", "action": "update",
+                              "id": pk})
+
+        # When
+        messages = list(events.stream(listener, subscription, 1, 1))
+
+        # Then
+        self.assertEqual(messages, ["event: overflow\ndata: {}\n\n"])
+        self.assertEqual(listener.subscriptions, set())
+
+    def test_heartbeat(self):
+        """ Test comments are sent while there are no events. """
+        # Given
+        listener = events.Listener(events.CHANNEL)
+        subscription = events.Subscription()
+        subscription.put({"model": "brand", "action": "delete", "id": 3})
+
+        # When
+        messages = list(events.stream(listener, subscription, 0.3, 0.1))
+
+        # Then
+        self.assertEqual(messages[0], 'event: brand\ndata: {"action": '
+                                      '"delete", "id": 3, "model": '
+                                      '"brand"}\n\n')
+        self.assertEqual(set(messages[1:]), {": keepalive\n\n"})
+
+
+class ListenerTest(TransactionTestCase):
+    """ Tests for notifications of database changes. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.listener = events.get_listener()
+        self.addCleanup(self.listener.stop)
+        self.assertTrue(self.listener.listening.wait(5))
+
+    def test_events(self):
+        """ Test creates, updates and deletes are published. """
+        # Given
+        subscription = events.Subscription()
+        self.listener.subscribe(subscription)
+
+        # When
+        brand = mommy.make("Brand")
+        brand.name = "Changed"
+        brand.save()
+        brand_id = brand.id
+        brand.delete()
+
+        # Then
+        self.assertEqual(
+            [subscription.get(5) for _ in range(3)],
+            [{"model": "brand", "action": action, "id": brand_id}
+             for action in ["create", "update", "delete"]])
+
+    def test_order_totals(self):
+        """ Test purchases publish an update of their order. """
+        # Given
+        subscription = events.Subscription(["order"])
+        self.listener.subscribe(subscription)
+        point = GEOSGeometry('POINT(0.00 0.00)')
+        location = mommy.make("Location", district__name="District",
+                              district__city__name="City",
+                              district__city__location=point,
+                              district__city__country__name="Country",
+                              district__location=point)
+        order = mommy.make("Order")
+
+        # When
+        mommy.make("Purchase", price=10, order=order, location=location)
+
+        # Then
+        self.assertEqual(
+            [subscription.get(5) for _ in range(2)],
+            [{"model": "order", "action": action, "id": order.id}
+             for action in ["create", "update"]])
+
+    @override_settings(EVENTS_STREAM_SECONDS=5, EVENTS_HEARTBEAT_SECONDS=1)
+    def test_view(self):
+        """ Test events are streamed to clients. """
+        # Given
+        client = APIClient()
+        client.force_authenticate(user=mommy.make("User"))
+
+        # When
+        response = client.get(reverse("events"), {"models": "store"},
+                              HTTP_ACCEPT="text/event-stream")
+        mommy.make("Brand")
+        store = mommy.make("Store")
+        content = iter(response.streaming_content)
+        message = next(chunk for chunk in content
+                       if not chunk.startswith(b":"))
+        response.close()
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith(
+            "text/event-stream"))
+        self.assertEqual(
+            message.decode(),
+            'event: store\ndata: {{"action": "create", "id": {0}, '
+            '"model": "store"}}\n\n'.format(store.id))
+
+    def test_unknown_model(self):
+        """ Test unknown models are rejected. """
+        # Given
+        client = APIClient()
+        client.force_authenticate(user=mommy.make("User"))
+
+        # When
+        response = client.get(reverse("events"), {"models": "user"},
+                              HTTP_ACCEPT="application/json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
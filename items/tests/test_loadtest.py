@@ -0,0 +1,105 @@
+""" Test for load generator of items app. """
+import random
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.test import LiveServerTestCase, TestCase
+
+from model_mommy import mommy
+
+from .. import loadtest
+from ..serializers import ItemSerializer
+
+CATALOG = {
+    "brands": ([{"id": 1}], 3),
+    "stores": ([{"id": 2}], 1),
+    "orders": ([], 1),
+    "items": ([{"id": 3}], 1),
+    "locations": ([{"id": 4, "district": 5}], 1),
+    "purchases": ([{"id": 6}], 2),
+}
+
+
+class LoadTestTest(TestCase):
+    """ Tests for request mix and summary. """
+
+    def test_build_request(self):
+        """ Test requests of the mix are valid for the catalog. """
+        # Given
+        rnd = random.Random(0)
+
+        # When
+        requests = [loadtest.build_request(rnd, CATALOG)
+                    for _ in range(500)]
+
+        # Then
+        labels = {label for label, _, _, _ in requests}
+        self.assertIn("purchases list (nested)", labels)
+        self.assertIn("items create", labels)
+        self.assertNotIn("orders detail", labels)
+        self.assertIn(("purchases create", "POST", "/api/purchases/"),
+                      {request[:3] for request in requests})
+        self.assertIn(("brands list", "GET", "/api/brands/?page=3", None),
+                      requests)
+        same_seed = random.Random(0)
+        self.assertEqual(
+            [loadtest.build_request(same_seed, CATALOG) for _ in range(10)],
+            requests[:10])
+
+    def test_create_data(self):
+        """ Test data to create an item is valid for its serializer. """
+        # Given
+        brand = mommy.make("Brand")
+        catalog = dict(CATALOG, brands=([{"id": brand.id}], 1))
+
+        # When
+        serializer = ItemSerializer(data=loadtest.get_create_data(
+            random.Random(0), "items", catalog))
+
+        # Then
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_summarize(self):
+        """ Test throughput, error rate and percentiles. """
+        # Given
+        results = [("brands list", 200, 0.01), ("brands list", 500, 0.03),
+                   ("items create", 201, 0.02), ("items create", 0, 0.04)]
+
+        # When
+        summary = loadtest.summarize(results, 2)
+
+        # Then
+        self.assertEqual(list(summary), ["all", "brands list",
+                                         "items create"])
+        self.assertEqual(summary["all"]["requests"], 4)
+        self.assertEqual(summary["all"]["throughput_rps"], 2)
+        self.assertEqual(summary["all"]["error_rate"], 0.5)
+        self.assertEqual(summary["all"]["p50_ms"], 20)
+        self.assertEqual(summary["brands list"]["p95_ms"], 30)
+
+
+class LoadTestServerTest(LiveServerTestCase):
+    """ Tests for load generator against a live server. """
+
+    def test_run(self):
+        """ Test requests are sent and succeed. """
+        # Given
+        user = mommy.make("User", username="load")
+        user.set_password("load")
+        user.save()
+        point = GEOSGeometry('POINT(0.00 0.00)')
+        location = mommy.make("Location", district__name="District",
+                              district__city__name="City",
+                              district__city__location=point,
+                              district__city__country__name="Country",
+                              district__location=point)
+        mommy.make("Purchase", price=10, location=location)
+        client = loadtest.Client(self.live_server_url, "load", "load")
+
+        # When
+        results, elapsed = loadtest.run(client, rate=20, duration=1,
+                                        concurrency=4)
+        summary = loadtest.summarize(results, elapsed)
+
+        # Then
+        self.assertEqual(summary["all"]["requests"], 20)
+        self.assertEqual(summary["all"]["error_rate"], 0)
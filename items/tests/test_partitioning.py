@@ -0,0 +1,121 @@
+""" Test for partitioning of purchases of items app. """
+from datetime import date, datetime
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from model_mommy import mommy
+
+from .. import partitioning
+from ..models import Purchase
+
+
+def get_partition(purchase):
+    """
+    Get name of the partition holding a purchase.
+
+    Parameters:
+        purchase: items.models.Purchase
+
+    Returns:
+        str
+
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT tableoid::regclass::text FROM items_purchase "
+            "WHERE id = %s", [purchase.id])
+        return cursor.fetchone()[0]
+
+
+class PartitioningTest(TestCase):
+    """ Tests for partitioning functions. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        point = GEOSGeometry('POINT(0.00 0.00)')
+        self.location = mommy.make("Location",
+                                   district__city__location=point,
+                                   district__location=point)
+
+    def make_purchase(self, created):
+        """ Create purchase with a given creation date. """
+        purchase = mommy.make("Purchase", price=10, location=self.location)
+        Purchase.objects.filter(id=purchase.id).update(created=created)
+        return purchase
+
+    def test_add_months(self):
+        """ Test first day of months away from a date. """
+        # Given
+        day = date(2017, 11, 15)
+
+        # When/Then
+        self.assertEqual(partitioning.add_months(day, 0), date(2017, 11, 1))
+        self.assertEqual(partitioning.add_months(day, 2), date(2018, 1, 1))
+        self.assertEqual(partitioning.add_months(day, -11), date(2016, 12, 1))
+
+    def test_current_month(self):
+        """ Test new purchases go to the partition of the current month. """
+        # Given
+        expected_partition = timezone.now().strftime("items_purchase_y%Ym%m")
+
+        # When
+        purchase = mommy.make("Purchase", price=10, location=self.location)
+
+        # Then
+        self.assertEqual(get_partition(purchase), expected_partition)
+
+    def test_ensure_partitions(self):
+        """ Test missing partitions are created only once. """
+        # When
+        created = partitioning.ensure_partitions(months_ahead=6)
+        created_again = partitioning.ensure_partitions(months_ahead=6)
+
+        # Then
+        self.assertTrue(created)
+        self.assertEqual(created_again, [])
+        self.assertIn(created[-1], dict(partitioning.get_partitions()))
+
+    def test_move_from_default(self):
+        """ Test rows in the default partition move to a new partition. """
+        # Given
+        month = partitioning.add_months(timezone.now().date(), -2)
+        purchase = self.make_purchase(
+            datetime(month.year, month.month, 15, tzinfo=timezone.utc))
+        self.assertEqual(get_partition(purchase), "items_purchase_default")
+
+        # When
+        partitioning.ensure_partitions(start=month)
+
+        # Then
+        self.assertEqual(get_partition(purchase),
+                         month.strftime("items_purchase_y%Ym%m"))
+
+    def test_detach_partitions(self):
+        """ Test old partitions are detached with their rows. """
+        # Given
+        month = partitioning.add_months(timezone.now().date(), -2)
+        purchase = self.make_purchase(
+            datetime(month.year, month.month, 15, tzinfo=timezone.utc))
+        partitioning.ensure_partitions(start=month)
+
+        # When
+        detached = partitioning.detach_partitions(
+            partitioning.add_months(month, 1))
+
+        # Then
+        self.assertEqual(detached, [month.strftime("items_purchase_y%Ym%m")])
+        self.assertFalse(Purchase.objects.filter(id=purchase.id).exists())
+
+    def test_command(self):
+        """ Test management command creates partitions. """
+        # When
+        call_command("purchase_partitions", months_ahead=12)
+
+        # Then
+        self.assertEqual(
+            partitioning.get_partitions()[-1][1],
+            partitioning.add_months(timezone.now().date(), 12))
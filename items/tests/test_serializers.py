@@ -94,7 +94,8 @@ class OrderSerializerTest(TestCase):
         order = mommy.make("Order")
         expected_data = get_default_fields(order)
         expected_data.update({"date": order.date.isoformat(),
-                              "store": order.store.id})
+                              "store": order.store.id,
+                              "purchase_count": 0, "totals": []})
 
         # When
         serializer = OrderSerializer(order)
@@ -113,7 +114,8 @@ class OrderNestedSerializerTest(TestCase):
         expected_data = get_default_fields(order)
         expected_data.update({"date": order.date.isoformat(),
                               "store": {"id": order.store.id,
-                                        "name": order.store.name}})
+                                        "name": order.store.name},
+                              "purchase_count": 0, "totals": []})
 
         # When
         serializer = OrderNestedSerializer(order)
@@ -0,0 +1,137 @@
+""" Tests for order totals of items app. """
+from decimal import Decimal
+
+from django.contrib.gis.geos import GEOSGeometry
+
+from model_mommy import mommy
+from moneyed import Money
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from ..models import OrderTotal, Purchase
+
+
+class OrderTotalTests(APITestCase):
+    """ Test totals of orders. """
+
+    def setUp(self):
+        """ Setup for tests. """
+        self.client = APIClient()
+        self.client.force_authenticate(user=mommy.make("User"))
+        point = GEOSGeometry('POINT(0.00 0.00)')
+        self.location = mommy.make("Location", district__name="District",
+                                   district__city__name="City",
+                                   district__city__location=point,
+                                   district__city__country__name="Country",
+                                   district__location=point)
+        self.orders = mommy.make("Order", _quantity=2)
+
+    def add_purchase(self, order, amount, currency="USD"):
+        """
+        Add a purchase to an order.
+
+        Parameters:
+            order: items.models.Order
+            amount: str
+            currency: str
+
+        Returns:
+            items.models.Purchase
+
+        """
+        return mommy.make("Purchase", price=Money(amount, currency),
+                          order=order, location=self.location)
+
+    def get_totals(self, order):
+        """
+        Get totals of an order.
+
+        Parameters:
+            order: items.models.Order
+
+        Returns:
+            dict, currency and tuple of amount and count.
+
+        """
+        return {total.currency: (total.amount, total.count)
+                for total in OrderTotal.objects.filter(order=order)}
+
+    def test_writes(self):
+        """ Test totals follow creates, updates and deletes. """
+        # Given
+        first = self.add_purchase(self.orders[0], "10.500")
+        second = self.add_purchase(self.orders[0], "2", "DOP")
+        self.add_purchase(self.orders[0], "1.250")
+        self.add_purchase(None, "7")
+
+        # When
+        created = self.get_totals(self.orders[0])
+        first.price = Money("20", "USD")
+        first.save()
+        updated = self.get_totals(self.orders[0])
+        Purchase.objects.filter(id=second.id).update(order=self.orders[1])
+        first.delete()
+
+        # Then
+        self.assertEqual(created, {"USD": (Decimal("11.750"), 2),
+                                   "DOP": (Decimal("2"), 1)})
+        self.assertEqual(updated["USD"], (Decimal("21.250"), 2))
+        self.assertEqual(self.get_totals(self.orders[0]),
+                         {"USD": (Decimal("1.250"), 1),
+                          "DOP": (Decimal("0"), 0)})
+        self.assertEqual(self.get_totals(self.orders[1]),
+                         {"DOP": (Decimal("2"), 1)})
+
+    def test_delete_order(self):
+        """ Test totals are removed with the purchases of an order. """
+        # Given
+        self.add_purchase(self.orders[0], "3")
+
+        # When
+        self.orders[0].delete()
+
+        # Then
+        self.assertFalse(OrderTotal.objects.exists())
+
+    def test_modified(self):
+        """ Test totals are stamped on every change. """
+        # Given
+        purchase = self.add_purchase(self.orders[0], "3")
+        created = OrderTotal.objects.get().modified
+
+        # When
+        purchase.delete()
+
+        # Then
+        self.assertGreater(OrderTotal.objects.get().modified, created)
+        response = self.client.get(
+            reverse("order-detail", args=[self.orders[0].id]))
+        self.assertEqual(response.json()["totals"], [])
+
+    def test_list(self):
+        """ Test totals are shown and orders sorted by them. """
+        # Given
+        self.add_purchase(self.orders[0], "5")
+        self.add_purchase(self.orders[1], "1")
+        self.add_purchase(self.orders[1], "1")
+        url = reverse("order-list")
+
+        # When
+        response = self.client.get(url, {"ordering": "purchase_count"})
+        by_total = self.client.get(url, {"ordering": "-total_USD"})
+        invalid = self.client.get(url, {"ordering": "total_XYZ"})
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual([order["id"] for order in results],
+                         [self.orders[0].id, self.orders[1].id])
+        self.assertEqual(results[1]["purchase_count"], 2)
+        self.assertEqual(results[1]["totals"], [
+            {"currency": "USD", "amount": "2.000", "count": 2}])
+        self.assertEqual([order["id"] for order in
+                          by_total.json()["results"]],
+                         [self.orders[0].id, self.orders[1].id])
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
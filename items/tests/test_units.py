@@ -0,0 +1,121 @@
+""" Tests for unit conversion of items app. """
+from django.contrib.gis.geos import GEOSGeometry
+from django.test import TestCase
+
+from model_mommy import mommy
+from measurement.measures import Volume, Weight
+
+from rest_framework import exceptions, status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from .. import units
+
+
+class UnitsTest(TestCase):
+    """ Tests for unit conversion functions. """
+
+    def test_parse_units(self):
+        """ Test units are matched to their field. """
+        # When/Then
+        self.assertEqual(units.parse_units("lb,l"),
+                         {"weight": "lb", "volume": "l"})
+        self.assertEqual(units.parse_units("kg,ml"),
+                         {"weight": "kg", "volume": "ml"})
+        self.assertEqual(units.parse_units(""), {})
+        with self.assertRaises(exceptions.ValidationError):
+            units.parse_units("parsec")
+        with self.assertRaises(exceptions.ValidationError):
+            units.parse_units("lb,oz")
+
+    def test_convert(self):
+        """ Test columns match conversions of measure objects. """
+        # Given
+        objects = [{"weight": 1000.0, "volume": None, "unit": "g"},
+                   {"weight": None, "volume": 0.5, "unit": "cubic_meter"},
+                   {"weight": None, "volume": None, "unit": None}]
+
+        # When
+        units.convert(objects, {"weight": "lb", "volume": "l"})
+
+        # Then
+        self.assertAlmostEqual(objects[0]["weight"], Weight(g=1000).lb)
+        self.assertAlmostEqual(objects[1]["volume"],
+                               Volume(cubic_meter=0.5).l)
+        self.assertEqual([obj["unit"] for obj in objects], ["lb", "l", None])
+
+    def test_convert_si(self):
+        """ Test SI prefixed units are converted. """
+        # Given
+        objects = [{"weight": 1500.0, "volume": None, "unit": "g"},
+                   {"weight": None, "volume": 0.5, "unit": "cubic_meter"}]
+
+        # When
+        units.convert(objects, {"weight": "kg", "volume": "ml"})
+
+        # Then
+        self.assertAlmostEqual(objects[0]["weight"], 1.5)
+        self.assertAlmostEqual(objects[1]["volume"], 500000)
+        self.assertEqual([obj["unit"] for obj in objects], ["kg", "ml"])
+
+    def test_get_objects(self):
+        """ Test objects are found in pages and nested lists. """
+        # Given
+        page = {"count": 1, "results": [
+            {"id": 1, "purchases": [{"item": {"id": 2}}, {"item": 3}]}]}
+
+        # When/Then
+        self.assertEqual(units.get_objects(page, ("purchases", "item")),
+                         [{"id": 2}])
+        self.assertEqual(units.get_objects({"id": 4}, ()), [{"id": 4}])
+
+
+class UnitEndpointTests(APITestCase):
+    """ Test unit parameter of endpoints. """
+
+    def setUp(self):
+        """ Setup for tests. """
+        self.client = APIClient()
+        self.client.force_authenticate(user=mommy.make("User"))
+        point = GEOSGeometry('POINT(0.00 0.00)')
+        location = mommy.make("Location", district__name="District",
+                              district__city__name="City",
+                              district__city__location=point,
+                              district__city__country__name="Country",
+                              district__location=point)
+        self.item = mommy.make("Item", weight=Weight(g=907.184))
+        self.purchase = mommy.make("Purchase", price=10, item=self.item,
+                                   location=location)
+
+    def test_items(self):
+        """ Test items are converted. """
+        # When
+        response = self.client.get(reverse("item-list"), {"unit": "lb"})
+        detail = self.client.get(
+            reverse("item-detail", args=[self.item.id]), {"unit": "oz"})
+        kilograms = self.client.get(reverse("item-list"), {"unit": "kg"})
+        invalid = self.client.get(reverse("item-list"), {"unit": "parsec"})
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item = response.json()["results"][0]
+        self.assertEqual(item["unit"], "lb")
+        self.assertAlmostEqual(item["weight"], 2)
+        self.assertEqual(detail.json()["unit"], "oz")
+        self.assertEqual(kilograms.status_code, status.HTTP_200_OK)
+        self.assertAlmostEqual(kilograms.json()["results"][0]["weight"],
+                               0.907184)
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_purchases(self):
+        """ Test nested items of purchases are converted. """
+        # When
+        response = self.client.get(reverse("purchase-list"),
+                                   {"unit": "lb", "nested": True})
+        flat = self.client.get(reverse("purchase-list"), {"unit": "lb"})
+
+        # Then
+        item = response.json()["results"][0]["item"]
+        self.assertEqual(item["unit"], "lb")
+        self.assertAlmostEqual(item["weight"], 2)
+        self.assertEqual(flat.json()["results"][0]["item"], self.item.id)
@@ -0,0 +1,104 @@
+""" Tests for bulk upserts of items app. """
+from django.test import override_settings
+
+from model_mommy import mommy
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from ..models import Brand, Item
+
+
+class UpsertTests(APITestCase):
+    """ Test upsert endpoints. """
+
+    def setUp(self):
+        """ Setup for tests. """
+        self.user = mommy.make("User")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_brands(self):
+        """ Test existing brands are found and new ones created. """
+        # Given
+        existing = mommy.make("Brand", name="Existing")
+        data = [{"name": "New"}, {"name": "Existing"}, {"name": "New"}]
+
+        # When
+        response = self.client.post(reverse("brand-upsert"), data,
+                                    format="json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = response.json()["ids"]
+        created = Brand.objects.get(name="New")
+        self.assertEqual(ids, [created.id, existing.id, created.id])
+        self.assertEqual(created.created_by, self.user)
+        self.assertEqual(Brand.objects.count(), 2)
+
+    def test_items(self):
+        """ Test items are matched by name, brand and measures. """
+        # Given
+        brand = mommy.make("Brand")
+        pound = {"name": "Rice", "brand": brand.id, "unit": "lb",
+                 "weight": 1}
+        self.client.post(reverse("item-list"), pound, format="json")
+        existing = Item.objects.get()
+        data = [{"name": "Rice", "brand": brand.id, "unit": "g",
+                 "weight": 453.592},
+                {"name": "Rice", "brand": brand.id, "unit": "lb",
+                 "weight": 2},
+                {"name": "Rice", "brand": brand.id, "unit": "l",
+                 "volume": 1}]
+
+        # When
+        response = self.client.post(reverse("item-upsert"), data,
+                                    format="json")
+        again = self.client.post(reverse("item-upsert"), data, format="json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = response.json()["ids"]
+        self.assertEqual(ids[0], existing.id)
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(again.json()["ids"], ids)
+        self.assertEqual(Item.objects.count(), 3)
+
+    def test_invalid(self):
+        """ Test nothing is saved when an object is invalid. """
+        # Given
+        data = [{"name": "Valid"}, {"name": ""}]
+
+        # When
+        response = self.client.post(reverse("store-upsert"), data,
+                                    format="json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()[1], {
+            "name": ["This field may not be blank."]})
+
+    @override_settings(UPSERT_MAX_OBJECTS=1)
+    def test_too_many(self):
+        """ Test number of objects is limited. """
+        # When
+        response = self.client.post(reverse("brand-upsert"),
+                                    [{"name": "One"}, {"name": "Two"}],
+                                    format="json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Brand.objects.exists())
+
+    def test_unique_name(self):
+        """ Test brands can't be created with a name taken. """
+        # Given
+        mommy.make("Brand", name="Taken")
+
+        # When
+        response = self.client.post(reverse("brand-list"), {"name": "Taken"},
+                                    format="json")
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
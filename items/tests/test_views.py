@@ -7,6 +7,7 @@ from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient, APITestCase
 
+from schmebulock.querybudget import QueryBudgetTestMixin
 from schmebulock.utils import get_default_fields
 
 
@@ -146,7 +147,8 @@ class OrderEndpointTests(APITestCase):
         order = mommy.make("Order")
         expected_data = get_default_fields(order)
         expected_data.update({"date": order.date.isoformat(),
-                              "store": order.store.id})
+                              "store": order.store.id,
+                              "purchase_count": 0, "totals": []})
         url = reverse("{}-list".format(self.endpoint_name))
 
         # When
@@ -165,7 +167,8 @@ class OrderEndpointTests(APITestCase):
         expected_data = get_default_fields(order)
         expected_data.update({"date": order.date.isoformat(),
                               "store": {"id": order.store.id,
-                                        "name": order.store.name}})
+                                        "name": order.store.name},
+                              "purchase_count": 0, "totals": []})
         url = reverse("{}-detail".format(self.endpoint_name),
                       args=[order.id])
 
@@ -176,6 +179,36 @@ class OrderEndpointTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json(), expected_data)
 
+    def test_get_detail_embed(self):
+        """ Test GET detail with embedded purchases. """
+        # Given
+        point = GEOSGeometry('POINT(0.00 0.00)')
+        location = mommy.make("Location", district__name="District",
+                              district__city__name="City",
+                              district__city__location=point,
+                              district__city__country__name="Country",
+                              district__location=point)
+        order = mommy.make("Order")
+        purchase = mommy.make("Purchase", price=10, order=order,
+                              location=location)
+        mommy.make("Purchase", price=10, location=location)
+        url = reverse("{}-detail".format(self.endpoint_name),
+                      args=[order.id])
+
+        # When
+        response = self.client.get(url, data={"embed": "purchases"})
+        invalid = self.client.get(url, data={"embed": "store"})
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["purchases"], [
+            {"id": purchase.id, "price": "10.000", "currency": "USD",
+             "item": {"id": purchase.item.id, "name": purchase.item.name,
+                      "unit": None, "volume": None, "weight": None,
+                      "brand": {"id": purchase.item.brand.id,
+                                "name": purchase.item.brand.name}}}])
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class ItemEndpointTests(APITestCase):
     """ Test Item endpoint.  """
@@ -374,6 +407,25 @@ class PurchaseEndpointTests(APITestCase):
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0], expected_data)
 
+    def test_get_list_order(self):
+        """ Test GET list filtered by order. """
+        # Given
+        order = mommy.make("Order")
+        purchase = mommy.make("Purchase", price=10, order=order,
+                              location=self.location)
+        mommy.make("Purchase", price=10, location=self.location)
+        url = reverse("{}-list".format(self.endpoint_name))
+
+        # When
+        response = self.client.get(url, data={"order": order.id})
+        invalid = self.client.get(url, data={"order": "x"})
+
+        # Then
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([data["id"] for data in response.json()["results"]],
+                         [purchase.id])
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_get_detail_nested(self):
         """ Test GET detail nested returns nested data. """
         # Given
@@ -400,3 +452,67 @@ class PurchaseEndpointTests(APITestCase):
         # Then
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.json(), expected_data)
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, APITestCase):
+    """ Test endpoints don't run more queries as data grows. """
+
+    def setUp(self):
+        """ Setup for tests. """
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Bearer {0}".format(
+                get_authentication_token()))
+        point = GEOSGeometry('POINT(0.00 0.00)')
+        self.district = mommy.make("District",
+                                   name="District",
+                                   city__name="City",
+                                   city__location=point,
+                                   city__country__name="Country",
+                                   location=point)
+
+    def add_objects(self, model_name):
+        """
+        Get function adding objects with their own related objects.
+
+        Parameters:
+            model_name: str
+
+        Returns:
+            callable
+
+        """
+        def add():
+            """ Add a few objects. """
+            for _ in range(3):
+                location = mommy.make("Location", district=self.district)
+                order = mommy.make("Order")
+                if model_name == "Location":
+                    continue
+                elif model_name == "Purchase":
+                    mommy.make("Purchase", price=10, order=order,
+                               location=location)
+                elif model_name != "Order":
+                    mommy.make(model_name)
+        return add
+
+    def test_list(self):
+        """ Test flat and nested lists. """
+        for endpoint, model_name in [("brand", "Brand"), ("store", "Store"),
+                                     ("order", "Order"), ("item", "Item"),
+                                     ("location", "Location"),
+                                     ("purchase", "Purchase")]:
+            for data in [None, {"nested": True}]:
+                with self.subTest(endpoint=endpoint, data=data):
+                    self.assertQueryBudget(
+                        self.client, reverse("{}-list".format(endpoint)),
+                        self.add_objects(model_name), data)
+
+    def test_embed(self):
+        """ Test orders with embedded purchases. """
+        for data in [{"embed": "purchases"},
+                     {"embed": "purchases", "nested": True}]:
+            with self.subTest(data=data):
+                self.assertQueryBudget(
+                    self.client, reverse("order-list"),
+                    self.add_objects("Purchase"), data)
@@ -0,0 +1,129 @@
+"""
+Conversion of measurement fields in responses to other units (?unit=).
+
+Volume and weight are serialized in the standard unit of their measure
+(cubic meters, grams), so a response is converted one column at a time:
+every value of a field is divided by the same factor, precomputed from the
+units of Volume and Weight (SI prefixed ones included, kg, ml, ...),
+instead of building a measure object per row.
+
+    GET /api/items/?unit=lb,l
+
+Takes a weight unit and/or a volume unit (comma separated), rows of the
+other measure are left as they are. Items nested in other objects (e.g.
+purchases with ?nested=true) are converted when the viewset sets their path.
+
+"""
+from collections import OrderedDict
+
+from measurement.measures import Volume, Weight
+from rest_framework import exceptions
+
+UNIT_PARAM = "unit"
+
+# Field and factors from its standard unit to every other unit.
+FACTORS = OrderedDict(
+    (field, {unit: factor / measure.UNITS[measure.STANDARD_UNIT]
+             for unit, factor in measure.get_units().items()})
+    for field, measure in [("volume", Volume), ("weight", Weight)])
+
+
+def parse_units(value):
+    """
+    Get unit to convert each measurement field to.
+
+    Parameters:
+        value: str
+            Comma separated units.
+
+    Returns:
+        dict, field and unit.
+
+    Raises:
+        rest_framework.exceptions.ValidationError
+
+    """
+    units = {}
+    for unit in [unit for unit in value.split(",") if unit]:
+        fields = [field for field, factors in FACTORS.items()
+                  if unit in factors]
+        if not fields:
+            raise exceptions.ValidationError({UNIT_PARAM: [
+                "'{0}' is an invalid unit.".format(unit)]})
+        if fields[0] in units:
+            raise exceptions.ValidationError({UNIT_PARAM: [
+                "Only one unit per field ({0}).".format(fields[0])]})
+        units[fields[0]] = unit
+    return units
+
+
+def get_objects(data, path):
+    """
+    Get serialized objects with measurement fields of a response.
+
+    Parameters:
+        data: dict or list
+            Response data, an object, a list or a page (with results).
+        path: tuple(str)
+            Keys from every row to the objects, nested lists included.
+
+    Returns:
+        list(dict)
+
+    """
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        data = data["results"]
+    objects = data if isinstance(data, list) else [data]
+    for key in path:
+        nested = []
+        for obj in objects:
+            value = obj.get(key) if isinstance(obj, dict) else None
+            nested.extend(value if isinstance(value, list) else [value])
+        objects = nested
+    return [obj for obj in objects if isinstance(obj, dict)]
+
+
+def convert(objects, units):
+    """
+    Convert measurement fields of serialized objects, in place.
+
+    Parameters:
+        objects: list(dict)
+            With values in standard units.
+        units: dict
+            Field and unit, see parse_units().
+
+    """
+    for field, unit in units.items():
+        rows = [obj for obj in objects if obj.get(field) is not None]
+        factor = FACTORS[field][unit]
+        column = [obj[field] / factor for obj in rows]
+        for obj, value in zip(rows, column):
+            obj[field] = value
+            obj["unit"] = unit
+
+
+class UnitViewMixin(object):
+    """
+    Mixin for viewsets converting measurement fields of GET responses.
+
+    Set unit_path to the keys leading from each object to its item.
+
+    """
+    unit_path = ()
+
+    # Override
+    def initial(self, request, *args, **kwargs):
+        """ Overriding to validate requested units before any query. """
+        super().initial(request, *args, **kwargs)
+        self.units = (parse_units(request.query_params.get(UNIT_PARAM, ""))
+                      if request.method == "GET" else {})
+
+    # Override
+    def finalize_response(self, request, response, *args, **kwargs):
+        """ Overriding to convert measurement fields of the response. """
+        units = getattr(self, "units", None)
+        if units and response.status_code == 200:
+            convert(get_objects(getattr(response, "data", None),
+                                self.unit_path), units)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,65 @@
+"""
+Bulk upserts by natural key (see Brand, Store and Item models).
+
+POST /api/<endpoint>/upsert/ with a list of objects (as for create) returns
+the id of each one, in the same order:
+
+    {"ids": [4, 12, 13]}
+
+Objects whose natural key is taken resolve to the existing row, the rest
+are inserted, in batches of INSERT ... ON CONFLICT DO NOTHING (see
+AuditStampedQuerySet.bulk_upsert), so concurrent upserts don't create
+duplicates. The natural keys cover every field that can be written, there is
+nothing left to update on existing rows.
+
+"""
+from django.conf import settings
+from rest_framework import exceptions
+from rest_framework.decorators import list_route
+from rest_framework.response import Response
+
+
+class UpsertViewMixin(object):
+    """
+    Mixin for model viewsets adding bulk upserts.
+
+    Set upsert_serializer_class (without unique validators on the natural
+    key), upsert_key (field names) and upsert_conflict_target (SQL of the
+    unique index, when not just the columns of upsert_key).
+
+    """
+    upsert_serializer_class = None
+    upsert_key = None
+    upsert_conflict_target = None
+
+    # Override
+    def get_serializer_class(self):
+        """
+        Override!
+
+        Using upsert serializer for upserts.
+
+        """
+        if getattr(self, "action", None) == "upsert":
+            return self.upsert_serializer_class
+        return super().get_serializer_class()
+
+    @list_route(methods=["post"])
+    def upsert(self, request):
+        """ Get or create objects by natural key, returning their ids. """
+        if (isinstance(request.data, list) and
+                len(request.data) > settings.UPSERT_MAX_OBJECTS):
+            raise exceptions.ValidationError([
+                "At most {0} objects per upsert.".format(
+                    settings.UPSERT_MAX_OBJECTS)])
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        queryset = self.get_queryset()
+        build_instance = getattr(serializer.child, "build_instance",
+                                 lambda data: queryset.model(**data))
+        ids = queryset.bulk_upsert(
+            [build_instance(data) for data in serializer.validated_data],
+            self.upsert_key, conflict_target=self.upsert_conflict_target,
+            batch_size=settings.UPSERT_BATCH_SIZE)
+        return Response({"ids": ids})
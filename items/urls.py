@@ -30,5 +30,7 @@ ROUTER.register(r"purchases", views.PurchaseViewSet)
 
 
 urlpatterns = [  # pylint: disable=invalid-name
+    url(r"^batch/$", views.BatchView.as_view(), name="batch"),
+    url(r"^events/$", views.EventStreamView.as_view(), name="events"),
     url(r"^", include(ROUTER.urls)),
 ]
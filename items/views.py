@@ -1,62 +1,217 @@
 """ Views of items app. """
 
-from rest_framework import viewsets
-
+from django.conf import settings
+from django.db import connections
+from django.db.models import (
+    DateTimeField, DecimalField, IntegerField, Max, OuterRef, Prefetch,
+    Subquery, Sum)
+from django.db.models.functions import Coalesce, Greatest
+from django.http import StreamingHttpResponse
+from djmoney import settings as djmoney_settings
+from rest_framework import exceptions, views, viewsets
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from schmebulock.metadata import CachedMetadataViewMixin
+from schmebulock.querybudget import QueryBudgetViewMixin
+from schmebulock.renderers import EventStreamRenderer, FastJSONRenderer
+from schmebulock.timing import ServerTimingViewMixin
+
+from . import batch, events
+from .bulk import BulkViewMixin
+from .changes import ChangesViewMixin
+from .units import UnitViewMixin
+from .upsert import UpsertViewMixin
 from . import models
 from . import serializers
 from . import metadata
 
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(ServerTimingViewMixin, QueryBudgetViewMixin,
+                   CachedMetadataViewMixin, ChangesViewMixin,
+                   UpsertViewMixin,
+                   BulkViewMixin, viewsets.ModelViewSet):
     """ Endpoint for Brands. """
     queryset = models.Brand.objects.all()
     serializer_class = serializers.BrandSerializer
+    query_budgets = {"list": 2, "retrieve": 1, "changes": 2}
+    upsert_serializer_class = serializers.BrandUpsertSerializer
+    upsert_key = ["name"]
 
 
-class StoreViewSet(viewsets.ModelViewSet):
+class StoreViewSet(ServerTimingViewMixin, QueryBudgetViewMixin,
+                   CachedMetadataViewMixin, ChangesViewMixin,
+                   UpsertViewMixin,
+                   BulkViewMixin, viewsets.ModelViewSet):
     """ Endpoint for Stores. """
     queryset = models.Store.objects.all()
     serializer_class = serializers.StoreSerializer
+    query_budgets = {"list": 2, "retrieve": 1, "changes": 2}
+    upsert_serializer_class = serializers.StoreUpsertSerializer
+    upsert_key = ["name"]
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ServerTimingViewMixin, QueryBudgetViewMixin,
+                   CachedMetadataViewMixin, ChangesViewMixin,
+                   BulkViewMixin, UnitViewMixin, viewsets.ModelViewSet):
     """
     Endpoint for Orders.
 
     GET parameters:
 
         'nested' (boolean): get detailed information on foreign key fields.
+        'ordering' (string): purchase_count or total_<currency> (e.g.
+            total_USD), prefixed with - for descending order.
+        'embed' (string): purchases, to include the purchases of each order
+            (with item and brand), loaded in one more query.
+        'unit' (string): units to show volume and weight of embedded
+            items in (see items.units).
 
     """
     queryset = models.Order.objects.all()
     serializer_class = serializers.OrderSerializer
+    query_budgets = {"list": 3, "retrieve": 2, "changes": 3,
+                     "list:OrderEmbedSerializer": 4,
+                     "list:OrderNestedEmbedSerializer": 4,
+                     "retrieve:OrderEmbedSerializer": 3,
+                     "retrieve:OrderNestedEmbedSerializer": 3}
+    bulk_fields = ("store", "date")
+    unit_path = ("purchases", "item")
+    changes_field = "changed"
 
     # Override
     def get_serializer_class(self):
         """
         Override!
 
-        Using custom nested serializer when requested.
+        Using custom nested and embedding serializers when requested.
 
         """
-        if (self.request.method == "GET" and
-                self.request.query_params.get("nested")):
+        nested = (self.request.method == "GET" and
+                  self.request.query_params.get("nested"))
+        if self.is_embedding():
+            return (serializers.OrderNestedEmbedSerializer if nested
+                    else serializers.OrderEmbedSerializer)
+        if nested:
             return serializers.OrderNestedSerializer
         return super().get_serializer_class()
 
+    # Override
+    def get_queryset(self):
+        """
+        Override!
+
+        Joining objects shown by the nested serializer and prefetching
+        embedded purchases when requested.
+
+        """
+        queryset = super().get_queryset().prefetch_related("totals")
+        if (self.request.method == "GET" and
+                self.request.query_params.get("nested")):
+            queryset = queryset.select_related("store")
+        if self.is_embedding():
+            queryset = queryset.prefetch_related(Prefetch(
+                "purchase_set", queryset=models.Purchase.objects
+                .select_related("item__brand")))
+        ordering = self.request.query_params.get(api_settings.ORDERING_PARAM)
+        if getattr(self, "action", None) == "list" and ordering:
+            queryset = queryset.annotate(
+                sort_value=self.get_sort_value(ordering.lstrip("-"))
+            ).order_by("-sort_value" if ordering.startswith("-")
+                       else "sort_value", "-created")
+        return queryset
 
-class ItemViewSet(viewsets.ModelViewSet):
+    # Override
+    def get_changes_queryset(self):
+        """
+        Override!
+
+        Orders also change with their totals (purchases added, updated or
+        removed), which don't touch the order row.
+
+        """
+        totals_modified = Subquery(
+            models.OrderTotal.objects.filter(order=OuterRef("pk"))
+            .order_by().values("order").annotate(
+                last_modified=Max("modified")).values("last_modified"),
+            output_field=DateTimeField())
+        return super().get_changes_queryset().annotate(
+            changed=Greatest("modified", Coalesce(totals_modified,
+                                                  "modified")))
+
+    def is_embedding(self):
+        """
+        Check if purchases are requested in the response.
+
+        Returns:
+            bool
+
+        Raises:
+            rest_framework.exceptions.ValidationError
+
+        """
+        embed = self.request.query_params.get("embed")
+        if self.request.method != "GET" or not embed:
+            return False
+        if embed != "purchases":
+            raise exceptions.ValidationError(
+                {"embed": ["Only purchases can be embedded."]})
+        return True
+
+    @staticmethod
+    def get_sort_value(name):
+        """
+        Get expression of a totals field to order by.
+
+        Parameters:
+            name: str
+                purchase_count or total_<currency>.
+
+        Returns:
+            django.db.models.Expression
+
+        Raises:
+            rest_framework.exceptions.ValidationError
+
+        """
+        totals = models.OrderTotal.objects.filter(order=OuterRef("pk"))
+        if name == "purchase_count":
+            return Coalesce(Subquery(
+                totals.order_by().values("order").annotate(
+                    purchase_count=Sum("count")).values("purchase_count"),
+                output_field=IntegerField()), 0)
+        currency = name[len("total_"):]
+        if (not name.startswith("total_") or
+                currency not in dict(djmoney_settings.CURRENCY_CHOICES)):
+            raise exceptions.ValidationError({api_settings.ORDERING_PARAM: [
+                "Order by purchase_count or total_<currency>."]})
+        return Coalesce(Subquery(
+            totals.filter(currency=currency).values("amount"),
+            output_field=DecimalField()), 0)
+
+
+class ItemViewSet(ServerTimingViewMixin, QueryBudgetViewMixin,
+                  CachedMetadataViewMixin, ChangesViewMixin,
+                  UpsertViewMixin,
+                  BulkViewMixin, UnitViewMixin, viewsets.ModelViewSet):
     """
     Endpoint for Items.
 
     GET parameters:
 
         'nested' (boolean): get detailed information on foreign key fields.
+        'unit' (string): units to show volume and weight in (see
+            items.units).
 
     """
     queryset = models.Item.objects.all()
     serializer_class = serializers.ItemSerializer
     metadata_class = metadata.CustomItemMetadata
+    query_budgets = {"list": 2, "retrieve": 1, "changes": 2}
+    upsert_serializer_class = serializers.ItemSerializer
+    upsert_key = models.Item.NATURAL_KEY
+    upsert_conflict_target = models.Item.NATURAL_KEY_SQL
+    bulk_fields = ("brand",)
 
     # Override
     def get_serializer_class(self):
@@ -71,8 +226,24 @@ class ItemViewSet(viewsets.ModelViewSet):
             return serializers.ItemNestedSerializer
         return super().get_serializer_class()
 
+    # Override
+    def get_queryset(self):
+        """
+        Override!
+
+        Joining objects shown by the nested serializer when requested.
+
+        """
+        queryset = super().get_queryset()
+        if (self.request.method == "GET" and
+                self.request.query_params.get("nested")):
+            queryset = queryset.select_related("brand")
+        return queryset
+
 
-class LocationViewSet(viewsets.ModelViewSet):
+class LocationViewSet(ServerTimingViewMixin, QueryBudgetViewMixin,
+                      CachedMetadataViewMixin, ChangesViewMixin,
+                      BulkViewMixin, viewsets.ModelViewSet):
     """
     Endpoint for Location.
 
@@ -83,6 +254,8 @@ class LocationViewSet(viewsets.ModelViewSet):
     """
     queryset = models.Location.objects.all()
     serializer_class = serializers.LocationSerializer
+    query_budgets = {"list": 2, "retrieve": 1, "changes": 2}
+    bulk_fields = ("district",)
 
     # Override
     def get_serializer_class(self):
@@ -97,19 +270,41 @@ class LocationViewSet(viewsets.ModelViewSet):
             return serializers.LocationNestedSerializer
         return super().get_serializer_class()
 
+    # Override
+    def get_queryset(self):
+        """
+        Override!
+
+        Joining objects shown by the nested serializer when requested.
+
+        """
+        queryset = super().get_queryset()
+        if (self.request.method == "GET" and
+                self.request.query_params.get("nested")):
+            queryset = queryset.select_related("district__city__country")
+        return queryset
+
 
-class PurchaseViewSet(viewsets.ModelViewSet):
+class PurchaseViewSet(ServerTimingViewMixin, QueryBudgetViewMixin,
+                      CachedMetadataViewMixin, ChangesViewMixin,
+                      BulkViewMixin, UnitViewMixin, viewsets.ModelViewSet):
     """
     Endpoint for Purchase.
 
     GET parameters:
 
         'nested' (boolean): get detailed information on foreign key fields.
+        'order' (integer): only purchases of an order.
+        'unit' (string): units to show volume and weight of nested items
+            in (see items.units).
 
     """
     queryset = models.Purchase.objects.all()
     serializer_class = serializers.PurchaseSerializer
     metadata_class = metadata.CustomPurchaseMetadata
+    query_budgets = {"list": 2, "retrieve": 1, "changes": 2}
+    bulk_fields = ("item", "location", "order")
+    unit_path = ("item",)
 
     # Override
     def get_serializer_class(self):
@@ -123,3 +318,89 @@ class PurchaseViewSet(viewsets.ModelViewSet):
                 self.request.query_params.get("nested")):
             return serializers.PurchaseNestedSerializer
         return super().get_serializer_class()
+
+    # Override
+    def get_queryset(self):
+        """
+        Override!
+
+        Joining objects shown by the nested serializer and filtering by
+        order when requested.
+
+        """
+        queryset = super().get_queryset()
+        order = self.request.query_params.get("order")
+        if getattr(self, "action", None) == "list" and order:
+            if not order.isdigit():
+                raise exceptions.ValidationError(
+                    {"order": ["A valid integer is required."]})
+            queryset = queryset.filter(order_id=int(order))
+        if (self.request.method == "GET" and
+                self.request.query_params.get("nested")):
+            queryset = queryset.select_related(
+                "item__brand", "order__store",
+                "location__district__city__country")
+        return queryset
+
+
+class EventStreamView(views.APIView):
+    """
+    Server-Sent Events of creates, updates and deletes (see items.events).
+
+    GET parameters:
+
+        'models' (comma separated): only events of these models (brand,
+        store, order, item, location, purchase).
+
+    """
+    renderer_classes = (EventStreamRenderer, FastJSONRenderer)
+
+    def get(self, request):
+        """ Stream events until EVENTS_STREAM_SECONDS have passed. """
+        models = [model for model in
+                  request.query_params.get("models", "").split(",") if model]
+        unknown = set(models) - set(events.MODELS)
+        if unknown:
+            raise exceptions.ValidationError({"models": [
+                "Unknown models: {0}.".format(", ".join(sorted(unknown)))]})
+
+        listener = events.get_listener()
+        subscription = events.Subscription(models,
+                                           size=settings.EVENTS_QUEUE_SIZE)
+        listener.subscribe(subscription)
+        listener.listening.wait(settings.EVENTS_HEARTBEAT_SECONDS)
+
+        # Streams are long, give database connections back to the pool.
+        for connection in connections.all():
+            if not connection.in_atomic_block:
+                connection.close()
+
+        response = StreamingHttpResponse(
+            events.stream(listener, subscription,
+                          settings.EVENTS_STREAM_SECONDS,
+                          settings.EVENTS_HEARTBEAT_SECONDS),
+            content_type="text/event-stream; charset=utf-8")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # Not buffered by nginx.
+        return response
+
+
+class BatchView(views.APIView):
+    """
+    Many calls to the items endpoints in one request (see items.batch).
+
+    POST a list of {"method", "path", "body"} objects, get a list of
+    {"status", "headers", "body"} objects in the same order.
+
+    """
+
+    def post(self, request):
+        """ Run sub-requests as the authenticated user. """
+        from .urls import ROUTER  # urls imports this module.
+
+        sub_requests = batch.validate(request.data,
+                                      settings.BATCH_MAX_REQUESTS)
+        allowed_views = {viewset for _, viewset, _ in ROUTER.registry}
+        return Response(batch.run_batch(
+            request, sub_requests, allowed_views,
+            settings.BATCH_MAX_WORKERS))
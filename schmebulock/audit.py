@@ -0,0 +1,266 @@
+"""
+Audit stamping (created_by/modified_by) for models using AuthStampedModel.
+
+audit_log.middleware.UserLoggingMiddleware connects signal handlers on every
+writing request and stamps created_by with an extra UPDATE after each INSERT,
+bulk_create and QuerySet.update skip it entirely.
+
+Here the acting user is resolved once per writing request (lazily, so users
+authenticated by DRF are picked up) and written in the same INSERT/UPDATE
+statement, both for save() and for the bulk paths of AuditStampedQuerySet.
+
+"""
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.db import connections, models
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from audit_log.models.fields import (
+    CreatingSessionKeyField,
+    CreatingUserField,
+    LastSessionKeyField,
+    LastUserField)
+from django_extensions.db.fields import ModificationDateTimeField
+
+_LOCAL = threading.local()
+_UNRESOLVED = object()
+
+
+def set_request(request):
+    """
+    Set request acting on behalf of the current thread.
+
+    Parameters:
+        request: django.http.HttpRequest
+
+    """
+    _LOCAL.request = request
+    _LOCAL.stamp = _UNRESOLVED
+
+
+def clear_request():
+    """ Clear request acting on behalf of the current thread. """
+    _LOCAL.request = None
+    _LOCAL.stamp = _UNRESOLVED
+
+
+def get_stamp():
+    """
+    Get user and session key acting on the current request.
+
+    Resolved once per request and cached.
+
+    Returns:
+        tuple(User or None, str or None) or None if there is no writing
+        request for the current thread.
+
+    """
+    request = getattr(_LOCAL, "request", None)
+    if request is None:
+        return None
+
+    if _LOCAL.stamp is _UNRESOLVED:
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            user = None
+        session = getattr(request, "session", None)
+        _LOCAL.stamp = (user, session.session_key if session else None)
+
+    return _LOCAL.stamp
+
+
+@lru_cache(maxsize=None)
+def get_audit_fields(model):
+    """
+    Get audit fields of a model, grouped by when they are set.
+
+    Parameters:
+        model: django.db.models.Model class
+
+    Returns:
+        dict, with "created" and "modified" lists of (field, kind) where kind
+        is "user" or "session", and "timestamp" with the name of the
+        modification date field (or None).
+
+    """
+    fields = {"created": [], "modified": [], "timestamp": None}
+    for field in getattr(model, "_meta").fields:
+        if isinstance(field, CreatingUserField):
+            fields["created"].append((field, "user"))
+        elif isinstance(field, CreatingSessionKeyField):
+            fields["created"].append((field, "session"))
+        elif isinstance(field, LastUserField):
+            fields["modified"].append((field, "user"))
+        elif isinstance(field, LastSessionKeyField):
+            fields["modified"].append((field, "session"))
+        elif isinstance(field, ModificationDateTimeField):
+            fields["timestamp"] = field.name
+    return fields
+
+
+def get_stamp_values(model, created=False):
+    """
+    Get values for audit fields of a model using the current request.
+
+    Parameters:
+        model: django.db.models.Model class
+        created: bool
+            Include fields only set on creation.
+
+    Returns:
+        dict, field name and value, empty if there is no writing request.
+
+    """
+    fields = get_audit_fields(model)
+    stamp = get_stamp() if fields["created"] or fields["modified"] else None
+    if stamp is None:
+        return {}
+
+    user, session = stamp
+    values = {field.name: user if kind == "user" else session
+              for field, kind in fields["modified"]}
+    if created:
+        values.update({field.name: user if kind == "user" else session
+                       for field, kind in fields["created"]})
+    return values
+
+
+@receiver(pre_save, dispatch_uid="schmebulock.audit.stamp_instance")
+def stamp_instance(sender, instance, **kwargs):
+    """ Set audit fields before saving, so they go in the same statement. """
+    if getattr(_LOCAL, "request", None) is None:
+        return
+
+    created = getattr(instance, "_state").adding
+    for name, value in get_stamp_values(sender, created=created).items():
+        setattr(instance, name, value)
+
+
+class AuditStampedQuerySet(models.QuerySet):
+    """ QuerySet that stamps audit fields on bulk inserts and updates. """
+
+    # Override
+    def bulk_create(self, objs, batch_size=None):
+        """
+        Overriding to set audit fields of objects not set explicitly.
+
+        """
+        objs = list(objs)
+        values = get_stamp_values(self.model, created=True)
+        if values:
+            meta = getattr(self.model, "_meta")
+            attnames = {name: meta.get_field(name).attname for name in values}
+            for obj in objs:
+                for name, value in values.items():
+                    if getattr(obj, attnames[name]) is None:
+                        setattr(obj, name, value)
+
+        return super().bulk_create(objs, batch_size=batch_size)
+
+    # Override
+    def update(self, **kwargs):
+        """
+        Overriding to set modified and audit fields in the same statement,
+        unless they are set explicitly.
+
+        """
+        values = get_stamp_values(self.model)
+        timestamp = get_audit_fields(self.model)["timestamp"]
+        if timestamp:
+            values[timestamp] = timezone.now()
+        values.update(kwargs)
+
+        return super().update(**values)
+
+    def bulk_upsert(self, objs, key_fields, conflict_target=None,
+                    batch_size=1000):
+        """
+        Insert objects whose natural key is not taken yet, in batches of
+        INSERT ... ON CONFLICT DO NOTHING, and get ids of all of them.
+
+        Parameters:
+            objs: list(django.db.models.Model)
+                Not saved, audit fields are set as in bulk_create.
+            key_fields: list(str)
+                Fields of the natural key (a unique index), the first one
+                can't be null.
+            conflict_target: str
+                SQL of the unique index (column list or expressions),
+                columns of key_fields by default.
+            batch_size: int
+                Rows per statement.
+
+        Returns:
+            list(int), id of each object in the same order.
+
+        """
+        meta = getattr(self.model, "_meta")
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        fields = [field for field in meta.concrete_fields
+                  if not field.primary_key]
+        keys = [meta.get_field(name) for name in key_fields]
+        key_indexes = [fields.index(field) for field in keys]
+
+        values = get_stamp_values(self.model, created=True)
+        rows = OrderedDict()
+        obj_keys = []
+        for obj in objs:
+            for name, value in values.items():
+                if getattr(obj, meta.get_field(name).attname) is None:
+                    setattr(obj, name, value)
+            row = [field.get_db_prep_save(field.pre_save(obj, True),
+                                          connection)
+                   for field in fields]
+            key = tuple(row[index] for index in key_indexes)
+            obj_keys.append(key)
+            rows.setdefault(key, row)
+
+        ids = {}
+        insert_sql = (
+            "INSERT INTO {0} ({1}) VALUES {{0}} ON CONFLICT ({2}) "
+            "DO NOTHING".format(
+                quote_name(meta.db_table),
+                ", ".join(quote_name(field.column) for field in fields),
+                conflict_target or ", ".join(
+                    quote_name(field.column) for field in keys)))
+        # Key values are matched with IS NOT DISTINCT FROM (nulls included),
+        # but the first one with = so its index is used.
+        select_sql = (
+            "SELECT t.{0}, {1} FROM {2} t JOIN (VALUES {{0}}) AS v ({3}) "
+            "ON {4}".format(
+                quote_name(meta.pk.column),
+                ", ".join("v.k{0}".format(number)
+                          for number in range(len(keys))),
+                quote_name(meta.db_table),
+                ", ".join("k{0}".format(number)
+                          for number in range(len(keys))),
+                " AND ".join(
+                    "t.{0} {1} v.k{2}".format(
+                        quote_name(field.column),
+                        "IS NOT DISTINCT FROM" if number else "=", number)
+                    for number, field in enumerate(keys))))
+        key_placeholder = "({0})".format(", ".join(
+            "%s::{0}".format(field.db_type(connection)) for field in keys))
+        row_placeholder = "({0})".format(", ".join(["%s"] * len(fields)))
+
+        unique_keys = list(rows)
+        with connection.cursor() as cursor:
+            for start in range(0, len(unique_keys), batch_size):
+                batch = unique_keys[start:start + batch_size]
+                cursor.execute(
+                    insert_sql.format(", ".join([row_placeholder] *
+                                                len(batch))),
+                    [value for key in batch for value in rows[key]])
+                cursor.execute(
+                    select_sql.format(", ".join([key_placeholder] *
+                                                len(batch))),
+                    [value for key in batch for value in key])
+                for row in cursor.fetchall():
+                    ids[tuple(row[1:])] = row[0]
+
+        return [ids[key] for key in obj_keys]
@@ -0,0 +1,99 @@
+""" Custom authentication classes for the API. """
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from rest_framework.authentication import BasicAuthentication
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    HTTP Basic authentication that remembers verified credentials.
+
+    Checking a password runs the configured hasher (PBKDF2 by default) which
+    is expensive on purpose, scripted clients sending the same credentials
+    on every request pay that cost each time.
+
+    Once a username/password pair has been verified, a salted digest of it is
+    cached for BASIC_AUTH_CACHE_TIMEOUT seconds (the password itself is never
+    stored). The cached entry also holds a digest of the user's password hash,
+    so changing the password invalidates it right away.
+
+    """
+    key_salt = "schmebulock.authentication.CachedBasicAuthentication"
+
+    def get_cache_key(self, userid, password):
+        """
+        Get cache key for a set of credentials.
+
+        Parameters:
+            userid: str
+                Value for the username field.
+            password: str
+                Raw password.
+
+        Returns:
+            str
+
+        """
+        digest = salted_hmac(
+            self.key_salt, "{0}:{1}".format(userid, password)).hexdigest()
+        return "basic-auth:{0}".format(digest)
+
+    def get_password_digest(self, user):
+        """
+        Get digest of the stored (already hashed) password of a user.
+
+        Parameters:
+            user: django.contrib.auth.models.User
+
+        Returns:
+            str
+
+        """
+        return salted_hmac(self.key_salt, user.password).hexdigest()
+
+    def get_cached_user(self, key):
+        """
+        Get user for cached credentials if they are still valid.
+
+        Parameters:
+            key: str
+                Cache key returned by get_cache_key.
+
+        Returns:
+            django.contrib.auth.models.User or None if credentials are not
+            cached, the user is inactive or its password changed.
+
+        """
+        cached = cache.get(key)
+        if cached is None:
+            return None
+
+        user_id, password_digest = cached
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if (user is None or not user.is_active or
+                not constant_time_compare(
+                    password_digest, self.get_password_digest(user))):
+            cache.delete(key)
+            return None
+
+        return user
+
+    # Override
+    def authenticate_credentials(self, userid, password):
+        """ Overriding to skip the password hasher for cached credentials. """
+        timeout = getattr(settings, "BASIC_AUTH_CACHE_TIMEOUT", None)
+        if not timeout:
+            return super().authenticate_credentials(userid, password)
+
+        key = self.get_cache_key(userid, password)
+        user = self.get_cached_user(key)
+        if user is not None:
+            return (user, None)
+
+        user, auth = super().authenticate_credentials(userid, password)
+        cache.set(key, (user.pk, self.get_password_digest(user)), timeout)
+
+        return (user, auth)
@@ -0,0 +1,21 @@
+""" Database utilities for the project. """
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """
+    Run queries of all databases through an execute wrapper inside the block.
+
+    See schmebulock.db.backends.postgis.base for the wrapper signature.
+
+    Parameters:
+        wrapper: callable
+
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
@@ -0,0 +1 @@
+""" PostGIS backend with a per process connection pool. """
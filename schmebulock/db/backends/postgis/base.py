@@ -0,0 +1,182 @@
+"""
+PostGIS backend that reuses connections from a per process pool.
+
+Django opens (and closes) a connection per request when CONN_MAX_AGE is 0,
+with this backend "closing" returns the connection to a pool instead, so the
+next request only pays for a health check.
+
+Pool options go in the POOL key of the database settings:
+
+    'POOL': {
+        'MAX_CONNECTIONS': 10,  # Per process, in use and idle.
+        'TIMEOUT': 10,  # Seconds to wait for a connection when all in use.
+        'CHECK_QUERY': 'SELECT 1',  # None to skip the check on checkout.
+    }
+
+Queries can also be instrumented with execute wrappers, like Django 2.0+:
+
+    with connection.execute_wrapper(wrapper):
+        ...
+
+where wrapper(execute, sql, params, many, context) must call
+execute(sql, params, many, context) and return its result. Queries slower
+than SLOW_QUERY_SECONDS are logged (see schmebulock.db.slowlog).
+
+"""
+from contextlib import contextmanager
+from functools import partial
+
+from django.contrib.gis.db.backends.postgis.base import \
+    DatabaseWrapper as PostGISDatabaseWrapper
+from django.db.backends import utils
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql.base import Database
+
+from schmebulock.db.pool import get_pool
+from schmebulock.db.slowlog import log_slow_query
+
+from .creation import DatabaseCreation
+from .introspection import DatabaseIntrospection
+
+
+class CursorWrapper(utils.CursorWrapper):
+    """ Cursor running queries through its database's execute wrappers. """
+
+    # Override
+    def execute(self, sql, params=None):
+        return self._execute_with_wrappers(
+            sql, params, False, super().execute)
+
+    # Override
+    def executemany(self, sql, param_list):
+        return self._execute_with_wrappers(
+            sql, param_list, True, super().executemany)
+
+    def _execute_with_wrappers(self, sql, params, many, executor):
+        """
+        Run query through execute wrappers, first added is outermost.
+
+        The slow query log is always innermost, so it only times the query.
+
+        Parameters:
+            sql: str
+            params: list or dict (list of them if many)
+            many: bool
+                If executemany() was called.
+            executor: callable
+                Actual execute/executemany, taking sql and params.
+
+        Returns:
+            Result of executor.
+
+        """
+        def execute(sql, params, many, context):
+            """ Innermost call, run the query. """
+            return executor(sql, params)
+
+        execute = partial(log_slow_query, execute)
+        for wrapper in reversed(self.db.execute_wrappers):
+            execute = partial(wrapper, execute)
+        return execute(sql, params, many,
+                       {"connection": self.db, "cursor": self})
+
+
+class CursorDebugWrapper(utils.CursorDebugWrapper, CursorWrapper):
+    """ Debug cursor (logs queries) running execute wrappers. """
+
+
+class DatabaseWrapper(PostGISDatabaseWrapper):
+    """ PostGIS database wrapper using pooled connections. """
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.execute_wrappers = []
+        if kwargs.get("alias", "") != NO_DB_ALIAS:
+            self.introspection = DatabaseIntrospection(self)
+
+    @contextmanager
+    def execute_wrapper(self, wrapper):
+        """
+        Run queries through wrapper inside the block.
+
+        Parameters:
+            wrapper: callable
+                Called with execute, sql, params, many and context.
+
+        """
+        self.execute_wrappers.append(wrapper)
+        try:
+            yield
+        finally:
+            self.execute_wrappers.pop()
+
+    # Override
+    def make_cursor(self, cursor):
+        return CursorWrapper(cursor, self)
+
+    # Override
+    def make_debug_cursor(self, cursor):
+        return CursorDebugWrapper(cursor, self)
+
+    def get_pool(self, conn_params=None):
+        """
+        Get pool for the connection params of this database.
+
+        Parameters:
+            conn_params: dict
+                Connection params, from get_connection_params() if not given.
+
+        Returns:
+            schmebulock.db.pool.ConnectionPool
+
+        """
+        conn_params = conn_params or self.get_connection_params()
+        options = self.settings_dict.get("POOL") or {}
+        key = tuple(sorted((name, str(value))
+                           for name, value in conn_params.items()))
+        return get_pool(
+            key,
+            lambda: Database.connect(**conn_params),
+            max_connections=options.get("MAX_CONNECTIONS", 10),
+            timeout=options.get("TIMEOUT", 10),
+            check_query=options.get("CHECK_QUERY", "SELECT 1"),
+            name="{0}@{1}:{2}/{3}".format(
+                conn_params.get("user", ""), conn_params.get("host", ""),
+                conn_params.get("port", ""), conn_params["database"]))
+
+    def close_pool(self):
+        """ Close idle connections in the pool of this database. """
+        self.get_pool().close_idle()
+
+    # Override
+    def get_new_connection(self, conn_params):
+        """ Overriding to check out a connection from the pool. """
+        self.pool = self.get_pool(conn_params)
+        connection = self.pool.getconn()
+
+        # Same as parent, see django.db.backends.postgresql.base
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+
+        return connection
+
+    # Override
+    def _close(self):
+        """
+        Overriding to return the connection to the pool.
+
+        When closed inside an atomic block Django keeps a reference to the
+        connection until the block exits, so it can't be reused.
+
+        """
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                return self.pool.putconn(
+                    self.connection, close=self.in_atomic_block)
@@ -0,0 +1,24 @@
+""" Test database creation for the pooled PostGIS backend. """
+from django.db.backends.postgresql.creation import \
+    DatabaseCreation as Psycopg2DatabaseCreation
+
+
+class DatabaseCreation(Psycopg2DatabaseCreation):
+    """
+    Closes idle pooled connections before a test database is dropped or
+    used as template, PostgreSQL refuses both while sessions are connected.
+
+    """
+
+    # Override
+    def _destroy_test_db(self, test_database_name, verbosity):
+        """ Overriding to close idle pooled connections first. """
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+    # Override
+    def _clone_test_db(self, number, verbosity, keepdb=False):
+        """ Overriding to close idle pooled connections first. """
+        self.connection.close()
+        self.connection.close_pool()
+        super()._clone_test_db(number, verbosity, keepdb=keepdb)
@@ -0,0 +1,26 @@
+""" Introspection for the pooled PostGIS backend. """
+from django.contrib.gis.db.backends.postgis.introspection import \
+    PostGISIntrospection
+from django.db.backends.base.introspection import TableInfo
+
+
+class DatabaseIntrospection(PostGISIntrospection):
+    """
+    Lists partitioned tables (relkind 'p') along with regular tables, Django
+    would otherwise skip them when flushing the database.
+
+    """
+
+    # Override
+    def get_table_list(self, cursor):
+        """ Overriding to include partitioned tables. """
+        cursor.execute("""
+            SELECT c.relname, c.relkind
+            FROM pg_catalog.pg_class c
+            LEFT JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'v', 'p')
+                AND n.nspname NOT IN ('pg_catalog', 'pg_toast')
+                AND pg_catalog.pg_table_is_visible(c.oid)""")
+        return [TableInfo(row[0], {'r': 't', 'v': 'v', 'p': 't'}.get(row[1]))
+                for row in cursor.fetchall()
+                if row[0] not in self.ignored_tables]
@@ -0,0 +1,237 @@
+""" In process database connection pool. """
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """ Raised when no connection becomes available in time. """
+    pass
+
+
+class ConnectionPool(object):
+    """
+    Thread safe pool of DB-API connections for one set of connection params.
+
+    Idle connections are reused last in first out (the most recently used one
+    is the least likely to have been dropped by the server) and checked with
+    a cheap query before being handed out, broken ones are replaced.
+
+    At most max_connections are open (in use or idle) at any time, callers
+    wait up to timeout seconds for one to be returned before PoolTimeout.
+
+    """
+
+    def __init__(self, connect, max_connections=10, timeout=10.0,
+                 check_query="SELECT 1", name=None):
+        """
+        Parameters:
+            connect: callable
+                Returns a new DB-API connection.
+            max_connections: int
+                Maximum number of open connections.
+            timeout: float
+                Seconds to wait for a connection when all are in use.
+            check_query: str
+                Query used to check idle connections, None to only check
+                connections are not closed.
+            name: str
+                Label for the pool in stats.
+
+        """
+        self.name = name
+        self.connect = connect
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.check_query = check_query
+        self.pid = os.getpid()
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._stats = {"checkouts": 0, "waits": 0, "wait_time": 0.0,
+                       "timeouts": 0, "failures": 0, "created": 0,
+                       "closed": 0, "in_use": 0}
+
+    def _count(self, stat, value=1):
+        """ Increase a stat counter. """
+        with self._lock:
+            self._stats[stat] += value
+
+    def _acquire_slot(self):
+        """ Wait for a free connection slot. """
+        if self._slots.acquire(blocking=False):
+            return
+
+        start = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.timeout)
+        self._count("waits")
+        self._count("wait_time", time.monotonic() - start)
+        if not acquired:
+            self._count("timeouts")
+            raise PoolTimeout(
+                "No connection available after {0} seconds "
+                "(max_connections={1}).".format(
+                    self.timeout, self.max_connections))
+
+    def _discard(self, conn):
+        """ Close a connection that won't go back to the pool. """
+        try:
+            conn.close()
+        except Exception:  # pylint: disable=broad-except
+            pass
+        self._count("closed")
+
+    def is_healthy(self, conn):
+        """
+        Check an idle connection can still be used.
+
+        Parameters:
+            conn: DB-API connection
+
+        Returns:
+            bool
+
+        """
+        if getattr(conn, "closed", False):
+            return False
+        if not self.check_query:
+            return True
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self.check_query)
+            finally:
+                cursor.close()
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    def getconn(self):
+        """
+        Check out a connection, opening a new one if none is idle.
+
+        Returns:
+            DB-API connection
+
+        Raises:
+            PoolTimeout: when max_connections are in use for too long.
+
+        """
+        self._acquire_slot()
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+
+                if conn is None:
+                    conn = self.connect()
+                    self._count("created")
+                    break
+
+                if self.is_healthy(conn):
+                    break
+
+                self._count("failures")
+                self._discard(conn)
+        except Exception:
+            self._count("failures")
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+        return conn
+
+    def putconn(self, conn, close=False):
+        """
+        Return a checked out connection to the pool.
+
+        Any open transaction is rolled back.
+
+        Parameters:
+            conn: DB-API connection
+            close: bool
+                Close the connection instead of keeping it.
+
+        """
+        try:
+            if not close and not getattr(conn, "closed", False):
+                try:
+                    conn.rollback()
+                except Exception:  # pylint: disable=broad-except
+                    close = True
+                else:
+                    with self._lock:
+                        self._idle.append(conn)
+                    return
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def close_idle(self):
+        """ Close all idle connections. """
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._discard(conn)
+
+    def get_stats(self):
+        """
+        Get usage statistics of the pool.
+
+        Returns:
+            dict
+
+        """
+        with self._lock:
+            stats = dict(self._stats, idle=len(self._idle))
+        stats.update({"name": self.name, "pid": self.pid,
+                      "max_connections": self.max_connections})
+        return stats
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(key, connect, **options):
+    """
+    Get pool for a key, creating it on first use.
+
+    Pools are per process, pools inherited from a parent process (forking
+    WSGI servers) are replaced since connections can't be shared.
+
+    Parameters:
+        key: hashable
+            Identifier of the connection params.
+        connect: callable
+            Returns a new connection (used when creating the pool).
+        **options:
+            Arguments for ConnectionPool.
+
+    Returns:
+        ConnectionPool
+
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None or pool.pid != os.getpid():
+            pool = _POOLS[key] = ConnectionPool(connect, **options)
+        return pool
+
+
+def get_pools():
+    """
+    Get all pools of the current process.
+
+    Returns:
+        dict, key and ConnectionPool.
+
+    """
+    with _POOLS_LOCK:
+        return {key: pool for key, pool in _POOLS.items()
+                if pool.pid == os.getpid()}
@@ -0,0 +1,113 @@
+"""
+Database router sending reads of safe requests to replicas.
+
+ReplicaRoutingMiddleware decides per request whether reads may go to one of
+settings.REPLICA_DATABASES (safe methods on the items endpoints), writes
+always go to the primary (default) database.
+
+A client that just wrote is pinned to the primary for REPLICA_PIN_SECONDS,
+so it reads its own writes even if replicas lag behind. Clients are told
+apart by their credentials (Authorization header or session cookie), so no
+query is needed to find out.
+
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+_LOCAL = threading.local()
+
+
+def set_use_replicas(value):
+    """
+    Allow (or not) reads of the current thread to go to replicas.
+
+    Parameters:
+        value: bool
+
+    """
+    _LOCAL.use_replicas = value
+
+
+def get_use_replicas():
+    """
+    Check if reads of the current thread may go to replicas.
+
+    Returns:
+        bool
+
+    """
+    return getattr(_LOCAL, "use_replicas", False)
+
+
+def get_client_key(request):
+    """
+    Get cache key identifying the client of a request.
+
+    Parameters:
+        request: django.http.HttpRequest
+
+    Returns:
+        str or None for anonymous clients.
+
+    """
+    credentials = (request.META.get("HTTP_AUTHORIZATION") or
+                   request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    if not credentials:
+        return None
+
+    return "replica-pin:{0}".format(
+        salted_hmac("schmebulock.db.routers", credentials).hexdigest())
+
+
+def pin_client(request):
+    """
+    Send reads of a client to the primary database for a while.
+
+    Parameters:
+        request: django.http.HttpRequest
+
+    """
+    key = get_client_key(request)
+    if key:
+        cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_client_pinned(request):
+    """
+    Check if reads of a client must go to the primary database.
+
+    Parameters:
+        request: django.http.HttpRequest
+
+    Returns:
+        bool
+
+    """
+    key = get_client_key(request)
+    return bool(key and cache.get(key))
+
+
+class ReplicaRouter(object):
+    """ Route reads to replicas when allowed for the current request. """
+
+    def db_for_read(self, model, **hints):
+        """ Random replica if allowed, otherwise no opinion (primary). """
+        if settings.REPLICA_DATABASES and get_use_replicas():
+            return random.choice(settings.REPLICA_DATABASES)
+        return None
+
+    def db_for_write(self, model, **hints):
+        """ No opinion, writes go to the primary. """
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """ Replicas hold the same data as the primary. """
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """ Replicas get their schema from the primary. """
+        return db not in settings.REPLICA_DATABASES
@@ -0,0 +1,133 @@
+"""
+Log of queries slower than SLOW_QUERY_SECONDS.
+
+Every database using the project backend runs queries through log_slow_query
+(an execute wrapper), slow ones are logged as JSON to the
+schmebulock.slowqueries logger (a rotating file, see LOGGING in settings)
+with their parameters, the view and serializer that ran them and, for a
+sample of SELECTs (SLOW_QUERY_EXPLAIN_RATE), their EXPLAIN (ANALYZE, BUFFERS)
+plan. Fast queries only pay for timing them.
+
+EXPLAIN ANALYZE runs the query a second time. Its writes are rolled back (in
+a savepoint), but not side effects outside the transaction: SELECTs calling
+functions with those (sequences, notifications, locks, the project's own
+functions, see VOLATILE_FUNCTIONS) only get a plain EXPLAIN, without
+execution times.
+
+"""
+import inspect
+import json
+import logging
+import random
+import re
+import time
+
+from django.conf import settings
+
+LOGGER = logging.getLogger("schmebulock.slowqueries")
+SAVEPOINT = "slow_query_explain"
+# Calls of functions not to run again for EXPLAIN ANALYZE.
+VOLATILE_FUNCTIONS = re.compile(
+    r"\b(nextval|setval|pg_notify|pg_advisory_\w+|pg_try_advisory_\w+|"
+    r"set_config|pg_sleep\w*|lo_\w+|dblink\w*|items_\w+)\s*\(",
+    re.IGNORECASE)
+
+
+def get_origin():
+    """
+    Find view and serializer running the current query from the stack.
+
+    Returns:
+        tuple, view (or None) and name of innermost serializer class (or
+        None).
+
+    """
+    # Imported here, backends are loaded before apps are ready.
+    from rest_framework.serializers import BaseSerializer, ListSerializer
+    from rest_framework.views import APIView
+
+    view = serializer = None
+    frame = inspect.currentframe()
+    try:
+        while frame is not None and view is None:
+            obj = frame.f_locals.get("self")
+            if serializer is None and isinstance(obj, BaseSerializer):
+                serializer = (obj.child if isinstance(obj, ListSerializer)
+                              else obj).__class__.__name__
+            elif isinstance(obj, APIView):
+                view = obj
+            frame = frame.f_back
+    finally:
+        del frame
+    return view, serializer
+
+
+def explain(connection, sql, params):
+    """
+    Get EXPLAIN (ANALYZE, BUFFERS) plan of a SELECT query, or EXPLAIN plan
+    if it calls VOLATILE_FUNCTIONS.
+
+    Runs on a separate cursor of the same connection (so results of the
+    original query are kept), inside a savepoint when in a transaction.
+
+    Parameters:
+        connection: django.db.backends.base.base.BaseDatabaseWrapper
+        sql: str
+        params: list or dict
+
+    Returns:
+        str or None, None if the plan couldn't be captured.
+
+    """
+    in_transaction = not connection.get_autocommit()
+    cursor = connection.connection.cursor()
+    try:
+        if in_transaction:
+            cursor.execute("SAVEPOINT {0}".format(SAVEPOINT))
+        try:
+            cursor.execute(
+                ("EXPLAIN " if VOLATILE_FUNCTIONS.search(sql) else
+                 "EXPLAIN (ANALYZE, BUFFERS) ") + sql, params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except connection.Database.Error:
+            plan = None
+        if in_transaction:
+            cursor.execute("ROLLBACK TO SAVEPOINT {0}".format(SAVEPOINT))
+            cursor.execute("RELEASE SAVEPOINT {0}".format(SAVEPOINT))
+        return plan
+    except connection.Database.Error:
+        return None
+    finally:
+        cursor.close()
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """ Execute wrapper logging queries slower than SLOW_QUERY_SECONDS. """
+    threshold = settings.SLOW_QUERY_SECONDS
+    if threshold is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - start
+    if duration < threshold:
+        return result
+
+    connection = context["connection"]
+    view, serializer = get_origin()
+    rate = settings.SLOW_QUERY_EXPLAIN_RATE
+    plan = None
+    if (not many and sql.lstrip()[:6].upper() == "SELECT" and
+            rate > 0 and random.random() < rate):
+        plan = explain(connection, sql, params)
+    LOGGER.warning(json.dumps({
+        "database": connection.alias,
+        "duration_ms": round(duration * 1000, 3),
+        "sql": sql,
+        "params": params,
+        "view": view.__class__.__name__ if view else None,
+        "action": getattr(view, "action", None),
+        "serializer": serializer,
+        "plan": plan,
+    }, default=str))
+    return result
@@ -0,0 +1,118 @@
+"""
+Process-wide cached OPTIONS metadata.
+
+Form clients send OPTIONS before every screen, while the metadata document
+only changes with the view, its serializer and the methods the user may use.
+CachedMetadataViewMixin builds and renders the document once per process for
+each of those (and accepted media type) and sends it with an ETag, answering
+304 Not Modified when it matches If-None-Match. The browsable API is not
+cached.
+
+CachedMetadata only checks view permissions for PUT, it does not fetch the
+object to check object permissions (none of the views use them).
+
+"""
+import hashlib
+
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.utils.http import quote_etag
+from rest_framework import exceptions
+from rest_framework.metadata import SimpleMetadata
+from rest_framework.request import clone_request
+
+from schmebulock.utils import get_etag_response
+
+# Key and tuple of content, content type and ETag.
+CACHE = {}
+
+
+def get_allowed_methods(request, view):
+    """
+    Get methods with metadata (PUT, POST) the user may use.
+
+    Parameters:
+        request: rest_framework.request.Request
+        view: rest_framework.views.APIView
+
+    Returns:
+        tuple(str)
+
+    """
+    methods = []
+    for method in sorted({"PUT", "POST"} & set(view.allowed_methods)):
+        view.request = clone_request(request, method)
+        try:
+            view.check_permissions(view.request)
+            methods.append(method)
+        except (exceptions.APIException, PermissionDenied, Http404):
+            pass
+        finally:
+            view.request = request
+    return tuple(methods)
+
+
+class CachedMetadata(SimpleMetadata):
+    """ Metadata class for documents cached by CachedMetadataViewMixin. """
+
+    # Override
+    def determine_actions(self, request, view):
+        """
+        Override!
+
+        Checking view permissions only, the serializer information is the
+        same for all methods.
+
+        """
+        actions = {}
+        for method in get_allowed_methods(request, view):
+            if not actions:
+                serializer_info = self.get_serializer_info(
+                    view.get_serializer())
+            actions[method] = serializer_info
+        return actions
+
+
+class CachedMetadataViewMixin(object):
+    """ Mixin for generic views caching their OPTIONS response. """
+
+    def get_metadata_key(self, request):
+        """
+        Get what the metadata document of a request depends on.
+
+        Parameters:
+            request: rest_framework.request.Request
+
+        Returns:
+            tuple
+
+        """
+        return (type(self), getattr(self, "suffix", None),
+                self.metadata_class, self.get_serializer_class(),
+                get_allowed_methods(request, self),
+                request.accepted_media_type)
+
+    # Override
+    def options(self, request, *args, **kwargs):
+        """
+        Override!
+
+        Using the document rendered for the same key, see module docstring.
+
+        """
+        renderer = request.accepted_renderer
+        if self.metadata_class is None or renderer.format == "api":
+            return super().options(request, *args, **kwargs)
+
+        key = self.get_metadata_key(request)
+        if key not in CACHE:
+            data = self.metadata_class().determine_metadata(request, self)
+            content = renderer.render(data, request.accepted_media_type,
+                                      self.get_renderer_context())
+            content_type = request.accepted_media_type
+            if renderer.charset:
+                content_type = "{0}; charset={1}".format(
+                    content_type, renderer.charset)
+            CACHE[key] = (content, content_type,
+                          quote_etag(hashlib.sha1(content).hexdigest()))
+        return get_etag_response(request, *CACHE[key])
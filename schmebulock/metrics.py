@@ -0,0 +1,278 @@
+"""
+Request metrics in Prometheus text format.
+
+Every process keeps its own registry (requests, latency, queries and SQL
+time per route and action) and dumps it every METRICS_FLUSH_SECONDS to a file
+named after its pid in METRICS_DIR. The metrics endpoint adds up the files of
+all the workers, so any of them can serve it. METRICS_DIR should be emptied
+on deploys (stale files keep adding to counters otherwise), with no
+METRICS_DIR only the serving process is reported.
+
+"""
+import atexit
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+PREFIX = "schmebulock_"
+# Name: (type, help, buckets)
+METRICS = OrderedDict([
+    ("requests_total", (
+        "counter", "Requests by route, action, method and status class.",
+        None)),
+    ("request_duration_seconds", (
+        "histogram", "Request latency.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))),
+    ("request_queries", (
+        "histogram", "SQL queries per request.",
+        (0, 1, 2, 5, 10, 20, 50, 100, 200))),
+    ("request_db_seconds", (
+        "histogram", "SQL time per request.",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))),
+])
+
+
+class Registry(object):
+    """ Counters and histograms of the current process. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.last_flush = time.monotonic()
+
+    def inc(self, name, labels, value=1):
+        """
+        Increase a counter.
+
+        Parameters:
+            name: str
+            labels: tuple
+                Label name and value pairs.
+            value: float
+
+        """
+        with self.lock:
+            key = (name, labels)
+            self.values[key] = self.values.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """
+        Add a value to a histogram.
+
+        Parameters:
+            name: str
+            labels: tuple
+                Label name and value pairs.
+            value: float
+
+        """
+        buckets = METRICS[name][2]
+        with self.lock:
+            key = (name, labels)
+            # Count per bucket (not cumulative), +Inf, then sum.
+            data = self.values.setdefault(key, [0] * (len(buckets) + 2))
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    break
+            else:
+                index = len(buckets)
+            data[index] += 1
+            data[-1] += value
+
+    def to_list(self):
+        """
+        Get values in a JSON serializable form.
+
+        Returns:
+            list, name, labels and value (list for histograms).
+
+        """
+        with self.lock:
+            return [[name, [list(label) for label in labels], value]
+                    for (name, labels), value in self.values.items()]
+
+    def flush(self, directory):
+        """
+        Write values to the file of this process, atomically.
+
+        Parameters:
+            directory: str
+
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "metrics-{0}.json".format(os.getpid()))
+        handle, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "w") as tmp_file:
+            json.dump(self.to_list(), tmp_file)
+        os.replace(tmp_path, path)
+        self.last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        """ Flush if METRICS_DIR is set and it's been a while. """
+        if (settings.METRICS_DIR and time.monotonic() - self.last_flush >=
+                settings.METRICS_FLUSH_SECONDS):
+            self.flush(settings.METRICS_DIR)
+
+
+REGISTRY = Registry()
+
+
+@atexit.register
+def flush_at_exit():
+    """ Don't lose the last values of a worker. """
+    if settings.configured and getattr(settings, "METRICS_DIR", None):
+        REGISTRY.flush(settings.METRICS_DIR)
+
+
+def merge(lists):
+    """
+    Add up values of several registries.
+
+    Parameters:
+        lists: iterable
+            Results of Registry.to_list().
+
+    Returns:
+        dict, (name, labels) and total value.
+
+    """
+    totals = {}
+    for values in lists:
+        for name, labels, value in values:
+            key = (name, tuple(tuple(label) for label in labels))
+            if isinstance(value, list):
+                total = totals.setdefault(key, [0] * len(value))
+                totals[key] = [old + new for old, new in zip(total, value)]
+            else:
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def collect():
+    """
+    Get values of all the worker processes.
+
+    Returns:
+        dict, see merge().
+
+    """
+    if not settings.METRICS_DIR:
+        return merge([REGISTRY.to_list()])
+
+    REGISTRY.flush(settings.METRICS_DIR)
+    lists = []
+    pattern = os.path.join(settings.METRICS_DIR, "metrics-*.json")
+    for path in glob.glob(pattern):
+        try:
+            with open(path) as metrics_file:
+                lists.append(json.load(metrics_file))
+        except (OSError, ValueError):
+            continue  # Removed or being replaced.
+    return merge(lists)
+
+
+def format_labels(labels):
+    """
+    Format labels for the text format.
+
+    Parameters:
+        labels: tuple
+            Label name and value pairs.
+
+    Returns:
+        str
+
+    """
+    return ",".join(
+        '{0}="{1}"'.format(name, str(value).replace("\\", "\\\\").replace(
+            '"', '\\"').replace("\n", "\\n"))
+        for name, value in labels)
+
+
+def format_number(value):
+    """ Format a value for the text format. """
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def expose(totals):
+    """
+    Get Prometheus text exposition of values.
+
+    Parameters:
+        totals: dict
+            See merge().
+
+    Returns:
+        str
+
+    """
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        full_name = PREFIX + name
+        lines.append("# HELP {0} {1}".format(full_name, description))
+        lines.append("# TYPE {0} {1}".format(full_name, kind))
+        for (key_name, labels), value in sorted(totals.items()):
+            if key_name != name:
+                continue
+            if kind == "counter":
+                lines.append("{0}{{{1}}} {2}".format(
+                    full_name, format_labels(labels), format_number(value)))
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], value[:-1]):
+                cumulative += count
+                lines.append("{0}_bucket{{{1}}} {2}".format(
+                    full_name,
+                    format_labels(labels + (("le", bound),)), cumulative))
+            lines.append("{0}_sum{{{1}}} {2}".format(
+                full_name, format_labels(labels), format_number(value[-1])))
+            lines.append("{0}_count{{{1}}} {2}".format(
+                full_name, format_labels(labels), cumulative))
+    return "\n".join(lines) + "\n"
+
+
+class QueryCounter(object):
+    """ Execute wrapper counting queries and their time. """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def record(request, response, seconds, queries):
+    """
+    Add a request to the registry.
+
+    Parameters:
+        request: django.http.HttpRequest
+        response: django.http.HttpResponse
+        seconds: float
+        queries: QueryCounter
+
+    """
+    match = getattr(request, "resolver_match", None)
+    view = getattr(response, "renderer_context", {}).get("view")
+    route = (("route", match.url_name or match.view_name if match
+              else "unmatched"),
+             ("action", getattr(view, "action", None) or ""))
+    REGISTRY.inc("requests_total", route + (
+        ("method", request.method),
+        ("status", "{0}xx".format(response.status_code // 100))))
+    REGISTRY.observe("request_duration_seconds", route, seconds)
+    REGISTRY.observe("request_queries", route, queries.count)
+    REGISTRY.observe("request_db_seconds", route, queries.seconds)
+    REGISTRY.maybe_flush()
@@ -0,0 +1,173 @@
+""" Custom middleware for the project. """
+import time
+
+from django.conf import settings
+
+from items.urls import ROUTER
+
+from . import audit, metrics, profiling, querybudget, timing
+from .db import execute_wrapper, routers
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+class AuditUserMiddleware(object):
+    """
+    Stamp audit fields (created_by, modified_by, ...) on writing requests.
+
+    Replacement for audit_log.middleware.UserLoggingMiddleware, see
+    schmebulock.audit for details. Read only requests are not touched.
+
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS:
+            return self.get_response(request)
+
+        audit.set_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            audit.clear_request()
+
+
+class ReplicaRoutingMiddleware(object):
+    """
+    Let reads of safe requests to the items endpoints go to replicas.
+
+    Clients that write successfully are pinned to the primary database for a
+    while, see schmebulock.db.routers.
+
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.viewsets = {viewset for _, viewset, _ in ROUTER.registry}
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.set_use_replicas(False)
+
+        if (settings.REPLICA_DATABASES and
+                request.method not in SAFE_METHODS and
+                response.status_code < 400):
+            routers.pin_client(request)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """ Allow replicas for safe requests to routed views. """
+        if (settings.REPLICA_DATABASES and
+                request.method in SAFE_METHODS and
+                getattr(view_func, "cls", None) in self.viewsets and
+                not routers.is_client_pinned(request)):
+            routers.set_use_replicas(True)
+
+
+class QueryBudgetMiddleware(object):
+    """
+    Count queries per request and check them against view budgets.
+
+    Meant for development and tests, does nothing unless QUERY_BUDGET_MODE
+    is set, see schmebulock.querybudget.
+
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.QUERY_BUDGET_MODE
+        if not mode:
+            return self.get_response(request)
+
+        tracker = querybudget.QueryTracker()
+        request.query_tracker = tracker
+        with tracker.track():
+            response = self.get_response(request)
+
+        response[querybudget.QUERY_COUNT_HEADER] = str(len(tracker.counted))
+        view = getattr(response, "renderer_context", {}).get("view")
+        if view is not None:
+            querybudget.check_budget(request, view, tracker, mode)
+        return response
+
+
+class ServerTimingMiddleware(object):
+    """
+    Add a Server-Timing header to a sample of requests.
+
+    Should go first, so the time of other middleware is included, see
+    schmebulock.timing.
+
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not timing.is_sampled(settings.SERVER_TIMING_SAMPLE_RATE):
+            return self.get_response(request)
+
+        timer = timing.RequestTimer()
+        request.server_timer = timer
+        with timer.track():
+            response = self.get_response(request)
+
+        timer.finish()
+        response["Server-Timing"] = timer.get_header()
+        timer.log(request, response)
+        return response
+
+    def process_template_response(self, request, response):
+        """ Time rendering of responses rendered after the view. """
+        timer = getattr(request, "server_timer", None)
+        if timer is not None:
+            timer.start_phase("render")
+            response.add_post_render_callback(
+                lambda response: timer.stop_phase("render"))
+        return response
+
+
+class MetricsMiddleware(object):
+    """
+    Record requests, their latency and queries, see schmebulock.metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = metrics.QueryCounter()
+        start = time.perf_counter()
+        with execute_wrapper(queries):
+            response = self.get_response(request)
+        metrics.record(request, response, time.perf_counter() - start,
+                       queries)
+        return response
+
+
+class ProfilerMiddleware(object):
+    """
+    Profile requests of staff users asking for it, see schmebulock.profiling.
+
+    Should go first, so all other middleware is profiled.
+
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.is_requested(request):
+            return self.get_response(request)
+
+        user = profiling.get_staff_user(request)
+        if user is None:
+            return self.get_response(request)
+        return profiling.profile(self.get_response, request, user)
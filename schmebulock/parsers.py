@@ -0,0 +1,17 @@
+""" Custom parsers for the project. """
+import msgpack
+from rest_framework import exceptions, parsers
+
+
+class MessagePackParser(parsers.BaseParser):
+    """ Parse MessagePack request content. """
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except Exception as parse_error:  # pylint: disable=broad-except
+            # msgpack raises several types for invalid data (ValueError,
+            # TypeError for unhashable keys, OutOfData, ...).
+            raise exceptions.ParseError(
+                "MessagePack parse error - {0}".format(parse_error))
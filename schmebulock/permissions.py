@@ -0,0 +1,25 @@
+""" Custom permissions for the project. """
+import hmac
+
+from django.conf import settings
+from rest_framework import permissions
+
+METRICS_TOKEN_HEADER = "HTTP_X_METRICS_TOKEN"
+
+
+class IsMetricsReader(permissions.BasePermission):
+    """
+    Allow staff users and requests with METRICS_TOKEN in an X-Metrics-Token
+    header (scrapers).
+
+    Addresses are not trusted, behind a local reverse proxy every request
+    comes from it.
+
+    """
+
+    def has_permission(self, request, view):
+        token = request.META.get(METRICS_TOKEN_HEADER, "")
+        if settings.METRICS_TOKEN and hmac.compare_digest(
+                token.encode(), settings.METRICS_TOKEN.encode()):
+            return True
+        return bool(request.user and request.user.is_staff)
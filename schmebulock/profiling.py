@@ -0,0 +1,244 @@
+"""
+On-demand sampling profiler for single requests.
+
+Staff users can profile a request by sending an X-Profile header or a
+profile query parameter. The whole request (middleware included) runs while
+a thread samples its stack every PROFILE_INTERVAL seconds, the samples are
+saved in folded format (one "frame;frame;frame count" line per stack, the
+input of flamegraph.pl, speedscope, ...) to PROFILE_DIR, keeping the last
+PROFILE_KEEP profiles. The id of the profile is returned in an X-Profile-Id
+header, profiles are listed and downloaded from /api/profiles/.
+
+Only credentials sent in headers (JWT, basic) are checked, sessions are not
+available yet when profiling starts. Requests without the flag only pay for
+two dict lookups (the query string is parsed once per request anyway).
+
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "profile"
+
+
+class SamplingProfiler(object):
+    """ Collect stacks of a thread from a background thread. """
+
+    def __init__(self, interval, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """ Start sampling. """
+        self.thread.start()
+
+    def stop(self):
+        """ Stop sampling and wait for the sampling thread. """
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        """ Take samples until stopped. """
+        while not self.stopped.wait(self.interval):
+            # pylint: disable=protected-access
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self.fold(frame)] += 1
+
+    @staticmethod
+    def fold(frame):
+        """
+        Get stack of a frame in folded format, outermost first.
+
+        Parameters:
+            frame: frame
+
+        Returns:
+            str
+
+        """
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append("{0} ({1}:{2})".format(
+                code.co_name, os.path.relpath(code.co_filename),
+                code.co_firstlineno).replace(";", ":"))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def get_folded(self):
+        """
+        Get samples in folded format.
+
+        Returns:
+            str
+
+        """
+        return "".join("{0} {1}\n".format(stack, count)
+                       for stack, count in sorted(self.stacks.items()))
+
+
+def is_requested(request):
+    """
+    Check if a request asks to be profiled.
+
+    Parameters:
+        request: django.http.HttpRequest
+
+    Returns:
+        bool
+
+    """
+    return PROFILE_HEADER in request.META or PROFILE_PARAM in request.GET
+
+
+def get_staff_user(request):
+    """
+    Get staff user authenticated by request headers.
+
+    Parameters:
+        request: django.http.HttpRequest
+
+    Returns:
+        User or None
+
+    """
+    drf_request = Request(request)
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if issubclass(authentication_class, SessionAuthentication):
+            continue
+        try:
+            result = authentication_class().authenticate(drf_request)
+        except exceptions.APIException:
+            return None
+        if result is not None:
+            user = result[0]
+            return user if user.is_active and user.is_staff else None
+    return None
+
+
+def get_path(profile_id):
+    """
+    Get file path of a profile.
+
+    Parameters:
+        profile_id: str
+
+    Returns:
+        str
+
+    """
+    return os.path.join(settings.PROFILE_DIR, "{0}.json".format(profile_id))
+
+
+def save(profiler, request, user, duration):
+    """
+    Save profile of a request, removing the oldest ones.
+
+    Parameters:
+        profiler: SamplingProfiler
+        request: django.http.HttpRequest
+        user: User
+        duration: float
+            Seconds.
+
+    Returns:
+        str, id of the profile.
+
+    """
+    profile_id = uuid.uuid4().hex
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    with open(get_path(profile_id), "w") as profile_file:
+        json.dump({"id": profile_id,
+                   "created": timezone.now().isoformat(),
+                   "method": request.method,
+                   "path": request.get_full_path(),
+                   "user": user.get_username(),
+                   "duration_ms": round(duration * 1000, 3),
+                   "samples": sum(profiler.stacks.values()),
+                   "folded": profiler.get_folded()}, profile_file)
+
+    for old_profile in get_profiles()[settings.PROFILE_KEEP:]:
+        try:
+            os.remove(get_path(old_profile["id"]))
+        except OSError:
+            pass  # Already removed by another worker.
+    return profile_id
+
+
+def load(profile_id):
+    """
+    Load a saved profile.
+
+    Parameters:
+        profile_id: str
+
+    Returns:
+        dict or None, None if not found.
+
+    """
+    try:
+        with open(get_path(profile_id)) as profile_file:
+            return json.load(profile_file)
+    except (OSError, ValueError):
+        return None
+
+
+def get_profiles():
+    """
+    Get saved profiles without samples, newest first.
+
+    Returns:
+        list(dict)
+
+    """
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(settings.PROFILE_DIR):
+        saved = load(os.path.splitext(name)[0])
+        if saved is not None:
+            saved.pop("folded")
+            profiles.append(saved)
+    return sorted(profiles, key=lambda saved: saved["created"], reverse=True)
+
+
+def profile(get_response, request, user):
+    """
+    Get response of a request while profiling it.
+
+    Parameters:
+        get_response: callable
+        request: django.http.HttpRequest
+        user: User
+            Who asked for the profile.
+
+    Returns:
+        django.http.HttpResponse, with the profile id in a header.
+
+    """
+    profiler = SamplingProfiler(settings.PROFILE_INTERVAL)
+    start = time.perf_counter()
+    profiler.start()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.stop()
+    response["X-Profile-Id"] = save(
+        profiler, request, user, time.perf_counter() - start)
+    return response
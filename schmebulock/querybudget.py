@@ -0,0 +1,190 @@
+"""
+Query count budgets for API views, to catch N+1 queries early.
+
+Viewsets declare how many queries each action may run (authentication
+excluded), optionally per serializer class:
+
+    query_budgets = {"list": 2, "retrieve": 1, "list:ItemNestedSerializer": 2}
+
+With QUERY_BUDGET_MODE set ("log" or "raise"), QueryBudgetMiddleware counts
+the queries of every request, adds them in an X-Query-Count header and logs
+(or raises QueryBudgetExceeded) when a budget is exceeded, with the stack
+trace of the most repeated query (usually the offending attribute access).
+
+"""
+import logging
+import os
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.utils import override_settings
+
+from .db import execute_wrapper
+
+LOGGER = logging.getLogger(__name__)
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+
+class QueryBudgetExceeded(AssertionError):
+    """ Raised when a view runs more queries than its budget. """
+
+
+class QueryTracker(object):
+    """ Execute wrapper recording queries and where they were run from. """
+
+    def __init__(self):
+        self.queries = []
+        self.start = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, traceback.extract_stack()[:-1]))
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def track(self):
+        """ Record queries of all databases inside the block. """
+        with execute_wrapper(self):
+            yield self
+
+    def mark(self):
+        """ Only count queries from now on (after authentication). """
+        self.start = len(self.queries)
+
+    @property
+    def counted(self):
+        """ Queries run since mark(). """
+        return self.queries[self.start:]
+
+    def get_most_repeated(self):
+        """
+        Get query run the most times.
+
+        Returns:
+            tuple, sql, times it ran and stack of its last run (None if no
+            queries).
+
+        """
+        if not self.counted:
+            return None, 0, None
+        sql, times = Counter(sql for sql, _ in self.counted).most_common(1)[0]
+        stack = [query_stack for query_sql, query_stack in self.counted
+                 if query_sql == sql][-1]
+        return sql, times, stack
+
+
+def format_stack(stack):
+    """
+    Format stack, keeping only project frames when there are any.
+
+    Parameters:
+        stack: list
+            Frames from traceback.extract_stack(), tuples (filename, line
+            number, name, line) on Python 3.4.
+
+    Returns:
+        str
+
+    """
+    project_frames = [
+        frame for frame in stack
+        if frame[0].startswith(settings.BASE_DIR) and
+        "site-packages" not in frame[0] and
+        frame[0] != os.path.abspath(__file__)]
+    return "".join(traceback.format_list(project_frames or stack[-10:]))
+
+
+def get_budget(view):
+    """
+    Get query budget for the current action and serializer of a view.
+
+    Parameters:
+        view: rest_framework.views.APIView
+
+    Returns:
+        int or None, None if no budget was declared.
+
+    """
+    budgets = getattr(view, "query_budgets", None) or {}
+    action = getattr(view, "action", None)
+    get_serializer_class = getattr(view, "get_serializer_class", None)
+    if get_serializer_class is not None:
+        key = "{0}:{1}".format(action, get_serializer_class().__name__)
+        if key in budgets:
+            return budgets[key]
+    return budgets.get(action)
+
+
+def check_budget(request, view, tracker, mode):
+    """
+    Log or raise if the queries of a request exceed the view's budget.
+
+    Parameters:
+        request: django.http.HttpRequest
+        view: rest_framework.views.APIView
+        tracker: QueryTracker
+        mode: str
+            "log" or "raise".
+
+    """
+    budget = get_budget(view)
+    count = len(tracker.counted)
+    if budget is None or count <= budget:
+        return
+
+    sql, times, stack = tracker.get_most_repeated()
+    message = (
+        "{0} {1} ran {2} queries, budget for {3}.{4} is {5}. "
+        "Most repeated query ({6} times): {7}\n{8}".format(
+            request.method, request.path, count, view.__class__.__name__,
+            getattr(view, "action", None), budget, times, sql,
+            format_stack(stack)))
+    if mode == "raise":
+        raise QueryBudgetExceeded(message)
+    LOGGER.warning(message)
+
+
+class QueryBudgetViewMixin(object):
+    """ Viewset mixin to exclude authentication from query budgets. """
+    query_budgets = {}
+
+    # Override
+    def initial(self, request, *args, **kwargs):
+        """ Overriding to start counting once the user is authenticated. """
+        super().initial(request, *args, **kwargs)
+        tracker = getattr(request, "query_tracker", None)
+        if tracker is not None:
+            tracker.mark()
+
+
+class QueryBudgetTestMixin(object):
+    """ TestCase mixin to check query budgets of endpoints. """
+
+    def assertQueryBudget(self, client, path, add_objects, data=None):
+        """
+        Assert a GET request stays within budget and its number of queries
+        doesn't grow with the number of objects.
+
+        Parameters:
+            client: rest_framework.test.APIClient
+                Authenticated client.
+            path: str
+            add_objects: callable
+                Called before each request, should add some objects listed
+                (or nested) in the response.
+            data: dict
+                GET parameters.
+
+        """
+        counts = []
+        with override_settings(QUERY_BUDGET_MODE="raise"):
+            for _ in range(2):
+                add_objects()
+                response = client.get(path, data)
+                self.assertEqual(response.status_code, 200)
+                counts.append(int(response[QUERY_COUNT_HEADER]))
+        self.assertEqual(
+            counts[0], counts[1],
+            "Queries for {0} grow with number of objects: {1}".format(
+                path, counts))
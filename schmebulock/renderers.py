@@ -0,0 +1,290 @@
+"""
+Custom renderers for the project.
+
+FastJSONRenderer and MessagePackRenderer encode types the serializers may
+leave behind (Decimal, Money, dates, measurements, ...) with a plain
+function instead of a json.JSONEncoder subclass, so the C encoders only
+call back into Python for those values. Keys that are not strings (error
+indexes, ...) are converted as the json module does, see dumps().
+
+ColumnarJSONRenderer (?format=columnar) is an opt-in compact format for
+lists, see get_columnar().
+
+"""
+import datetime
+import decimal
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import msgpack
+import rapidjson
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_text
+from django.utils.functional import Promise
+from measurement.base import MeasureBase
+from moneyed import Money
+from rest_framework import renderers
+
+
+def default(obj):
+    """
+    Get JSON (and MessagePack) compatible version of an object, as DRF's
+    JSONEncoder does.
+
+    Parameters:
+        obj: object
+
+    Returns:
+        object
+
+    """
+    if isinstance(obj, Promise):
+        return force_text(obj)
+    elif isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        if representation.endswith("+00:00"):
+            representation = representation[:-6] + "Z"
+        return representation
+    elif isinstance(obj, datetime.date):
+        return obj.isoformat()
+    elif isinstance(obj, datetime.time):
+        representation = obj.isoformat()
+        if obj.microsecond:
+            representation = representation[:12]
+        return representation
+    elif isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    elif isinstance(obj, decimal.Decimal):
+        return float(obj)
+    elif isinstance(obj, uuid.UUID):
+        return str(obj)
+    elif isinstance(obj, Money):
+        return {"amount": float(obj.amount), "currency": str(obj.currency)}
+    elif isinstance(obj, MeasureBase):
+        return {"value": float(obj.value), "unit": obj.unit}
+    elif isinstance(obj, QuerySet):
+        return tuple(obj)
+    elif isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    elif hasattr(obj, "tolist"):
+        return obj.tolist()
+    elif hasattr(obj, "__iter__"):
+        return tuple(item for item in obj)
+    raise TypeError("{0!r} is not serializable".format(obj))
+
+
+def get_key(key):
+    """
+    Get object key as a string, as the json module does.
+
+    Parameters:
+        key: str, int, float, bool or None
+
+    Returns:
+        str
+
+    Raises:
+        TypeError
+
+    """
+    if isinstance(key, str):
+        return key
+    elif key is True:
+        return "true"
+    elif key is False:
+        return "false"
+    elif key is None:
+        return "null"
+    elif isinstance(key, int):
+        return int.__repr__(key)
+    elif isinstance(key, float):
+        return float.__repr__(key)
+    raise TypeError("{0!r} is not a valid key".format(key))
+
+
+def stringify_keys(data):
+    """
+    Get copy of data with keys of every object as strings.
+
+    Parameters:
+        data: object
+
+    Returns:
+        object
+
+    """
+    if isinstance(data, dict):
+        return OrderedDict((get_key(key), stringify_keys(value))
+                           for key, value in data.items())
+    elif isinstance(data, (list, tuple)):
+        return [stringify_keys(value) for value in data]
+    return data
+
+
+def dumps(data, **kwargs):
+    """
+    Encode data as JSON with rapidjson.
+
+    rapidjson only accepts string keys, data with other keys (rare) is
+    encoded again after converting them.
+
+    Parameters:
+        data: object
+        kwargs: dict
+            Options of rapidjson.dumps().
+
+    Returns:
+        str
+
+    Raises:
+        TypeError
+
+    """
+    try:
+        return rapidjson.dumps(data, default=default, **kwargs)
+    except TypeError:
+        return rapidjson.dumps(stringify_keys(data), default=default,
+                               **kwargs)
+
+
+def is_rows(data):
+    """
+    Check if data is a list of objects (errors may be lists of messages).
+
+    Parameters:
+        data: object
+
+    Returns:
+        bool
+
+    """
+    return isinstance(data, list) and all(
+        isinstance(row, Mapping) for row in data)
+
+
+def get_columnar(rows):
+    """
+    Get list of objects as columns, rows and lookups of nested objects.
+
+    Keys are listed once in "columns" and every object becomes a row of
+    values in the same order. Nested objects (dicts with an "id") are
+    replaced by their id and stored once in "lookups", by path of the field
+    ("item", "item.brand", ...) and id (as a string), their own nested
+    objects replaced the same way.
+
+    Parameters:
+        rows: list(dict)
+
+    Returns:
+        OrderedDict, with columns, rows and lookups.
+
+    """
+    lookups = OrderedDict()
+
+    def get_value(path, value):
+        """ Get value of a field, adding nested objects to the lookups. """
+        if not isinstance(value, dict) or "id" not in value:
+            return value
+        table = lookups.setdefault(path, OrderedDict())
+        key = str(value["id"])
+        if key not in table:
+            table[key] = OrderedDict(
+                (name, get_value("{0}.{1}".format(path, name), nested))
+                for name, nested in value.items())
+        return value["id"]
+
+    columns = []
+    for row in rows:
+        columns.extend(name for name in row if name not in columns)
+    return OrderedDict([
+        ("columns", columns),
+        ("rows", [[get_value(name, row.get(name)) for name in columns]
+                  for row in rows]),
+        ("lookups", lookups)])
+
+
+class PlainTextRenderer(renderers.BaseRenderer):
+    """ Render text as it is (metrics, ...). """
+    media_type = "text/plain"
+    format = "txt"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = data.get("detail", data)  # Errors.
+        return str(data).encode(self.charset)
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    """
+    Accept Server-Sent Events streams (returned by the views as streaming
+    responses) and render errors as an "error" event.
+    """
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return "event: error\ndata: {0}\n\n".format(
+            dumps(data)).encode(self.charset)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """ JSONRenderer using rapidjson. """
+
+    # Override
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Override!
+
+        Same output as JSONRenderer (indent included), encoded by rapidjson.
+
+        """
+        if data is None:
+            return bytes()
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        ret = dumps(data, ensure_ascii=self.ensure_ascii, indent=indent)
+
+        # Same escaping as JSONRenderer, see its render().
+        ret = ret.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+        return ret.encode()
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """ Render data as MessagePack. """
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        return msgpack.packb(data, default=default, use_bin_type=True)
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """ Render lists in columnar format, anything else as JSON. """
+    media_type = "application/vnd.schmebulock.columnar+json"
+    format = "columnar"
+
+    # Override
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Override!
+
+        Replacing list of objects (paginated or not) by its columnar version,
+        other lists (error messages, ...) are rendered as JSON.
+
+        """
+        if is_rows(data):
+            data = get_columnar(data)
+        elif isinstance(data, dict) and is_rows(data.get("results")):
+            data = OrderedDict(
+                [(key, value) for key, value in data.items()
+                 if key != "results"] +
+                list(get_columnar(data["results"]).items()))
+        return super().render(data, accepted_media_type, renderer_context)
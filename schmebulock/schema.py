@@ -0,0 +1,62 @@
+"""
+Cached schema of the API.
+
+Introspecting every viewset and serializer is slow and the schema only
+changes with the code, so it is generated once per process (on first use)
+with all the endpoints. It lists every endpoint whoever asks for it, so the
+view only serves it to authenticated users. Each format is rendered once and
+served with an ETag. The generate_schema command writes it to a file (e.g.
+on deploy, for client code generation without credentials).
+
+"""
+import hashlib
+import threading
+
+from django.utils.http import quote_etag
+from rest_framework.renderers import CoreJSONRenderer
+from rest_framework.response import Response
+from rest_framework.schemas import SchemaGenerator
+from rest_framework_swagger.renderers import OpenAPIRenderer
+
+TITLE = "Schmebulock API"
+RENDERER_CLASSES = {"openapi": OpenAPIRenderer, "corejson": CoreJSONRenderer}
+
+# Schema (key None) and renderer classes with their content and ETag.
+CACHE = {}
+LOCK = threading.RLock()
+
+
+def get_schema():
+    """
+    Get schema of all the endpoints, generated once per process.
+
+    Returns:
+        coreapi.Document
+
+    """
+    with LOCK:
+        if None not in CACHE:
+            CACHE[None] = SchemaGenerator(title=TITLE).get_schema(public=True)
+        return CACHE[None]
+
+
+def render(renderer_class):
+    """
+    Get schema rendered by a renderer, once per process.
+
+    Parameters:
+        renderer_class: type
+            Of rest_framework.renderers.BaseRenderer.
+
+    Returns:
+        tuple, content and (quoted) ETag.
+
+    """
+    with LOCK:
+        if renderer_class not in CACHE:
+            renderer = renderer_class()
+            content = renderer.render(get_schema(), renderer.media_type,
+                                      {"response": Response()})
+            CACHE[renderer_class] = (
+                content, quote_etag(hashlib.sha1(content).hexdigest()))
+        return CACHE[renderer_class]
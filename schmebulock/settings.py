@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/1.11/ref/settings/
 """
 
 import os
+import tempfile
 
 from datetime import timedelta
 
@@ -47,6 +48,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, to include the others.
+    'schmebulock.middleware.ProfilerMiddleware',
+    'schmebulock.middleware.ServerTimingMiddleware',
+    'schmebulock.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,7 +63,11 @@ MIDDLEWARE = [
     # that holds version of django-audit-log with support for MIDDLEWARE,
     # instead of MIDDLEWARE_CLASSES
     'audit_log.middleware.JWTAuthMiddleware',
-    'audit_log.middleware.UserLoggingMiddleware',
+    # Replaces audit_log.middleware.UserLoggingMiddleware, also stamps
+    # bulk_create and QuerySet.update (see schmebulock.audit)
+    'schmebulock.middleware.AuditUserMiddleware',
+    'schmebulock.middleware.ReplicaRoutingMiddleware',
+    'schmebulock.middleware.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'schmebulock.urls'
@@ -85,17 +94,37 @@ WSGI_APPLICATION = 'schmebulock.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/1.11/ref/settings/#databases
 
+# PostGIS backend with a per process connection pool, see
+# schmebulock/db/backends/postgis/base.py for POOL options.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.contrib.gis.db.backends.postgis',
+        'ENGINE': 'schmebulock.db.backends.postgis',
         'NAME': 'schmebulock',
         'USER': 'schmebulock',
         'PASSWORD': 'schmebulock',
         'HOST': 'localhost',
         'PORT': '5432',
+        'POOL': {
+            'MAX_CONNECTIONS': 10,
+            'TIMEOUT': 10,
+        },
     }
 }
 
+# Aliases in DATABASES of read replicas, used for reads of safe requests to
+# the items endpoints (see schmebulock/db/routers.py). For example:
+#     DATABASES['replica'] = dict(DATABASES['default'], HOST='replica-host',
+#                                 TEST={'MIRROR': 'default'})
+#     REPLICA_DATABASES = ['replica']
+REPLICA_DATABASES = []
+
+# Seconds reads of a client stay on the primary database after it writes,
+# pins are kept in the default cache which must be shared by all workers
+# (memcached, redis, ...) when using replicas.
+REPLICA_PIN_SECONDS = 5
+
+DATABASE_ROUTERS = ['schmebulock.db.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
@@ -134,9 +163,17 @@ STATIC_URL = '/static/'
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'schmebulock.renderers.FastJSONRenderer',
+        'schmebulock.renderers.MessagePackRenderer',
+        'schmebulock.renderers.ColumnarJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
         ),
+    'DEFAULT_PARSER_CLASSES': (
+        'rest_framework.parsers.JSONParser',
+        'schmebulock.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
         ),
@@ -144,11 +181,17 @@ REST_FRAMEWORK = {
         'rest_framework_jwt.authentication.JSONWebTokenAuthentication',
         # Only JSONWebToken authtentication when in production?
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
+        'schmebulock.authentication.CachedBasicAuthentication',
         ),
+    'DEFAULT_METADATA_CLASS': 'schmebulock.metadata.CachedMetadata',
     'DEFAULT_PAGINATION_CLASS':
     'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 100
+    'PAGE_SIZE': 100,
+    'TEST_REQUEST_RENDERER_CLASSES': (
+        'rest_framework.renderers.MultiPartRenderer',
+        'rest_framework.renderers.JSONRenderer',
+        'schmebulock.renderers.MessagePackRenderer',
+        ),
     }
 
 JWT_AUTH = {
@@ -184,3 +227,95 @@ JWT_AUTH = {
 }
 
 CITIES_DATA_DIR = 'cities/data'
+
+# Seconds a verified BasicAuthentication username/password pair is cached
+# (only a salted digest is stored), 0 or None to always check the password.
+BASIC_AUTH_CACHE_TIMEOUT = 60
+
+# Query count budgets of API views (see schmebulock.querybudget): "log" or
+# "raise" when a view runs more queries than declared, None to disable.
+QUERY_BUDGET_MODE = 'log' if DEBUG else None
+
+# Fraction (0 to 1) of requests getting a Server-Timing header and a log of
+# where their time went (see schmebulock.timing), 0 to disable. Logs are JSON
+# lines written to SERVER_TIMING_LOG.
+SERVER_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0
+SERVER_TIMING_LOG = os.path.join(BASE_DIR, 'server_timing.log')
+
+# Request metrics (see schmebulock.metrics), every worker dumps its own to
+# METRICS_DIR at most every METRICS_FLUSH_SECONDS and /api/metrics/ adds them
+# up. Empty METRICS_DIR on deploys, None to only report the serving worker.
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'schmebulock-metrics')
+METRICS_FLUSH_SECONDS = 5
+# Token scrapers send in an X-Metrics-Token header to read metrics without
+# a user (keep it secret, set it per deploy), None to only allow staff users.
+METRICS_TOKEN = None
+
+# Profiles of requests of staff users sending an X-Profile header (see
+# schmebulock.profiling), sampled every PROFILE_INTERVAL seconds, the last
+# PROFILE_KEEP are kept in PROFILE_DIR.
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'schmebulock-profiles')
+PROFILE_INTERVAL = 0.005
+PROFILE_KEEP = 50
+
+# Changes feed (see items.changes) leaves out what changed in the last
+# CHANGES_LAG_SECONDS, longer than write transactions take to commit.
+CHANGES_LAG_SECONDS = 5
+
+# Server-Sent Events of changes (see items.events), streams end after
+# EVENTS_STREAM_SECONDS, send a keepalive comment every
+# EVENTS_HEARTBEAT_SECONDS and end when EVENTS_QUEUE_SIZE events are pending.
+EVENTS_STREAM_SECONDS = 300
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_QUEUE_SIZE = 1000
+
+# Batch requests (see items.batch) run at most BATCH_MAX_REQUESTS calls,
+# reads in parallel on up to BATCH_MAX_WORKERS threads, each using a database
+# connection from the pool (1 to disable).
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+# Upserts by natural key (see items.upsert) take at most UPSERT_MAX_OBJECTS
+# objects, inserted UPSERT_BATCH_SIZE per statement.
+UPSERT_MAX_OBJECTS = 10000
+UPSERT_BATCH_SIZE = 1000
+
+# Queries slower than SLOW_QUERY_SECONDS (None to disable) are logged to
+# SLOW_QUERY_LOG, with their EXPLAIN (ANALYZE, BUFFERS) plan for a fraction
+# of SELECTs (see schmebulock.db.slowlog). ANALYZE runs those SELECTs twice,
+# SELECTs calling functions with side effects (nextval, setval, pg_notify,
+# ...) only get a plain EXPLAIN.
+SLOW_QUERY_SECONDS = 0.5
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+        },
+        'server_timing': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SERVER_TIMING_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+        },
+    },
+    'loggers': {
+        'schmebulock.slowqueries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'schmebulock.timing': {
+            'handlers': ['server_timing'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
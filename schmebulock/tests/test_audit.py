@@ -0,0 +1,136 @@
+""" Tests for audit stamping under main app. """
+from django.test import RequestFactory, TestCase
+
+from model_mommy import mommy
+from rest_framework.test import APIClient
+
+from items.models import Brand
+from schmebulock import audit
+from schmebulock.middleware import AuditUserMiddleware
+
+
+class AuditStampedQuerySetTest(TestCase):
+    """ Tests for AuditStampedQuerySet. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.user = mommy.make("User")
+        request = RequestFactory().post("/")
+        request.user = self.user
+        audit.set_request(request)
+
+    def tearDown(self):
+        """ Clean up for all the tests. """
+        audit.clear_request()
+
+    def test_bulk_create(self):
+        """ Test bulk_create stamps creating and modifying user. """
+        # When
+        Brand.objects.bulk_create([Brand(name="one"), Brand(name="two")])
+
+        # Then
+        self.assertEqual(
+            list(Brand.objects.values_list("created_by", "modified_by")),
+            [(self.user.id, self.user.id)] * 2)
+
+    def test_bulk_create_explicit_user(self):
+        """ Test bulk_create keeps audit fields set explicitly. """
+        # Given
+        other_user = mommy.make("User")
+
+        # When
+        Brand.objects.bulk_create([Brand(name="one", created_by=other_user)])
+
+        # Then
+        brand = Brand.objects.get()
+        self.assertEqual(brand.created_by, other_user)
+        self.assertEqual(brand.modified_by, self.user)
+
+    def test_bulk_create_no_request(self):
+        """ Test bulk_create outside of a request leaves fields empty. """
+        # Given
+        audit.clear_request()
+
+        # When
+        Brand.objects.bulk_create([Brand(name="one")])
+
+        # Then
+        brand = Brand.objects.get()
+        self.assertIsNone(brand.created_by)
+        self.assertIsNone(brand.modified_by)
+
+    def test_update(self):
+        """ Test update stamps modifying user and date. """
+        # Given
+        brand = mommy.make("Brand")
+
+        # When
+        Brand.objects.filter(id=brand.id).update(name="new")
+
+        # Then
+        updated_brand = Brand.objects.get(id=brand.id)
+        self.assertEqual(updated_brand.name, "new")
+        self.assertEqual(updated_brand.modified_by, self.user)
+        self.assertIsNone(updated_brand.created_by)
+        self.assertGreater(updated_brand.modified, brand.modified)
+
+    def test_save(self):
+        """ Test save stamps both users with a single INSERT. """
+        # When
+        with self.assertNumQueries(1):
+            brand = Brand.objects.create(name="one")
+
+        # Then
+        brand.refresh_from_db()
+        self.assertEqual(brand.created_by, self.user)
+        self.assertEqual(brand.modified_by, self.user)
+
+
+class AuditUserMiddlewareTest(TestCase):
+    """ Tests for AuditUserMiddleware. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.stamps = []
+        self.middleware = AuditUserMiddleware(
+            lambda request: self.stamps.append(audit.get_stamp()))
+
+    def test_read_only_request(self):
+        """ Test nothing is resolved for read only requests. """
+        # Given
+        request = RequestFactory().get("/")
+
+        # When
+        self.middleware(request)
+
+        # Then
+        self.assertEqual(self.stamps, [None])
+
+    def test_writing_request(self):
+        """ Test user is resolved for writing requests and then cleared. """
+        # Given
+        user = mommy.make("User")
+        request = RequestFactory().post("/")
+        request.user = user
+
+        # When
+        self.middleware(request)
+
+        # Then
+        self.assertEqual(self.stamps, [(user, None)])
+        self.assertIsNone(audit.get_stamp())
+
+    def test_endpoint(self):
+        """ Test endpoint stamps the user authenticated by the API. """
+        # Given
+        user = mommy.make("User")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        # When
+        response = client.post("/api/brands/", {"name": "Brand"},
+                               format="json")
+
+        # Then
+        self.assertEqual(response.json()["created_by"], user.id)
+        self.assertEqual(response.json()["modified_by"], user.id)
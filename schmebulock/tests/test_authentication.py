@@ -0,0 +1,104 @@
+""" Tests for custom authentication classes under main app. """
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from model_mommy import mommy
+from rest_framework.exceptions import AuthenticationFailed
+
+from schmebulock.authentication import CachedBasicAuthentication
+
+
+@override_settings(BASIC_AUTH_CACHE_TIMEOUT=60)
+class CachedBasicAuthenticationTest(TestCase):
+    """ Tests for CachedBasicAuthentication. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        cache.clear()
+        self.password = "admin123"
+        self.user = mommy.make("User", username="admin")
+        self.user.set_password(self.password)
+        self.user.save()
+        self.authentication = CachedBasicAuthentication()
+
+    def test_cached_credentials(self):
+        """ Test password is only checked on the first call. """
+        # Given
+        with mock.patch("rest_framework.authentication.authenticate",
+                        wraps=authenticate) as mock_authenticate:
+
+            # When
+            first = self.authentication.authenticate_credentials(
+                "admin", self.password)
+            second = self.authentication.authenticate_credentials(
+                "admin", self.password)
+
+        # Then
+        self.assertEqual(first, (self.user, None))
+        self.assertEqual(second, (self.user, None))
+        self.assertEqual(mock_authenticate.call_count, 1)
+
+    def test_no_plaintext_in_cache(self):
+        """ Test the raw password is not part of the cache key or value. """
+        # Given
+        key = self.authentication.get_cache_key("admin", self.password)
+
+        # When
+        self.authentication.authenticate_credentials("admin", self.password)
+
+        # Then
+        self.assertNotIn(self.password, key)
+        self.assertNotIn(self.password, str(cache.get(key)))
+
+    def test_invalid_password(self):
+        """ Test invalid credentials fail and are not cached. """
+        # Given
+        key = self.authentication.get_cache_key("admin", "invalid")
+
+        # When/Then
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials("admin", "invalid")
+        self.assertIsNone(cache.get(key))
+
+    def test_password_change(self):
+        """ Test changing the password invalidates cached credentials. """
+        # Given
+        self.authentication.authenticate_credentials("admin", self.password)
+        self.user.set_password("new-password")
+        self.user.save()
+
+        # When/Then
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(
+                "admin", self.password)
+
+    def test_inactive_user(self):
+        """ Test deactivating the user invalidates cached credentials. """
+        # Given
+        self.authentication.authenticate_credentials("admin", self.password)
+        self.user.is_active = False
+        self.user.save()
+
+        # When/Then
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(
+                "admin", self.password)
+
+    @override_settings(BASIC_AUTH_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """ Test password is always checked when cache is disabled. """
+        # Given
+        with mock.patch("rest_framework.authentication.authenticate",
+                        wraps=authenticate) as mock_authenticate:
+
+            # When
+            self.authentication.authenticate_credentials(
+                "admin", self.password)
+            self.authentication.authenticate_credentials(
+                "admin", self.password)
+
+        # Then
+        self.assertEqual(mock_authenticate.call_count, 2)
@@ -0,0 +1,70 @@
+""" Tests for cached metadata under main app. """
+from unittest import mock
+
+from django.test import TestCase
+
+from model_mommy import mommy
+from rest_framework.test import APIClient
+
+from items.metadata import CustomItemMetadata
+from schmebulock import metadata
+
+
+class CachedMetadataViewMixinTest(TestCase):
+    """ Tests for CachedMetadataViewMixin. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        metadata.CACHE.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=mommy.make("User"))
+
+    def test_cached(self):
+        """ Test document is built once and sent with an ETag. """
+        # Given
+        determine_metadata = CustomItemMetadata.determine_metadata
+
+        # When
+        with mock.patch.object(
+                CustomItemMetadata, "determine_metadata", autospec=True,
+                side_effect=determine_metadata) as mocked:
+            first = self.client.options("/api/items/")
+            second = self.client.options("/api/items/")
+
+        # Then
+        self.assertEqual(mocked.call_count, 1)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertEqual(first["Content-Type"], "application/json")
+        self.assertEqual(
+            first.json()["actions"]["POST"]["weight"]["unit_choices"][0],
+            ["g", "gram"])
+
+    def test_not_modified(self):
+        """ Test matching If-None-Match gets an empty 304 response. """
+        # Given
+        etag = self.client.options("/api/purchases/")["ETag"]
+
+        # When
+        response = self.client.options("/api/purchases/",
+                                       HTTP_IF_NONE_MATCH=etag)
+
+        # Then
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_key(self):
+        """ Test documents are cached by serializer and view. """
+        # When
+        standard = self.client.options("/api/orders/")
+        nested = self.client.options("/api/orders/", {"nested": "true"})
+        detail = self.client.options("/api/orders/1/")
+
+        # Then
+        self.assertNotEqual(standard["ETag"], nested["ETag"])
+        self.assertEqual(set(standard.json()["actions"]), {"POST"})
+        self.assertEqual(set(detail.json()["actions"]), {"PUT"})
+        self.assertEqual(detail.json()["name"], "Order Instance")
+        self.assertEqual(len(metadata.CACHE), 3)
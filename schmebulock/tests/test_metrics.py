@@ -0,0 +1,134 @@
+""" Tests for request metrics under main app. """
+import json
+import os
+import re
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from model_mommy import mommy
+from rest_framework.test import APIClient
+
+from schmebulock import metrics
+
+
+class RegistryTest(TestCase):
+    """ Tests for Registry and exposition. """
+
+    def test_histogram(self):
+        """ Test histogram buckets are cumulative when exposed. """
+        # Given
+        registry = metrics.Registry()
+        labels = (("route", "brand-list"), ("action", "list"))
+
+        # When
+        for value in [0, 1, 3, 500]:
+            registry.observe("request_queries", labels, value)
+        text = metrics.expose(metrics.merge([registry.to_list()]))
+
+        # Then
+        self.assertIn('schmebulock_request_queries_bucket{route="brand-list",'
+                      'action="list",le="1"} 2', text)
+        self.assertIn('schmebulock_request_queries_bucket{route="brand-list",'
+                      'action="list",le="+Inf"} 4', text)
+        self.assertIn('schmebulock_request_queries_sum{route="brand-list",'
+                      'action="list"} 504', text)
+        self.assertIn('schmebulock_request_queries_count{route="brand-list",'
+                      'action="list"} 4', text)
+
+    def test_merge(self):
+        """ Test values of several processes are added up. """
+        # Given
+        labels = (("route", "brand-list"),)
+        first, second = metrics.Registry(), metrics.Registry()
+        first.inc("requests_total", labels)
+        second.inc("requests_total", labels, 2)
+        first.observe("request_duration_seconds", labels, 0.2)
+        second.observe("request_duration_seconds", labels, 0.3)
+
+        # When
+        totals = metrics.merge([first.to_list(), second.to_list()])
+
+        # Then
+        self.assertEqual(totals[("requests_total", labels)], 3)
+        self.assertEqual(totals[("request_duration_seconds", labels)][-2:],
+                         [0, 0.5])
+
+    def test_label_escaping(self):
+        """ Test label values are escaped. """
+        # When/Then
+        self.assertEqual(metrics.format_labels((("path", 'a"b\\'),)),
+                         'path="a\\"b\\\\"')
+
+
+class MetricsViewTest(TestCase):
+    """ Tests for metrics middleware and endpoint. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.directory = tempfile.TemporaryDirectory()
+        self.metrics_settings = override_settings(
+            METRICS_DIR=self.directory.name)
+        self.metrics_settings.enable()
+        self.client = APIClient()
+        self.client.force_authenticate(mommy.make("User", is_staff=True))
+
+    def tearDown(self):
+        """ Clean up for all the tests. """
+        self.metrics_settings.disable()
+        self.directory.cleanup()
+
+    def test_workers(self):
+        """ Test metrics of requests from every worker are exposed. """
+        # Given
+        with open(os.path.join(self.directory.name,
+                               "metrics-0.json"), "w") as other_worker:
+            json.dump([["requests_total",
+                        [["route", "brand-list"], ["action", "list"],
+                         ["method", "GET"], ["status", "2xx"]], 1000]],
+                      other_worker)
+        self.client.get("/api/brands/")
+
+        # When
+        response = self.client.get("/api/metrics/")
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode()
+        total = re.search(
+            r'schmebulock_requests_total\{route="brand-list",'
+            r'action="list",method="GET",status="2xx"\} (\d+)', text)
+        self.assertGreater(int(total.group(1)), 1000)
+        self.assertIn('schmebulock_request_queries_count{route="brand-list"',
+                      text)
+
+    def test_staff_only(self):
+        """ Test other users need a staff user, from any address. """
+        # Given
+        self.client.force_authenticate(mommy.make("User"))
+
+        # When
+        response = self.client.get("/api/metrics/")
+        local_response = self.client.get("/api/metrics/",
+                                         REMOTE_ADDR="127.0.0.1")
+
+        # Then
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(local_response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self):
+        """ Test scrapers sending the token don't need a user. """
+        # Given
+        self.client.force_authenticate(None)
+
+        # When
+        response = self.client.get("/api/metrics/",
+                                   HTTP_X_METRICS_TOKEN="secret")
+        wrong_response = self.client.get("/api/metrics/",
+                                         HTTP_X_METRICS_TOKEN="other")
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(wrong_response.status_code, 401)
@@ -0,0 +1,174 @@
+""" Tests for database connection pool under main app. """
+from django.db import connection
+from django.test import TestCase
+
+from model_mommy import mommy
+from rest_framework.test import APIClient
+
+from schmebulock.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor(object):
+    """ Dummy DB-API cursor. """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query):
+        """ Fail if the connection is broken. """
+        if self.conn.broken:
+            raise RuntimeError("Connection lost")
+
+    def close(self):
+        """ Nothing to close. """
+        pass
+
+
+class FakeConnection(object):
+    """ Dummy DB-API connection. """
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        """ Get dummy cursor. """
+        return FakeCursor(self)
+
+    def rollback(self):
+        """ Count rollbacks. """
+        self.rollbacks += 1
+
+    def close(self):
+        """ Mark as closed. """
+        self.closed = 1
+
+
+class ConnectionPoolTest(TestCase):
+    """ Tests for ConnectionPool. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.pool = ConnectionPool(FakeConnection, max_connections=2,
+                                   timeout=0.01, name="fake")
+
+    def test_reuse(self):
+        """ Test returned connections are reused. """
+        # Given
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+
+        # When
+        reused_conn = self.pool.getconn()
+
+        # Then
+        self.assertIs(reused_conn, conn)
+        self.assertEqual(conn.rollbacks, 1)
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["in_use"], 1)
+        self.assertEqual(stats["idle"], 0)
+
+    def test_health_check(self):
+        """ Test broken idle connections are replaced on checkout. """
+        # Given
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+        conn.broken = True
+
+        # When
+        new_conn = self.pool.getconn()
+
+        # Then
+        self.assertIsNot(new_conn, conn)
+        self.assertTrue(conn.closed)
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["failures"], 1)
+        self.assertEqual(stats["closed"], 1)
+
+    def test_limit(self):
+        """ Test checkout waits and then fails when all are in use. """
+        # Given
+        self.pool.getconn()
+        self.pool.getconn()
+
+        # When/Then
+        with self.assertRaises(PoolTimeout):
+            self.pool.getconn()
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["in_use"], 2)
+
+    def test_close(self):
+        """ Test connections returned with close are not reused. """
+        # Given
+        conn = self.pool.getconn()
+
+        # When
+        self.pool.putconn(conn, close=True)
+
+        # Then
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.pool.get_stats()["idle"], 0)
+        self.assertIsNot(self.pool.getconn(), conn)
+
+    def test_connect_failure(self):
+        """ Test failing to connect releases the slot. """
+        # Given
+        def connect():
+            """ Fail to connect. """
+            raise RuntimeError("Connection refused")
+        pool = ConnectionPool(connect, max_connections=1, timeout=0.01)
+
+        # When/Then
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                pool.getconn()
+        self.assertEqual(pool.get_stats()["failures"], 2)
+        self.assertEqual(pool.get_stats()["timeouts"], 0)
+
+    def test_close_idle(self):
+        """ Test idle connections are closed. """
+        # Given
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+
+        # When
+        self.pool.close_idle()
+
+        # Then
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.pool.get_stats()["idle"], 0)
+
+
+class DatabasePoolViewTest(TestCase):
+    """ Tests for DatabasePoolView. """
+
+    def test_staff_only(self):
+        """ Test non staff users can't see pool stats. """
+        # Given
+        client = APIClient()
+        client.force_authenticate(mommy.make("User", is_staff=False))
+
+        # When
+        response = client.get("/api/db-pool/")
+
+        # Then
+        self.assertEqual(response.status_code, 403)
+
+    def test_stats(self):
+        """ Test stats for the pool of the default database are listed. """
+        # Given
+        client = APIClient()
+        client.force_authenticate(mommy.make("User", is_staff=True))
+        name = connection.pool.name
+
+        # When
+        response = client.get("/api/db-pool/")
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(name, [stats["name"] for stats in response.json()])
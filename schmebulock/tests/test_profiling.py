@@ -0,0 +1,155 @@
+""" Tests for request profiling under main app. """
+import base64
+import tempfile
+import threading
+import time
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from model_mommy import mommy
+from rest_framework.test import APIClient
+
+from schmebulock import profiling
+
+
+def busy_loop(seconds):
+    """ Keep the CPU busy for a while. """
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class SamplingProfilerTest(TestCase):
+    """ Tests for SamplingProfiler. """
+
+    def test_samples(self):
+        """ Test stacks of the profiled thread are sampled. """
+        # Given
+        profiler = profiling.SamplingProfiler(0.001)
+
+        # When
+        profiler.start()
+        busy_loop(0.1)
+        profiler.stop()
+        folded = profiler.get_folded()
+
+        # Then
+        self.assertFalse(profiler.thread.is_alive())
+        self.assertIn(";busy_loop (", folded)
+        self.assertRegex(folded.splitlines()[0], r" \d+$")
+
+    def test_is_requested(self):
+        """ Test profiling flag in header or query string. """
+        # Given
+        factory = RequestFactory()
+
+        # When/Then
+        self.assertTrue(profiling.is_requested(
+            factory.get("/api/brands/", HTTP_X_PROFILE="1")))
+        self.assertTrue(profiling.is_requested(
+            factory.get("/api/brands/?nested=1&profile=1")))
+        self.assertTrue(profiling.is_requested(
+            factory.get("/api/brands/?profile=1&nested=1")))
+        self.assertTrue(profiling.is_requested(
+            factory.get("/api/brands/?profile")))
+        self.assertFalse(profiling.is_requested(
+            factory.get("/api/brands/?noprofile=1")))
+        self.assertFalse(profiling.is_requested(factory.get("/api/brands/")))
+
+
+class ProfilerMiddlewareTest(TestCase):
+    """ Tests for ProfilerMiddleware and profile views. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.directory = tempfile.TemporaryDirectory()
+        self.profile_settings = override_settings(
+            PROFILE_DIR=self.directory.name, PROFILE_INTERVAL=0.001,
+            PROFILE_KEEP=2)
+        self.profile_settings.enable()
+
+    def tearDown(self):
+        """ Clean up for all the tests. """
+        self.profile_settings.disable()
+        self.directory.cleanup()
+
+    def get_client(self, is_staff):
+        """
+        Get client sending basic authentication credentials.
+
+        Parameters:
+            is_staff: bool
+
+        Returns:
+            rest_framework.test.APIClient
+
+        """
+        user = mommy.make("User", is_staff=is_staff)
+        user.set_password("password")
+        user.save()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Basic {0}".format(
+            base64.b64encode("{0}:password".format(
+                user.username).encode()).decode()))
+        return client
+
+    def test_staff(self):
+        """ Test requests of staff users are profiled when asked. """
+        # Given
+        client = self.get_client(is_staff=True)
+
+        # When
+        response = client.get("/api/brands/", HTTP_X_PROFILE="1")
+        profile_id = response["X-Profile-Id"]
+        profiles = client.get("/api/profiles/").json()
+        detail = client.get("/api/profiles/{0}/".format(profile_id))
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(profiles[0]["id"], profile_id)
+        self.assertEqual(profiles[0]["path"], "/api/brands/")
+        self.assertNotIn("folded", profiles[0])
+        self.assertEqual(detail.status_code, 200)
+        self.assertTrue(detail["Content-Type"].startswith("text/plain"))
+
+    def test_keep(self):
+        """ Test only the last profiles are kept. """
+        # Given
+        client = self.get_client(is_staff=True)
+
+        # When
+        profile_ids = [client.get("/api/brands/", {"profile": 1})[
+            "X-Profile-Id"] for _ in range(3)]
+        profiles = client.get("/api/profiles/").json()
+
+        # Then
+        self.assertEqual([saved["id"] for saved in profiles],
+                         list(reversed(profile_ids[1:])))
+        self.assertEqual(client.get("/api/profiles/{0}/".format(
+            profile_ids[0])).status_code, 404)
+
+    def test_not_staff(self):
+        """ Test requests of other users are never profiled. """
+        # Given
+        client = self.get_client(is_staff=False)
+
+        # When
+        response = client.get("/api/brands/", HTTP_X_PROFILE="1")
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertEqual(client.get("/api/profiles/").status_code, 403)
+
+    def test_not_requested(self):
+        """ Test requests without the flag are not profiled. """
+        # Given
+        client = self.get_client(is_staff=True)
+        threads = threading.active_count()
+
+        # When
+        response = client.get("/api/brands/")
+
+        # Then
+        self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertEqual(threading.active_count(), threads)
@@ -0,0 +1,154 @@
+""" Tests for query budgets under main app. """
+import os
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from model_mommy import mommy
+from rest_framework.test import APIClient
+
+from items.models import Brand
+from items.views import BrandViewSet
+from schmebulock import querybudget
+
+
+class ExecuteWrapperTest(TestCase):
+    """ Tests for execute wrappers of the database backend. """
+
+    def test_wrapper(self):
+        """ Test queries go through wrappers, outermost first. """
+        # Given
+        calls = []
+
+        def get_wrapper(name):
+            """ Wrapper recording its name and the query. """
+            def wrapper(execute, sql, params, many, context):
+                """ Record call. """
+                calls.append((name, sql, many, context["connection"]))
+                return execute(sql, params, many, context)
+            return wrapper
+
+        # When
+        with connection.execute_wrapper(get_wrapper("outer")):
+            with connection.execute_wrapper(get_wrapper("inner")):
+                count = Brand.objects.count()
+        Brand.objects.count()
+
+        # Then
+        self.assertEqual(count, 0)
+        self.assertEqual([call[0] for call in calls], ["outer", "inner"])
+        self.assertIn("items_brand", calls[0][1])
+        self.assertFalse(calls[0][2])
+        self.assertIs(calls[0][3], connection)
+
+
+class QueryTrackerTest(TestCase):
+    """ Tests for QueryTracker. """
+
+    def test_track(self):
+        """ Test queries after mark are counted. """
+        # Given
+        tracker = querybudget.QueryTracker()
+
+        # When
+        with tracker.track():
+            Brand.objects.count()
+            tracker.mark()
+            Brand.objects.filter(name="a").exists()
+            Brand.objects.filter(name="b").exists()
+            Brand.objects.count()
+        sql, times, stack = tracker.get_most_repeated()
+
+        # Then
+        self.assertEqual(len(tracker.queries), 4)
+        self.assertEqual(len(tracker.counted), 3)
+        self.assertIn("WHERE", sql)
+        self.assertEqual(times, 2)
+        self.assertIn("test_querybudget.py",
+                      querybudget.format_stack(stack))
+
+    def test_format_stack(self):
+        """ Test frames as tuples (Python 3.4) are formatted. """
+        # Given
+        project = os.path.join(settings.BASE_DIR, "items", "views.py")
+        stack = [("/usr/lib/python3/site-packages/django/db.py", 1,
+                  "execute", "cursor.execute(sql)"),
+                 (project, 10, "list", "return queryset")]
+
+        # When
+        text = querybudget.format_stack(stack)
+
+        # Then
+        self.assertIn("views.py", text)
+        self.assertNotIn("site-packages", text)
+
+    def test_get_budget(self):
+        """ Test budgets per action and serializer. """
+        # Given
+        view = BrandViewSet(action="list", request=None)
+        view.query_budgets = {"list": 2, "retrieve": 1,
+                              "list:BrandSerializer": 3}
+
+        # When/Then
+        self.assertEqual(querybudget.get_budget(view), 3)
+        view.action = "retrieve"
+        self.assertEqual(querybudget.get_budget(view), 1)
+        view.action = "destroy"
+        self.assertIsNone(querybudget.get_budget(view))
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    """ Tests for QueryBudgetMiddleware. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.client = APIClient()
+        self.client.force_authenticate(mommy.make("User"))
+        mommy.make("Brand", _quantity=2)
+
+    @override_settings(QUERY_BUDGET_MODE="raise")
+    def test_within_budget(self):
+        """ Test query count header when within budget. """
+        # When
+        response = self.client.get("/api/brands/")
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response[querybudget.QUERY_COUNT_HEADER], "2")
+
+    @override_settings(QUERY_BUDGET_MODE="raise")
+    def test_raise(self):
+        """ Test exceeding the budget raises. """
+        # Given
+        budgets = {"list": 1}
+
+        # When/Then
+        with mock.patch.object(BrandViewSet, "query_budgets", budgets):
+            with self.assertRaises(querybudget.QueryBudgetExceeded):
+                self.client.get("/api/brands/")
+
+    @override_settings(QUERY_BUDGET_MODE="log")
+    def test_log(self):
+        """ Test exceeding the budget logs. """
+        # Given
+        budgets = {"list": 1}
+
+        # When
+        with mock.patch.object(BrandViewSet, "query_budgets", budgets):
+            with self.assertLogs("schmebulock.querybudget") as logs:
+                response = self.client.get("/api/brands/")
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ran 2 queries", logs.output[0])
+
+    @override_settings(QUERY_BUDGET_MODE=None)
+    def test_disabled(self):
+        """ Test nothing is tracked when disabled. """
+        # When
+        response = self.client.get("/api/brands/")
+
+        # Then
+        self.assertFalse(response.has_header(querybudget.QUERY_COUNT_HEADER))
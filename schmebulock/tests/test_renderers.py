@@ -0,0 +1,235 @@
+""" Tests for renderers and parsers under main app. """
+import datetime
+import decimal
+import io
+import json
+
+import msgpack
+from django.test import TestCase
+from measurement.measures import Weight
+from moneyed import Money
+
+from model_mommy import mommy
+from rest_framework import exceptions, renderers
+from rest_framework.test import APIClient
+
+from schmebulock import parsers
+from schmebulock.renderers import (
+    ColumnarJSONRenderer, FastJSONRenderer, MessagePackRenderer, default,
+    get_columnar)
+
+
+def from_columnar(data, path=None, value=None):
+    """
+    Get objects back from columnar format (or a field value when path).
+
+    Parameters:
+        data: dict
+        path: str
+        value: object
+
+    Returns:
+        list(dict) or object
+
+    """
+    if path is not None:
+        lookup = data["lookups"].get(path, {}).get(str(value))
+        if lookup is None:
+            return value
+        return {name: from_columnar(data, "{0}.{1}".format(path, name),
+                                    nested)
+                for name, nested in lookup.items()}
+    return [{name: from_columnar(data, name, row_value)
+             for name, row_value in zip(data["columns"], row)}
+            for row in data["rows"]]
+
+
+class DefaultTest(TestCase):
+    """ Tests for default conversion of types. """
+
+    def test_default(self):
+        """ Test types are converted as DRF's JSONEncoder does. """
+        # When/Then
+        self.assertEqual(default(decimal.Decimal("1.50")), 1.5)
+        self.assertEqual(default(datetime.date(2017, 6, 1)), "2017-06-01")
+        self.assertEqual(default(datetime.datetime(
+            2017, 6, 1, 10, 30, tzinfo=datetime.timezone.utc)),
+                         "2017-06-01T10:30:00Z")
+        self.assertEqual(default(Money("10.25", "USD")),
+                         {"amount": 10.25, "currency": "USD"})
+        self.assertEqual(default(Weight(kg=2)),
+                         {"value": 2, "unit": "kg"})
+        with self.assertRaises(TypeError):
+            default(object())
+
+
+class RendererTest(TestCase):
+    """ Tests for FastJSONRenderer and MessagePackRenderer. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.data = {"count": 1, "next": None, "results": [
+            {"id": 1, "name": "Brand ñ", "price": decimal.Decimal("2.50"),
+             "created": datetime.datetime(
+                 2017, 6, 1, tzinfo=datetime.timezone.utc)}]}
+
+    def test_json(self):
+        """ Test output is the same as JSONRenderer's. """
+        # When
+        fast = FastJSONRenderer().render(self.data)
+        stock = renderers.JSONRenderer().render(self.data)
+
+        # Then
+        self.assertEqual(json.loads(fast.decode()),
+                         json.loads(stock.decode()))
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_json_keys(self):
+        """ Test keys that are not strings are converted as by json. """
+        # Given
+        data = {1: {"method": ["Invalid method."]}, "2": {1.5: None},
+                False: [{None: 0}]}
+
+        # When
+        fast = FastJSONRenderer().render(data)
+        stock = renderers.JSONRenderer().render(data)
+
+        # Then
+        self.assertEqual(json.loads(fast.decode()),
+                         json.loads(stock.decode()))
+        self.assertEqual(json.loads(fast.decode())["1"],
+                         {"method": ["Invalid method."]})
+
+    def test_msgpack(self):
+        """ Test rendered data is parsed back. """
+        # When
+        content = MessagePackRenderer().render(self.data)
+        parsed = parsers.MessagePackParser().parse(io.BytesIO(content))
+
+        # Then
+        self.assertEqual(parsed["results"][0]["name"], "Brand ñ")
+        self.assertEqual(parsed["results"][0]["price"], 2.5)
+        self.assertEqual(parsed["results"][0]["created"],
+                         "2017-06-01T00:00:00Z")
+
+    def test_msgpack_invalid(self):
+        """ Test invalid content raises parse error. """
+        # When/Then
+        with self.assertRaises(exceptions.ParseError):
+            parsers.MessagePackParser().parse(io.BytesIO(b"\xc1"))
+
+
+class NegotiationTest(TestCase):
+    """ Tests for content negotiation of the API. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.client = APIClient()
+        self.client.force_authenticate(user=mommy.make("User"))
+
+    def test_get(self):
+        """ Test response format follows Accept header. """
+        # Given
+        mommy.make("Brand", name="Brand")
+
+        # When
+        json_response = self.client.get("/api/brands/")
+        msgpack_response = self.client.get(
+            "/api/brands/", HTTP_ACCEPT="application/msgpack")
+
+        # Then
+        self.assertEqual(json_response["Content-Type"], "application/json")
+        self.assertEqual(msgpack_response["Content-Type"],
+                         "application/msgpack")
+        self.assertEqual(
+            msgpack.unpackb(msgpack_response.content, raw=False),
+            json.loads(json_response.content.decode()))
+
+    def test_post(self):
+        """ Test MessagePack content is parsed. """
+        # When
+        response = self.client.post("/api/brands/", {"name": "Brand"},
+                                    format="msgpack")
+
+        # Then
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content, raw=False)["name"],
+                         "Brand")
+
+
+class ColumnarTest(TestCase):
+    """ Tests for columnar list format. """
+
+    def test_get_columnar(self):
+        """ Test nested objects are stored once. """
+        # Given
+        brand = {"id": 7, "name": "Brand", "country": {"id": 1, "name": "C"}}
+        rows = [{"id": 1, "name": "First", "brand": brand},
+                {"id": 2, "name": "Second", "brand": brand},
+                {"id": 3, "name": "Third", "brand": None}]
+
+        # When
+        data = get_columnar(rows)
+
+        # Then
+        self.assertEqual(data["columns"], ["id", "name", "brand"])
+        self.assertEqual(data["rows"], [[1, "First", 7], [2, "Second", 7],
+                                        [3, "Third", None]])
+        self.assertEqual(data["lookups"], {
+            "brand": {"7": {"id": 7, "name": "Brand", "country": 1}},
+            "brand.country": {"1": {"id": 1, "name": "C"}}})
+        self.assertEqual(from_columnar(json.loads(json.dumps(data))), rows)
+
+    def test_not_rows(self):
+        """ Test lists of anything but objects are rendered as JSON. """
+        # Given
+        errors = ["Expected an object with the new values."]
+
+        # When
+        content = ColumnarJSONRenderer().render(errors)
+        mixed = ColumnarJSONRenderer().render([{"id": 1}, "Other"])
+
+        # Then
+        self.assertEqual(json.loads(content.decode()), errors)
+        self.assertEqual(json.loads(mixed.decode()), [{"id": 1}, "Other"])
+
+    def test_error(self):
+        """ Test error messages of a view are rendered as JSON. """
+        # Given
+        client = APIClient()
+        client.force_authenticate(user=mommy.make("User"))
+
+        # When
+        response = client.patch("/api/purchases/bulk/?ids=1&format=columnar",
+                                ["order"], format="json")
+
+        # Then
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content.decode()),
+                         ["Expected an object with the new values."])
+
+    def test_list(self):
+        """ Test same data as the standard format, but smaller. """
+        # Given
+        client = APIClient()
+        client.force_authenticate(user=mommy.make("User"))
+        store = mommy.make("Store", name="Store")
+        mommy.make("Order", store=store, _quantity=5)
+
+        # When
+        standard = client.get("/api/orders/", {"nested": "true"})
+        columnar = client.get("/api/orders/",
+                              {"nested": "true", "format": "columnar"})
+        detail = client.get("/api/stores/{0}/".format(store.id),
+                            {"format": "columnar"})
+
+        # Then
+        data = json.loads(columnar.content.decode())
+        self.assertEqual(columnar["Content-Type"],
+                         "application/vnd.schmebulock.columnar+json")
+        self.assertEqual(data["count"], 5)
+        self.assertEqual(list(data["lookups"]["store"]), [str(store.id)])
+        self.assertEqual(from_columnar(data), standard.json()["results"])
+        self.assertLess(len(columnar.content), len(standard.content))
+        self.assertEqual(json.loads(detail.content.decode())["name"], "Store")
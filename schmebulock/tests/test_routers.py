@@ -0,0 +1,132 @@
+""" Tests for database routers under main app. """
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from items.models import Brand
+from items.views import BrandViewSet
+from schmebulock.db import routers
+from schmebulock.middleware import ReplicaRoutingMiddleware
+
+
+@override_settings(REPLICA_DATABASES=["replica"], REPLICA_PIN_SECONDS=5)
+class ReplicaRouterTest(TestCase):
+    """ Tests for ReplicaRouter. """
+
+    def tearDown(self):
+        """ Clean up for all the tests. """
+        routers.set_use_replicas(False)
+
+    def test_read_replica(self):
+        """ Test reads go to replica when allowed. """
+        # Given
+        routers.set_use_replicas(True)
+
+        # When
+        database = routers.ReplicaRouter().db_for_read(Brand)
+
+        # Then
+        self.assertEqual(database, "replica")
+
+    def test_read_primary(self):
+        """ Test reads go to primary by default. """
+        # When
+        database = routers.ReplicaRouter().db_for_read(Brand)
+
+        # Then
+        self.assertIsNone(database)
+
+    def test_write(self):
+        """ Test writes always go to primary. """
+        # Given
+        routers.set_use_replicas(True)
+
+        # When
+        database = routers.ReplicaRouter().db_for_write(Brand)
+
+        # Then
+        self.assertIsNone(database)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas(self):
+        """ Test reads go to primary when there are no replicas. """
+        # Given
+        routers.set_use_replicas(True)
+
+        # When
+        database = routers.ReplicaRouter().db_for_read(Brand)
+
+        # Then
+        self.assertIsNone(database)
+
+    def test_allow_migrate(self):
+        """ Test migrations only run on primary. """
+        # Given
+        router = routers.ReplicaRouter()
+
+        # When/Then
+        self.assertTrue(router.allow_migrate("default", "items"))
+        self.assertFalse(router.allow_migrate("replica", "items"))
+
+
+@override_settings(REPLICA_DATABASES=["replica"], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingMiddlewareTest(TestCase):
+    """ Tests for ReplicaRoutingMiddleware. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        cache.clear()
+        self.factory = RequestFactory(HTTP_AUTHORIZATION="Bearer token")
+        self.view = BrandViewSet.as_view({"get": "list", "post": "create"})
+        self.used_replicas = []
+
+    def process(self, request, status=200):
+        """ Run request through middleware like the request handler. """
+        def get_response(request):
+            """ Record if replicas were allowed for the view. """
+            middleware.process_view(request, self.view, (), {})
+            self.used_replicas.append(routers.get_use_replicas())
+            return HttpResponse(status=status)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return middleware(request)
+
+    def test_safe_request(self):
+        """ Test safe requests to items endpoints use replicas. """
+        # When
+        self.process(self.factory.get("/api/brands/"))
+
+        # Then
+        self.assertEqual(self.used_replicas, [True])
+        self.assertFalse(routers.get_use_replicas())
+
+    def test_other_view(self):
+        """ Test safe requests to other views don't use replicas. """
+        # Given
+        self.view = lambda request: None
+
+        # When
+        self.process(self.factory.get("/api/other/"))
+
+        # Then
+        self.assertEqual(self.used_replicas, [False])
+
+    def test_read_your_writes(self):
+        """ Test reads after a write by the same client use primary. """
+        # When
+        self.process(self.factory.post("/api/brands/"), status=201)
+        self.process(self.factory.get("/api/brands/"))
+        self.process(RequestFactory(HTTP_AUTHORIZATION="Bearer other").get(
+            "/api/brands/"))
+
+        # Then
+        self.assertEqual(self.used_replicas, [False, False, True])
+
+    def test_failed_write(self):
+        """ Test failed writes don't pin the client to primary. """
+        # When
+        self.process(self.factory.post("/api/brands/"), status=400)
+        self.process(self.factory.get("/api/brands/"))
+
+        # Then
+        self.assertEqual(self.used_replicas, [False, True])
@@ -0,0 +1,96 @@
+""" Tests for cached API schema under main app. """
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from model_mommy import mommy
+from rest_framework.test import APIClient
+
+from schmebulock import schema
+
+
+class SchemaViewTest(TestCase):
+    """ Tests for SchemaView. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        schema.CACHE.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=mommy.make("User"))
+
+    def test_cached(self):
+        """ Test schema is generated once and sent with an ETag. """
+        # Given
+        get_schema = schema.SchemaGenerator.get_schema
+
+        # When
+        with mock.patch.object(
+                schema.SchemaGenerator, "get_schema", autospec=True,
+                side_effect=get_schema) as mocked:
+            first = self.client.get("/api/docs/", {"format": "openapi"})
+            second = self.client.get("/api/docs/", {"format": "openapi"})
+            corejson = self.client.get("/api/docs/", {"format": "corejson"})
+
+        # Then
+        self.assertEqual(mocked.call_count, 1)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertNotEqual(first["ETag"], corejson["ETag"])
+        self.assertIn("/api/purchases/", json.loads(
+            first.content.decode())["paths"])
+
+    def test_not_modified(self):
+        """ Test matching If-None-Match gets an empty 304 response. """
+        # Given
+        etag = self.client.get("/api/docs/", {"format": "openapi"})["ETag"]
+
+        # When
+        response = self.client.get("/api/docs/", {"format": "openapi"},
+                                   HTTP_IF_NONE_MATCH=etag)
+
+        # Then
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_ui(self):
+        """ Test Swagger UI is still rendered. """
+        # When
+        response = self.client.get("/api/docs/", HTTP_ACCEPT="text/html")
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+
+    def test_not_authenticated(self):
+        """ Test schema is not served to anonymous users. """
+        # When
+        response = APIClient().get("/api/docs/", {"format": "openapi"})
+
+        # Then
+        self.assertEqual(response.status_code, 401)
+
+
+class GenerateSchemaTest(TestCase):
+    """ Tests for generate_schema command. """
+
+    def test_output(self):
+        """ Test file has the same schema as the view. """
+        # Given
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "schema.json")
+
+        # When
+        call_command("generate_schema", output=path, stdout=io.StringIO())
+        client = APIClient()
+        client.force_authenticate(user=mommy.make("User"))
+        response = client.get("/api/docs/", {"format": "openapi"})
+
+        # Then
+        with open(path, "rb") as schema_file:
+            self.assertEqual(schema_file.read(), response.content)
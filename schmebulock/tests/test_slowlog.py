@@ -0,0 +1,123 @@
+""" Tests for slow query log under main app. """
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from model_mommy import mommy
+from rest_framework.test import APIClient
+
+from items.models import Brand
+from schmebulock.db import slowlog
+
+
+def get_records(logs):
+    """
+    Get logged queries.
+
+    Parameters:
+        logs: mock.Mock
+            Patched logging method.
+
+    Returns:
+        list(dict)
+
+    """
+    return [json.loads(call[0][0]) for call in logs.call_args_list]
+
+
+@override_settings(SLOW_QUERY_SECONDS=0, SLOW_QUERY_EXPLAIN_RATE=1)
+class SlowQueryLogTest(TestCase):
+    """ Tests for log_slow_query. """
+
+    def test_select(self):
+        """ Test slow SELECTs are logged with their plan. """
+        # Given
+        mommy.make("Brand", name="Brand")
+
+        # When
+        with mock.patch.object(slowlog.LOGGER, "warning") as logs:
+            count = Brand.objects.filter(name="Brand").count()
+        record = get_records(logs)[0]
+
+        # Then
+        self.assertEqual(count, 1)
+        self.assertEqual(record["database"], "default")
+        self.assertIn("items_brand", record["sql"])
+        self.assertEqual(record["params"], ["Brand"])
+        self.assertIn("Execution Time", record["plan"])
+        self.assertIsNone(record["view"])
+        # Transaction still usable after EXPLAIN.
+        self.assertTrue(Brand.objects.exists())
+
+    def test_volatile(self):
+        """ Test SELECTs with side effects are not run again. """
+        # Given
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TEMPORARY SEQUENCE slowlog_test")
+
+        # When
+        with mock.patch.object(slowlog.LOGGER, "warning") as logs:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT nextval('slowlog_test')")
+                cursor.execute("SELECT nextval('slowlog_test')")
+                value = cursor.fetchone()[0]
+        record = get_records(logs)[0]
+
+        # Then
+        self.assertEqual(value, 2)
+        self.assertIsNotNone(record["plan"])
+        self.assertNotIn("Execution Time", record["plan"])
+
+    def test_write(self):
+        """ Test writes are logged without running them again. """
+        # When
+        with mock.patch.object(slowlog.LOGGER, "warning") as logs:
+            Brand.objects.create(name="Brand")
+        records = get_records(logs)
+
+        # Then
+        self.assertEqual(Brand.objects.count(), 1)
+        self.assertTrue(records[0]["sql"].startswith("INSERT"))
+        self.assertIsNone(records[0]["plan"])
+
+    @override_settings(SLOW_QUERY_EXPLAIN_RATE=0)
+    def test_not_sampled(self):
+        """ Test plans are only captured for a sample. """
+        # When
+        with mock.patch.object(slowlog.LOGGER, "warning") as logs:
+            Brand.objects.count()
+
+        # Then
+        self.assertIsNone(get_records(logs)[0]["plan"])
+
+    @override_settings(SLOW_QUERY_SECONDS=None)
+    def test_disabled(self):
+        """ Test nothing is logged when disabled. """
+        # When
+        with mock.patch.object(slowlog.LOGGER, "warning") as logs:
+            Brand.objects.count()
+
+        # Then
+        logs.assert_not_called()
+
+    def test_origin(self):
+        """ Test view and serializer running the query are logged. """
+        # Given
+        brand = mommy.make("Brand")
+        client = APIClient()
+        client.force_authenticate(mommy.make("User"))
+
+        # When
+        with mock.patch.object(slowlog.LOGGER, "warning") as logs:
+            client.post("/api/items/", {"name": "Item", "unit": "g",
+                                        "weight": 1, "brand": brand.id},
+                        format="json")
+        records = [record for record in get_records(logs)
+                   if record["serializer"]]
+
+        # Then
+        self.assertEqual(records[0]["view"], "ItemViewSet")
+        self.assertEqual(records[0]["action"], "create")
+        self.assertEqual(records[0]["serializer"], "ItemSerializer")
@@ -0,0 +1,103 @@
+""" Tests for Server-Timing under main app. """
+import json
+import logging
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from model_mommy import mommy
+from rest_framework.test import APIClient
+
+from items.models import Brand
+from schmebulock import timing
+
+
+class RequestTimerTest(TestCase):
+    """ Tests for RequestTimer. """
+
+    def test_is_sampled(self):
+        """ Test sampling by rate. """
+        # When/Then
+        with mock.patch("random.random", return_value=0.5):
+            self.assertFalse(timing.is_sampled(0))
+            self.assertFalse(timing.is_sampled(0.4))
+            self.assertTrue(timing.is_sampled(0.6))
+            self.assertTrue(timing.is_sampled(1))
+
+    def test_phase(self):
+        """ Test phases exclude time of queries run during them. """
+        # Given
+        timer = timing.RequestTimer()
+
+        # When
+        with timer.track():
+            with mock.patch("time.perf_counter", side_effect=[0, 1, 3, 10]):
+                with timer.phase("auth"):
+                    Brand.objects.count()
+
+        # Then
+        self.assertEqual(timer.durations["db"], 2)
+        self.assertEqual(timer.durations["auth"], 8)
+
+    def test_header(self):
+        """ Test Server-Timing header value. """
+        # Given
+        timer = timing.RequestTimer()
+        timer.durations["db"] = 0.0125
+
+        # When
+        timer.finish()
+        header = timer.get_header()
+
+        # Then
+        self.assertTrue(header.startswith('db;desc="SQL queries";dur=12.5, '))
+        self.assertEqual(
+            [value.split(";")[0] for value in header.split(", ")],
+            ["db", "auth", "view", "render", "middleware", "total"])
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    """ Tests for ServerTimingMiddleware. """
+
+    def setUp(self):
+        """ Data for all the tests. """
+        self.client = APIClient()
+        self.client.force_authenticate(mommy.make("User"))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled(self):
+        """ Test header and log of sampled requests. """
+        # When
+        with self.assertLogs("schmebulock.timing", "INFO") as logs:
+            response = self.client.get("/api/purchases/", {"nested": True})
+        data = json.loads(logs.records[0].getMessage())
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("render;", response["Server-Timing"])
+        self.assertEqual(data["view"], "PurchaseViewSet")
+        self.assertEqual(data["action"], "list")
+        self.assertGreater(data["timing"]["db"], 0)
+        self.assertGreater(data["timing"]["view"], 0)
+        self.assertGreater(data["timing"]["render"], 0)
+        self.assertGreaterEqual(data["timing"]["total"],
+                                data["timing"]["db"])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """ Test requests out of the sample are not timed. """
+        # When
+        response = self.client.get("/api/purchases/")
+
+        # Then
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_logging(self):
+        """ Test timing logs are written by the configured logging. """
+        # Given
+        logger = logging.getLogger("schmebulock.timing")
+
+        # When/Then
+        self.assertTrue(logger.isEnabledFor(logging.INFO))
+        self.assertTrue(logger.handlers)
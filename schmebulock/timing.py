@@ -0,0 +1,185 @@
+"""
+Server-Timing breakdown of where the time of a request went.
+
+For a sample of requests (SERVER_TIMING_SAMPLE_RATE) ServerTimingMiddleware
+times these phases, each one excluding the queries run during it:
+
+    db: SQL queries (all databases).
+    auth: authentication of the user.
+    view: view handler, mostly building querysets and serialization.
+    render: rendering the response (JSON, browsable API, ...).
+    middleware: everything else (middleware, routing, permissions).
+
+They are returned in a Server-Timing header (shown by browser developer
+tools) and logged as JSON to the schmebulock.timing logger. Requests out of
+the sample only pay for a random number.
+
+"""
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .db import execute_wrapper
+
+LOGGER = logging.getLogger(__name__)
+PHASES = OrderedDict([
+    ("db", "SQL queries"),
+    ("auth", "Authentication"),
+    ("view", "View and serialization"),
+    ("render", "Rendering"),
+    ("middleware", "Middleware and framework"),
+])
+
+
+def is_sampled(rate):
+    """
+    Decide if a request is timed.
+
+    Parameters:
+        rate: float
+            Between 0 (none) and 1 (all).
+
+    Returns:
+        bool
+
+    """
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class RequestTimer(object):
+    """ Phase durations of a request, also an execute wrapper timing SQL. """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations = OrderedDict((name, 0.0) for name in PHASES)
+        self.running = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations["db"] += time.perf_counter() - start
+
+    @contextmanager
+    def track(self):
+        """ Time queries of all databases inside the block. """
+        with execute_wrapper(self):
+            yield self
+
+    def start_phase(self, name):
+        """
+        Start timing a phase.
+
+        Parameters:
+            name: str
+
+        """
+        self.running[name] = (time.perf_counter(), self.durations["db"])
+
+    def stop_phase(self, name):
+        """
+        Stop timing a phase, if started, adding its time minus SQL time.
+
+        Parameters:
+            name: str
+
+        """
+        if name not in self.running:
+            return
+        start, db_start = self.running.pop(name)
+        self.durations[name] += (time.perf_counter() - start -
+                                 (self.durations["db"] - db_start))
+
+    @contextmanager
+    def phase(self, name):
+        """ Time a phase inside the block. """
+        self.start_phase(name)
+        try:
+            yield
+        finally:
+            self.stop_phase(name)
+
+    def finish(self):
+        """ Set middleware time as what's left of the total. """
+        total = time.perf_counter() - self.start
+        self.durations["middleware"] = max(
+            0.0, total - sum(duration for name, duration
+                             in self.durations.items()
+                             if name != "middleware"))
+        self.durations["total"] = total
+
+    def get_milliseconds(self):
+        """
+        Get phase durations.
+
+        Returns:
+            OrderedDict, phase name and milliseconds.
+
+        """
+        return OrderedDict((name, round(duration * 1000, 3))
+                           for name, duration in self.durations.items())
+
+    def get_header(self):
+        """
+        Get value for the Server-Timing header.
+
+        Returns:
+            str
+
+        """
+        return ", ".join(
+            '{0};desc="{1}";dur={2}'.format(
+                name, PHASES.get(name, "Total"), milliseconds)
+            for name, milliseconds in self.get_milliseconds().items())
+
+    def log(self, request, response):
+        """
+        Log phase durations of a request as JSON.
+
+        Parameters:
+            request: django.http.HttpRequest
+            response: django.http.HttpResponse
+
+        """
+        view = getattr(response, "renderer_context", {}).get("view")
+        LOGGER.info(json.dumps(OrderedDict([
+            ("method", request.method),
+            ("path", request.path),
+            ("status", response.status_code),
+            ("view", view.__class__.__name__ if view else None),
+            ("action", getattr(view, "action", None)),
+            ("timing", self.get_milliseconds()),
+        ])))
+
+
+class ServerTimingViewMixin(object):
+    """ Viewset mixin timing authentication and the view handler. """
+
+    # Override
+    def perform_authentication(self, request):
+        """ Overriding to time authentication. """
+        timer = getattr(request, "server_timer", None)
+        if timer is None:
+            return super().perform_authentication(request)
+        with timer.phase("auth"):
+            return super().perform_authentication(request)
+
+    # Override
+    def initial(self, request, *args, **kwargs):
+        """ Overriding to start timing the handler after checks. """
+        super().initial(request, *args, **kwargs)
+        timer = getattr(request, "server_timer", None)
+        if timer is not None:
+            timer.start_phase("view")
+
+    # Override
+    def finalize_response(self, request, response, *args, **kwargs):
+        """ Overriding to stop timing the handler. """
+        timer = getattr(request, "server_timer", None)
+        if timer is not None:
+            timer.stop_phase("view")
+        return super().finalize_response(request, response, *args, **kwargs)
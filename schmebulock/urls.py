@@ -17,9 +17,9 @@ from django.conf.urls import url, include
 from django.contrib import admin
 
 from rest_framework_jwt.views import obtain_jwt_token
-from rest_framework_swagger.views import get_swagger_view
 
 from items import urls as item_urls
+from schmebulock import views
 
 
 urlpatterns = [  # pylint: disable=invalid-name
@@ -27,6 +27,13 @@ urlpatterns = [  # pylint: disable=invalid-name
     url(r"^api/auth/",
         include("rest_framework.urls", namespace="rest_framework")),
     url(r"^api/auth/token/", obtain_jwt_token),
-    url(r"^api/docs/", get_swagger_view(title="Schmebulock API")),
+    url(r"^api/docs/", views.SchemaView.as_view(), name="docs"),
+    url(r"^api/db-pool/$", views.DatabasePoolView.as_view(),
+        name="db-pool"),
+    url(r"^api/metrics/$", views.MetricsView.as_view(), name="metrics"),
+    url(r"^api/profiles/$", views.ProfileListView.as_view(),
+        name="profile-list"),
+    url(r"^api/profiles/(?P<profile_id>[0-9a-f]{32})/$",
+        views.ProfileDetailView.as_view(), name="profile-detail"),
     url(r"^api/", include(item_urls)),
 ]
@@ -1,6 +1,10 @@
 """ Module for general purpose functions. """
 from collections import OrderedDict
 
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
 
 def get_model_fields(model):
     """
@@ -64,3 +68,31 @@ def get_default_fields(obj):
             "created_by": obj.created_by,
             "modified": obj.modified.isoformat().replace('+00:00', 'Z'),
             "modified_by": obj.modified_by}
+
+
+def get_etag_response(request, content, content_type, etag):
+    """
+    Get response for already rendered content, empty (304 Not Modified)
+    when the client has it (If-None-Match).
+
+    Parameters:
+        request: rest_framework.request.Request
+        content: bytes
+        content_type: str
+        etag: str
+            Quoted.
+
+    Returns:
+        rest_framework.response.Response
+
+    """
+    etags = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+    if etag in etags or "*" in etags:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response.content = b""
+    else:
+        response = Response(status=status.HTTP_200_OK)
+        response.content = content
+        response["Content-Type"] = content_type
+    response["ETag"] = etag
+    return response
@@ -0,0 +1,100 @@
+""" Views of main app. """
+from django.http import Http404
+from rest_framework import permissions, views
+from rest_framework.renderers import CoreJSONRenderer
+from rest_framework.response import Response
+from rest_framework_swagger.renderers import (
+    OpenAPIRenderer, SwaggerUIRenderer)
+
+from schmebulock import metrics, profiling, schema
+from schmebulock.db.pool import get_pools
+from schmebulock.permissions import IsMetricsReader
+from schmebulock.renderers import PlainTextRenderer
+from schmebulock.utils import get_etag_response
+
+
+class DatabasePoolView(views.APIView):
+    """
+    Statistics of the database connection pools (staff only).
+
+    Pools are per process, so values are for the worker serving the request.
+
+    """
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        """ List stats of every pool in the current process. """
+        return Response(
+            [pool.get_stats() for pool in get_pools().values()])
+
+
+class MetricsView(views.APIView):
+    """
+    Request metrics of all workers in Prometheus text format.
+
+    Open to staff users and requests with METRICS_TOKEN (scrapers).
+
+    """
+    permission_classes = (IsMetricsReader,)
+    renderer_classes = (PlainTextRenderer,)
+
+    def get(self, request):
+        """ Expose metrics added up from every worker. """
+        return Response(
+            metrics.expose(metrics.collect()),
+            content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class ProfileListView(views.APIView):
+    """
+    Saved request profiles, newest first (staff only).
+
+    Send an X-Profile header (or profile query parameter) with a request to
+    profile it, its id comes back in the X-Profile-Id header.
+
+    """
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        """ List profiles without their samples. """
+        return Response(profiling.get_profiles())
+
+
+class ProfileDetailView(views.APIView):
+    """
+    Samples of a profile in folded format, for flamegraph.pl, speedscope, ...
+    (staff only).
+
+    """
+    permission_classes = (permissions.IsAdminUser,)
+    renderer_classes = (PlainTextRenderer,)
+
+    def get(self, request, profile_id):
+        """ Get samples of a profile. """
+        saved = profiling.load(profile_id)
+        if saved is None:
+            raise Http404
+        return Response(saved["folded"])
+
+
+class SchemaView(views.APIView):
+    """
+    Swagger UI and schema of the API (?format=openapi or corejson).
+
+    The schema is generated once per process, see schema module. Only
+    authenticated users get it, client code generation can use the file
+    written by the generate_schema command instead.
+
+    """
+    _ignore_model_permissions = True
+    exclude_from_schema = True
+    renderer_classes = (CoreJSONRenderer, OpenAPIRenderer,
+                        SwaggerUIRenderer)
+
+    def get(self, request):
+        """ Get Swagger UI, or the schema already rendered. """
+        renderer = request.accepted_renderer
+        if isinstance(renderer, SwaggerUIRenderer):
+            return Response(schema.get_schema())
+        content, etag = schema.render(type(renderer))
+        return get_etag_response(request, content, renderer.media_type, etag)